@@ -1,11 +1,14 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse, PlainTextResponse, Response
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse 
 import os
 import sys
+import json
+import asyncio
+import tempfile
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from loan_advisor.services.send_email import send_email_with_url_attachment, send_email_with_aiosmtplib
 from loan_advisor.services.loan_orchestrator import LoanOrchestrator
@@ -31,11 +34,28 @@ app.add_middleware(
 
 orchestrator = LoanOrchestrator()
 
+@app.on_event("startup")
+async def startup_event():
+    await orchestrator.startup()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await orchestrator.shutdown()
+
 class ChatRequest(BaseModel):
     customer_id: str
     message: str
     application_id: Optional[str] = None
     data_update: Optional[Dict[str, Any]] = None
+    # Return the application with the reply: only the fields changed since
+    # since_version when given (and known), otherwise all of it
+    include_application: bool = False
+    since_version: Optional[int] = None
+
+class ApplicationData(BaseModel):
+    version: int
+    full: bool
+    changes: Dict[str, Any]
 
 class ChatResponse(BaseModel):
     application_id: str
@@ -43,9 +63,17 @@ class ChatResponse(BaseModel):
     message: str
     status: str
     action_required: Optional[str] = None
+    version: Optional[int] = None
+    # Set when this turn queued the sanction letter; poll GET /jobs/{job_id}
+    job_id: Optional[str] = None
+    application: Optional[ApplicationData] = None
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+def _application_data(request: ChatRequest, app_id: str) -> Optional[Dict[str, Any]]:
+    if not (request.include_application or request.since_version is not None):
+        return None
+    return orchestrator.application_data(app_id, request.since_version)
+
+async def _chat_turn(request: ChatRequest) -> ChatResponse:
     try:
         if request.application_id:
             # Continue existing conversation
@@ -55,14 +83,17 @@ async def chat_endpoint(request: ChatRequest):
                 request.data_update
             )
             if "error" in result:
-                raise HTTPException(status_code=404, detail=result["error"])
+                raise HTTPException(status_code=result.get("status_code", 404), detail=result["error"])
             
             return ChatResponse(
                 application_id=request.application_id,
                 agent_name=result["agent_name"],
                 message=result["message"],
                 status=result["status"],
-                action_required=result.get("action_required")
+                action_required=result.get("action_required"),
+                version=result.get("version"),
+                job_id=result.get("job_id"),
+                application=_application_data(request, request.application_id)
             )
         else:
             # Start new conversation
@@ -74,21 +105,150 @@ async def chat_endpoint(request: ChatRequest):
                 agent_name=response_data["agent_name"],
                 message=response_data["message"],
                 status=response_data["status"],
-                action_required=response_data.get("action_required")
+                action_required=response_data.get("action_required"),
+                version=response_data.get("version"),
+                job_id=response_data.get("job_id"),
+                application=_application_data(request, result["application_id"])
             )
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/chat", response_model=ChatResponse)
+async def chat_endpoint(request: ChatRequest):
+    return await _chat_turn(request)
+
+class ChatBatchRequest(BaseModel):
+    items: List[ChatRequest]
+
+class ChatBatchError(BaseModel):
+    status_code: int
+    detail: str
+
+class ChatBatchItem(BaseModel):
+    index: int
+    response: Optional[ChatResponse] = None
+    error: Optional[ChatBatchError] = None
+
+class ChatBatchResponse(BaseModel):
+    results: List[ChatBatchItem]
+
+@app.post("/chat/batch", response_model=ChatBatchResponse)
+async def chat_batch_endpoint(request: ChatBatchRequest):
+    """Many /chat turns in one request, e.g. from a messaging gateway.
+
+    Items run concurrently (bounded by ``CHAT_BATCH_CONCURRENCY``), except
+    that items for the same ``application_id`` run in the order given.
+    Each item gets its own result: ``response`` as from /chat, or ``error``
+    with the status code /chat would have answered with.
+    """
+    if len(request.items) > orchestrator.batch_max_items:
+        raise HTTPException(status_code=413, detail=f"At most {orchestrator.batch_max_items} items per batch")
+
+    async def handle(item: ChatRequest):
+        try:
+            return await _chat_turn(item)
+        except HTTPException as e:
+            return ChatBatchError(status_code=e.status_code, detail=str(e.detail))
+
+    results = await orchestrator.process_batch(request.items, lambda item: item.application_id, handle)
+    items = []
+    for index, result in enumerate(results):
+        if isinstance(result, ChatResponse):
+            items.append(ChatBatchItem(index=index, response=result))
+        elif isinstance(result, ChatBatchError):
+            items.append(ChatBatchItem(index=index, error=result))
+        else:
+            items.append(ChatBatchItem(index=index, error=ChatBatchError(status_code=500, detail=str(result))))
+    return ChatBatchResponse(results=items)
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Server-Sent Events variant of /chat.
+
+    Emits ``delta`` events as text becomes available (LLM tokens as they
+    arrive, deterministic agent text as one chunk) and a final ``done``
+    event carrying the same payload as ``ChatResponse``.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def on_text(agent_name: str, text: str):
+        await queue.put(_sse("delta", {"agent_name": agent_name, "text": text}))
+
+    async def run_turn():
+        try:
+            if request.application_id:
+                result = await orchestrator.process_message(
+                    request.application_id,
+                    request.message,
+                    request.data_update,
+                    on_text=on_text
+                )
+                if "error" in result:
+                    await queue.put(_sse("error", {"status_code": result.get("status_code", 404), "detail": result["error"]}))
+                    return
+                app_id = request.application_id
+            else:
+                started = await orchestrator.start_application(request.customer_id, request.message, on_text=on_text)
+                app_id = started["application_id"]
+                result = started["response"]
+
+            await queue.put(_sse("done", ChatResponse(
+                application_id=app_id,
+                agent_name=result["agent_name"],
+                message=result["message"],
+                status=result["status"],
+                action_required=result.get("action_required"),
+                version=result.get("version"),
+                job_id=result.get("job_id"),
+                application=_application_data(request, app_id)
+            ).model_dump()))
+        except Exception as e:
+            await queue.put(_sse("error", {"status_code": 500, "detail": str(e)}))
+        finally:
+            await queue.put(None)
+
+    async def event_stream():
+        task = asyncio.create_task(run_turn())
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            await task
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/application/{app_id}")
-async def get_application(app_id: str):
-    application = orchestrator.get_application(app_id)
-    if not application:
+async def get_application(app_id: str, since_version: Optional[int] = None):
+    """The application, or with ``since_version`` only what changed since (see ApplicationData)."""
+    await orchestrator.prefetch_application(app_id)
+    if since_version is not None:
+        data = orchestrator.application_data(app_id, since_version)
+        if data is None:
+            raise HTTPException(status_code=404, detail="Application not found")
+        return data
+    # Served as stored: no model is built or dumped per poll
+    stored = orchestrator.get_application_json(app_id)
+    if stored is None:
         raise HTTPException(status_code=404, detail="Application not found")
-    return application.dict()
+    data, version = stored
+    return Response(content=data, media_type="application/json", headers={"X-Application-Version": str(version)})
 
 @app.get("/sanction-letter/{app_id}")
 async def download_sanction_letter(app_id: str):
+    await orchestrator.prefetch_application(app_id)
     application = orchestrator.get_application(app_id)
     if not application or not application.sanction_letter_path:
         raise HTTPException(status_code=404, detail="Sanction letter not found")
@@ -106,10 +266,90 @@ async def download_sanction_letter(app_id: str):
         media_type="application/pdf"
     )
 
+class AffordabilityQuote(BaseModel):
+    monthly_salary: float
+    max_emi: float
+    loan_amount: float
+    tenure_months: int
+    interest_rate: float
+    # Rate policy in force when the quote was priced
+    policy_version: str
+    emi: float
+    emi_to_salary: float
+    affordable: bool
+    # Each limit holds the other two terms fixed; None when nothing fits
+    min_tenure_months: Optional[int] = None
+    max_loan_amount: Optional[float] = None
+    max_interest_rate: Optional[float] = None
+
+@app.get("/quote/affordability", response_model=AffordabilityQuote)
+async def quote_affordability(
+    monthly_salary: float = Query(..., gt=0),
+    loan_amount: float = Query(..., gt=0),
+    tenure_months: int = Query(..., ge=1, le=360),
+    interest_rate: Optional[float] = Query(None, ge=0, le=100),
+    credit_score: Optional[int] = Query(None, ge=300, le=900),
+):
+    """What the salary allows for a loan, for the frontend's amount/tenure/rate sliders."""
+    return orchestrator.quote_affordability(monthly_salary, loan_amount, tenure_months, interest_rate, credit_score)
+
+@app.post("/quotes/bulk")
+async def quotes_bulk(request: Request, format: Optional[str] = Query(None, pattern="^(jsonl|csv)$")):
+    """Rate and EMI for every row of a JSONL or CSV body (amount, tenure, optional credit score), streamed back as NDJSON.
+
+    The format defaults to CSV for a ``text/csv`` body and JSON lines otherwise.
+    The whole body is taken in before the first result line is sent.
+    """
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "jsonl")
+    max_bytes = orchestrator.bulk_max_body_bytes
+    too_large = HTTPException(status_code=413, detail=f"Body larger than {max_bytes} bytes")
+    if max_bytes and int(request.headers.get("content-length") or 0) > max_bytes:
+        raise too_large
+    # StreamingResponse listens for disconnects on the same channel the body arrives on,
+    # so the body is taken in first: spooled to disk past 1 MiB, memory stays flat
+    spool = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+    size = 0
+    try:
+        async for data in request.stream():
+            size += len(data)
+            # Chunked bodies carry no Content-Length, so the cap is enforced as they arrive too
+            if max_bytes and size > max_bytes:
+                raise too_large
+            await asyncio.to_thread(spool.write, data)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+
+    async def body():
+        try:
+            while True:
+                data = await asyncio.to_thread(spool.read, 1 << 20)
+                if not data:
+                    break
+                yield data
+        finally:
+            spool.close()
+
+    return StreamingResponse(orchestrator.quote_bulk(body(), fmt), media_type="application/x-ndjson")
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of a background job: queued, running, succeeded or failed, with attempts and the last error."""
+    job = orchestrator.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "AI Loan Processing API"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint: per-phase latency, LLM tokens, cache and fallback counters."""
+    return PlainTextResponse(orchestrator.render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the AI Loan Processing API"}
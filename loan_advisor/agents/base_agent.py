@@ -1,21 +1,24 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Sequence, Union
 from models.loan_models import LoanApplication, AgentResponse
-from services.llm_service import LLMService
+from services.llm_service import get_llm_service
+from services import finance
 
 class BaseAgent(ABC):
     def __init__(self, name: str):
         self.name = name
-        self.llm = LLMService()
+        self.llm = get_llm_service()
     
     @abstractmethod
     async def process(self, application: LoanApplication, message: str) -> AgentResponse:
         pass
     
     def calculate_emi(self, principal: float, rate: float, tenure_months: int) -> float:
-        monthly_rate = rate / (12 * 100)
-        emi = principal * monthly_rate * (1 + monthly_rate)**tenure_months / ((1 + monthly_rate)**tenure_months - 1)
-        return round(emi, 2)
+        return finance.emi(principal, rate, tenure_months, decimals=2)
+
+    def calculate_emis(self, principal: float, rates: Union[float, Sequence[float]], tenures: Sequence[int]) -> List[float]:
+        """EMIs for a grid of tenures (each with its own rate, or one shared rate) in one call."""
+        return finance.emi(principal, rates, list(tenures), decimals=2).tolist()
     
     def get_context(self, application: LoanApplication) -> Dict[str, Any]:
         return {
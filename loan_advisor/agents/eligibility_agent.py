@@ -1,8 +1,11 @@
 from agents.base_agent import BaseAgent
 from models.loan_models import LoanApplication, AgentResponse, LoanStatus
+from services.extraction import extract
+from services.rate_calculator import RateCalculator
+from services import finance
+from typing import Optional, Tuple
 import os
 from dotenv import load_dotenv
-import re
 
 load_dotenv()
 API_ENDPOINT = os.getenv("API_ENDPOINT")
@@ -12,151 +15,86 @@ BUCKET_ID = os.getenv("BUCKET_ID")
 class EligibilityAgent(BaseAgent):
     def __init__(self):
         super().__init__("Eligibility Agent")
+        self.rate_calculator = RateCalculator()
     
     async def process(self, application: LoanApplication, message: str) -> AgentResponse:
-        ml = (message or "").lower()
+        fields = extract(message)
+        # Terms re-priced in this turn all use one version of the rate policy
+        policy = self.rate_calculator.policy
 
         # Accept user adjustments to tenure or amount and recompute EMI before eligibility decision
         updated_fields = {}
 
-        # Tenure updates like: "increase tenure to 69 months", "tenure to 48", "for 60 months"
-        tmatch = re.search(r'(\d+)\s*(months?|month|years?|yrs?|y)\b', ml)
-        if tmatch:
-            tval = int(tmatch.group(1))
-            unit = tmatch.group(2)
-            if unit.startswith('y') or unit.startswith('yr') or unit.startswith('year'):
-                tval *= 12
-            application.tenure_months = tval
-            updated_fields["tenure_months"] = tval
-        else:
-            dirmatch = re.search(r'(?:tenure\s*(?:to|is|=)\s*)(\d{1,3})\s*(months?|month|years?|yrs?|y)\b', ml)
-            if dirmatch:
-                n = int(dirmatch.group(1))
-                unit = dirmatch.group(2)
-                if unit.startswith('y') or unit.startswith('yr') or unit.startswith('year'):
-                    n *= 12
-                application.tenure_months = n
-                updated_fields["tenure_months"] = n
+        # Tenure updates like: "increase tenure to 69 months", "for 60 months", "tenure to 5 years"
+        if fields.tenure_months is not None:
+            application.tenure_months = fields.tenure_months
+            updated_fields["tenure_months"] = fields.tenure_months
 
         # Amount updates like: "reduce amount to 300000", "loan amount 3 lakhs"
-        amatch = re.search(r'(?:amount|loan\s*amount)[^\d]*(\d[\d,]*)(?:\s*)(lakh|lakhs|lac|lacs|lkhs|lkh|crore|crores)?', message, re.IGNORECASE)
-        if amatch:
-            raw = amatch.group(1).replace(',', '')
-            try:
-                base = float(raw)
-            except Exception:
-                base = None
-            unit = amatch.group(2).lower() if amatch.group(2) else None
-            if base is not None:
-                if unit:
-                    if re.search(r'crore|crores', unit):
-                        base *= 10000000
-                    elif re.search(r'lakh|lakhs|lac|lacs|lkhs|lkh', unit):
-                        base *= 100000
-                application.loan_amount = base
-                updated_fields["loan_amount"] = base
+        if fields.amount_update is not None:
+            application.loan_amount = fields.amount_update
+            updated_fields["loan_amount"] = fields.amount_update
 
         # If terms changed, recompute rate slab and EMI deterministically
-        def calc_emi(p: float, annual_rate: float, n: int) -> float:
-            r = (annual_rate or 0) / 12 / 100
-            if r <= 0 or n <= 0:
-                return p / max(n, 1)
-            pow_val = (1 + r) ** n
-            return p * r * pow_val / (pow_val - 1)
-
         if updated_fields:
             # Determine interest rate slab from amount
             if application.loan_amount is not None:
-                if application.loan_amount <= 500000:
-                    interest_rate = 10.5
-                elif application.loan_amount <= 1000000:
-                    interest_rate = 11.5
-                else:
-                    interest_rate = 12.5
+                interest_rate = policy.slab_rate(application.loan_amount)
             else:
-                interest_rate = application.interest_rate or 11.5
+                interest_rate = application.interest_rate or policy.default_slab_rate
 
             if application.loan_amount and application.tenure_months:
-                emi = calc_emi(application.loan_amount, interest_rate, int(application.tenure_months))
+                emi = finance.emi(application.loan_amount, interest_rate, int(application.tenure_months))
                 application.interest_rate = interest_rate
+                application.rate_policy_version = policy.version
                 application.emi = emi
                 updated_fields["interest_rate"] = interest_rate
+                updated_fields["rate_policy_version"] = policy.version
                 updated_fields["emi"] = emi
 
         # If user gave an affirmative reply without explicit numbers, auto-apply best suggestion
         if not updated_fields:
-            affirmative = any(
-                phrase in ml for phrase in [
-                    "yes", "ok", "okay", "sure", "do that", "do it", "proceed", "go ahead", "please do"
-                ]
-            )
-            if affirmative:
+            if "affirmative" in fields.intents:
                 # Recompute suggestions based on current state
                 salary = application.customer.salary or 0
                 loan_amount = application.loan_amount or 0
                 annual_rate = application.interest_rate
+                rate_policy_version = application.rate_policy_version
                 # If interest_rate not set yet, infer slab from amount
                 if annual_rate is None:
-                    if loan_amount <= 500000:
-                        annual_rate = 10.5
-                    elif loan_amount <= 1000000:
-                        annual_rate = 11.5
-                    else:
-                        annual_rate = 12.5
-                rate = (annual_rate or 0) / 12 / 100
+                    annual_rate = policy.slab_rate(loan_amount)
+                    rate_policy_version = policy.version
+                annual_rate = annual_rate or 0
                 tenure = int(application.tenure_months or 0)
 
-                def emi_for(p: float, r: float, n: int) -> float:
-                    if r <= 0 or n <= 0:
-                        return p / max(n, 1)
-                    pow_val = (1 + r) ** n
-                    return p * r * pow_val / (pow_val - 1)
-
-                target_emi = salary * 0.5
-                suggested_tenure = None
-                suggested_emi = None
-                if rate > 0 and loan_amount > 0:
-                    for n in range(max(tenure, 12), 121):
-                        e = emi_for(loan_amount, rate, n)
-                        if e <= target_emi:
-                            suggested_tenure = n
-                            suggested_emi = e
-                            break
-
-                suggested_amount = None
-                if rate > 0 and tenure > 0:
-                    pow_val = (1 + rate) ** tenure
-                    k = rate * pow_val / (pow_val - 1) if pow_val > 1 else (rate or 1)
-                    if k > 0:
-                        suggested_amount = target_emi / k
-                        if suggested_amount < 50000:
-                            suggested_amount = None
+                target_emi = salary * finance.MAX_EMI_TO_SALARY
+                suggested_tenure, suggested_emi = self._shortest_affordable_tenure(loan_amount, annual_rate, tenure, target_emi)
+                suggested_amount = self._max_affordable_amount(annual_rate, tenure, target_emi)
 
                 # Prefer tenure increase if available; else reduce amount within pre-approved cap
                 if suggested_tenure:
                     application.tenure_months = suggested_tenure
                     application.interest_rate = annual_rate
-                    application.emi = calc_emi(loan_amount, annual_rate, suggested_tenure)
+                    application.rate_policy_version = rate_policy_version
+                    application.emi = finance.emi(loan_amount, annual_rate, suggested_tenure)
                     updated_fields["tenure_months"] = suggested_tenure
                     updated_fields["interest_rate"] = annual_rate
+                    updated_fields["rate_policy_version"] = rate_policy_version
                     updated_fields["emi"] = application.emi
                 elif suggested_amount:
                     cap = application.pre_approved_limit or suggested_amount
                     amt = min(suggested_amount, cap)
                     application.loan_amount = amt
                     # Recompute slab after amount change
-                    if application.loan_amount <= 500000:
-                        annual_rate = 10.5
-                    elif application.loan_amount <= 1000000:
-                        annual_rate = 11.5
-                    else:
-                        annual_rate = 12.5
+                    annual_rate = policy.slab_rate(application.loan_amount)
                     application.interest_rate = annual_rate
+                    application.rate_policy_version = policy.version
                     if application.tenure_months:
-                        application.emi = calc_emi(application.loan_amount, annual_rate, int(application.tenure_months))
+                        application.emi = finance.emi(application.loan_amount, annual_rate, int(application.tenure_months))
                         updated_fields["emi"] = application.emi
                     updated_fields["loan_amount"] = application.loan_amount
                     updated_fields["interest_rate"] = annual_rate
+                    updated_fields["rate_policy_version"] = policy.version
         
         # Check online loan limit (1 crore maximum)
         if application.loan_amount > 10000000:
@@ -186,8 +124,7 @@ class EligibilityAgent(BaseAgent):
         if (application.loan_amount <= application.pre_approved_limit and 
             application.customer.credit_score >= 700):
             
-            total_payable = application.emi * application.tenure_months
-            total_interest = total_payable - application.loan_amount
+            total_payable, total_interest = finance.totals(application.loan_amount, application.emi, application.tenure_months)
             
             return AgentResponse(
                 agent_name=self.name,
@@ -230,15 +167,13 @@ class EligibilityAgent(BaseAgent):
             )
         
         if emi_ratio <= 50:
-            total_payable = application.emi * application.tenure_months
-            total_interest = total_payable - application.loan_amount
+            total_payable, total_interest = finance.totals(application.loan_amount, application.emi, application.tenure_months)
             
             # Check if user has confirmed the loan terms
-            confirmation_keywords = ['yes', 'confirm', 'proceed', 'approve', 'accept', 'agree']
-            user_confirmed = any(keyword in ml for keyword in confirmation_keywords)
+            user_confirmed = "confirmation" in fields.intents
             
             # If salary was just provided (not a confirmation), ask for confirmation first
-            if not user_confirmed and 'salary' in ml:
+            if not user_confirmed and "salary" in fields.intents:
                 return AgentResponse(
                     agent_name=self.name,
                     message=(
@@ -283,37 +218,14 @@ class EligibilityAgent(BaseAgent):
             # Compute actionable suggestions
             salary = application.customer.salary or 0
             loan_amount = application.loan_amount or 0
-            rate = (application.interest_rate or 0) / 12 / 100  # monthly rate
+            annual_rate = application.interest_rate or 0
             tenure = int(application.tenure_months or 0)
 
-            def emi_for(p: float, r: float, n: int) -> float:
-                if r <= 0 or n <= 0:
-                    return p / max(n, 1)
-                pow_val = (1 + r) ** n
-                return p * r * pow_val / (pow_val - 1)
-
-            target_emi = salary * 0.5
-            suggested_tenure = None
-            suggested_emi = None
-            if rate > 0 and loan_amount > 0:
-                # Try increasing tenure up to 120 months to meet target EMI
-                for n in range(max(tenure, 12), 121):
-                    e = emi_for(loan_amount, rate, n)
-                    if e <= target_emi:
-                        suggested_tenure = n
-                        suggested_emi = e
-                        break
-
-            suggested_amount = None
-            if rate > 0 and tenure > 0:
-                # Compute max principal for current tenure such that EMI <= target
-                pow_val = (1 + rate) ** tenure
-                k = rate * pow_val / (pow_val - 1) if pow_val > 1 else (rate or 1)
-                if k > 0:
-                    suggested_amount = target_emi / k
-                    # Omit unrealistic tiny amounts which likely stem from misparsed salary
-                    if suggested_amount < 50000:
-                        suggested_amount = None
+            target_emi = salary * finance.MAX_EMI_TO_SALARY
+            # Try increasing tenure up to 120 months to meet target EMI
+            suggested_tenure, suggested_emi = self._shortest_affordable_tenure(loan_amount, annual_rate, tenure, target_emi)
+            # Max principal for current tenure such that EMI <= target
+            suggested_amount = self._max_affordable_amount(annual_rate, tenure, target_emi)
 
             # Build detailed rejection message
             rejection_msg = (
@@ -377,4 +289,22 @@ class EligibilityAgent(BaseAgent):
                     "rejection_reason": f"EMI-to-salary ratio {emi_ratio:.1f}% exceeds 50% limit. Suggested: Increase tenure to {suggested_tenure} months or reduce amount to ₹{suggested_amount:,.0f}" if suggested_amount else f"EMI-to-salary ratio {emi_ratio:.1f}% exceeds 50% limit. Suggested: Increase tenure to {suggested_tenure} months",
                     **updated_fields
                 }
-            )
\ No newline at end of file
+            )
+
+    def _shortest_affordable_tenure(self, loan_amount: float, annual_rate: float, tenure: int,
+                                    target_emi: float) -> Tuple[Optional[int], Optional[float]]:
+        """Shortest tenure from max(tenure, 12) up to 120 months whose EMI fits ``target_emi``."""
+        if annual_rate <= 0 or loan_amount <= 0:
+            return None, None
+        n = finance.min_tenure(loan_amount, annual_rate, target_emi, max(tenure, 12), finance.MAX_TENURE_MONTHS)
+        if n is None:
+            return None, None
+        return n, finance.emi(loan_amount, annual_rate, n)
+
+    def _max_affordable_amount(self, annual_rate: float, tenure: int, target_emi: float) -> Optional[float]:
+        """Largest principal whose EMI over ``tenure`` fits ``target_emi``; None below ₹50,000."""
+        if annual_rate <= 0 or tenure <= 0:
+            return None
+        suggested_amount = finance.max_principal(annual_rate, tenure, target_emi)
+        # Omit unrealistic tiny amounts which likely stem from misparsed salary
+        return suggested_amount if suggested_amount is not None and suggested_amount >= 50000 else None
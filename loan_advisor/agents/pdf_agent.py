@@ -1,3 +1,4 @@
+import asyncio
 import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -6,9 +7,11 @@ from dotenv import load_dotenv
 import logging
 import io
 import uuid
+import time
 from appwrite.input_file import InputFile
 from appwrite.services.storage import Storage
 from datetime import datetime, timedelta
+from typing import Any, Callable, Dict
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
@@ -19,6 +22,7 @@ from agents.base_agent import BaseAgent
 from models.loan_models import LoanApplication, AgentResponse, LoanStatus
 from services.gen_email import generate_email, convert_string_to_json
 from services.send_email import send_email_with_url_attachment, send_email_with_aiosmtplib
+from services.metrics import PHASE_SECONDS
 
 load_dotenv()
 BUCKET_ID = os.getenv("BUCKET_ID")
@@ -50,47 +54,23 @@ class PDFAgent(BaseAgent):
                 action_required="collect_name"
             )
 
-        pdf_result = self._generate_sanction_letter(application)
-        pdf_path = pdf_result["filename"]
-        appwrite_file = pdf_result["appwrite_file"]
-        
-        # Generate public URL for the PDF
-        file_url = f"{os.getenv('API_ENDPOINT')}/storage/buckets/{BUCKET_ID}/files/{appwrite_file['$id']}/view?project={os.getenv('PROJECT_ID')}"
-        
-        # Send email with PDF attachment
-        if application.customer.email:
-            try:
-                email_context = (
-                    f"Loan Application Approved for {application.customer.name}. "
-                    f"Loan Amount: ₹{application.loan_amount:,.0f}, "
-                    f"EMI: ₹{application.emi:,.0f}, "
-                    f"Tenure: {application.tenure_months} months, "
-                    f"Interest Rate: {application.interest_rate}% p.a., "
-                    f"Credit Score: {application.customer.credit_score}, "
-                    f"Status: APPROVED. Sanction letter attached."
+        if application.sanction_letter_status == "queued":
+            return AgentResponse(
+                agent_name=self.name,
+                message=(
+                    "Your sanction letter is still being prepared. "
+                    f"It will be emailed to {application.customer.email} as soon as it is ready."
                 )
-                email_json_str = generate_email(application.customer.email, email_context)
-                email_data = convert_string_to_json(email_json_str)
-                if email_data:
-                    await send_email_with_url_attachment(
-                        email_data["recipient_email"], 
-                        email_data["subject"], 
-                        email_data["body"],
-                        file_path=file_url
-                    )
-            except Exception as e:
-                print(f"Failed to send email with attachment: {e}")
-        
-        # Calculate total payable and interest
-        total_payable = application.emi * application.tenure_months
-        total_interest = total_payable - application.loan_amount
-        
+            )
+
+        # Rendering, uploading and emailing the letter runs as a background job
+        # (see deliver_sanction_letter); the orchestrator queues it once this turn is saved
         return AgentResponse(
             agent_name=self.name,
             message=(
-                f"**Your SYNFIN sanction letter has been generated successfully!**\n\n"
-                f"**Email Confirmation:**\n"
-                f"A confirmation email with your sanction letter has been sent to {application.customer.email}.\n\n"
+                f"**Congratulations! Your SYNFIN loan has been approved.**\n\n"
+                f"**Sanction Letter:**\n"
+                f"Your sanction letter is being prepared and will be emailed to {application.customer.email} shortly.\n\n"
                 f"**Next Steps:**\n"
                 f"• Check your email for the sanction letter\n"
                 f"• Review the terms and conditions\n"
@@ -98,14 +78,64 @@ class PDFAgent(BaseAgent):
                 f"• First EMI due: 30 days from disbursement\n\n"
                 f"Thank you for choosing SYNFIN! We're excited to support your financial journey."
             ),
+            action_required="sanction_letter_queued",
             data_updates={
-                "status": LoanStatus.COMPLETED.value,
-                "sanction_letter_path": pdf_path
+                "sanction_letter_status": "queued",
+                "sanction_letter_job_id": str(uuid.uuid4())
             }
         )
-    
+
+    async def deliver_sanction_letter(self, application: LoanApplication, progress: Dict[str, Any],
+                                      checkpoint: Callable[..., None]) -> Dict[str, Any]:
+        """Render, upload and email the sanction letter; run by the job queue.
+
+        Completed steps are recorded with ``checkpoint`` and skipped when a
+        retry finds them in ``progress``. Failures raise so the queue retries.
+        """
+        if "file_url" not in progress:
+            # ReportLab and the Appwrite SDK block; keep them off the event loop
+            pdf_result = await asyncio.to_thread(self._generate_sanction_letter, application)
+            appwrite_file = pdf_result["appwrite_file"]
+            # Generate public URL for the PDF
+            file_url = f"{os.getenv('API_ENDPOINT')}/storage/buckets/{BUCKET_ID}/files/{appwrite_file['$id']}/view?project={os.getenv('PROJECT_ID')}"
+            checkpoint(sanction_letter_path=pdf_result["filename"], file_url=file_url)
+
+        # Send email with PDF attachment
+        if application.customer.email and not progress.get("emailed"):
+            email_context = (
+                f"Loan Application Approved for {application.customer.name}. "
+                f"Loan Amount: ₹{application.loan_amount:,.0f}, "
+                f"EMI: ₹{application.emi:,.0f}, "
+                f"Tenure: {application.tenure_months} months, "
+                f"Interest Rate: {application.interest_rate}% p.a., "
+                f"Credit Score: {application.customer.credit_score}, "
+                f"Status: APPROVED. Sanction letter attached."
+            )
+            with PHASE_SECONDS.time(phase="email_generate"):
+                email_json_str = await generate_email(application.customer.email, email_context)
+            email_data = convert_string_to_json(email_json_str)
+            if not email_data:
+                raise RuntimeError("Could not generate the sanction letter email")
+            with PHASE_SECONDS.time(phase="email_send"):
+                # One attempt per job run (the queue retries with backoff); the
+                # Gmail client blocks, so it runs on a worker thread with its own loop
+                sent = await asyncio.to_thread(asyncio.run, send_email_with_url_attachment(
+                    email_data["recipient_email"],
+                    email_data["subject"],
+                    email_data["body"],
+                    file_path=progress["file_url"],
+                    retries=1,
+                    delay=0
+                ))
+            if sent is None:
+                raise RuntimeError(f"Could not email the sanction letter to {application.customer.email}")
+            checkpoint(emailed=True)
+
+        return {"sanction_letter_path": progress["sanction_letter_path"], "emailed": bool(progress.get("emailed"))}
+
     def _generate_sanction_letter(self, application: LoanApplication) -> str:
         filename = f"sanction_letters/sanction_letter_{application.application_id}.pdf"
+        render_started = time.perf_counter()
         buffer = io.BytesIO()
         c = canvas.Canvas(buffer, pagesize=letter)
         width, height = letter
@@ -235,13 +265,15 @@ class PDFAgent(BaseAgent):
         c.save()
         pdf_bytes = buffer.getvalue()
         buffer.close()
+        PHASE_SECONDS.observe(time.perf_counter() - render_started, phase="pdf_render")
 
         # uploading to Appwrite Storage
-        appwrite_file = storage.create_file(
-            BUCKET_ID,
-            str(uuid.uuid4()),
-            InputFile.from_bytes(pdf_bytes, filename, "application/pdf")
-        )
+        with PHASE_SECONDS.time(phase="pdf_upload"):
+            appwrite_file = storage.create_file(
+                BUCKET_ID,
+                str(uuid.uuid4()),
+                InputFile.from_bytes(pdf_bytes, filename, "application/pdf")
+            )
 
         logging.info(f"File uploaded on Appwrite: {appwrite_file}")
 
@@ -1,7 +1,8 @@
 from agents.base_agent import BaseAgent
 from models.loan_models import LoanApplication, AgentResponse, LoanStatus
 from services.rate_calculator import RateCalculator
-import re
+from services.extraction import extract
+from services import finance
 
 class SalesAgent(BaseAgent):
     def __init__(self):
@@ -10,41 +11,19 @@ class SalesAgent(BaseAgent):
     
     async def process(self, application: LoanApplication, message: str) -> AgentResponse:
         context = self.get_context(application)
-        ml = (message or "").lower()
+        fields = extract(message)
+        intents = fields.intents
 
         # Handle uncertainty/hesitation intent empathetically to ease the user
-        base_tokens = [
-            "unsure", "not sure", "nervous", "confused", "uncertain", "hesitant", "anxious",
-            "doubt", "dilemma", "overwhelmed", "worried", "maybe", "perhaps", "not confident"
-        ]
-        regex_patterns = [
-            r"\bconfus(?:e|ed|ion)\b",
-            r"\bmaybe\b",
-            r"\bperhaps\b",
-            r"\bnot\s+confident\b",
-            r"\b(?:can\'t|cannot)\s+(?:decide|choose)\b",
-            r"\bnot\s+sure\b",
-            r"\bunsure\b",
-            r"\bdilemma\b",
-            r"\boverwhelmed\b",
-            r"\bworried\b",
-            r"\bhesitant\b",
-            r"\banxious\b",
-        ]
-        ambiguous_tenure = re.search(r"\b(\d+)\s*(months?|years?)\b.*\bor\b.*\b(\d+)\s*(months?|years?)\b", ml)
-        uncertainty_intent = (
-            any(p in ml for p in base_tokens)
-            or any(re.search(pat, ml) for pat in regex_patterns)
-            or bool(ambiguous_tenure)
-        )
+        ambiguous_tenure = fields.tenure_alternatives
+        uncertainty_intent = "uncertainty" in intents or ambiguous_tenure is not None
 
         if uncertainty_intent:
             if application.loan_amount is None:
                 rate = 10.5
                 amt1, ten1 = 200000, 36
                 amt2, ten2 = 300000, 48
-                emi1 = self.calculate_emi(amt1, rate, ten1)
-                emi2 = self.calculate_emi(amt2, rate, ten2)
+                emi1, emi2 = finance.emi([amt1, amt2], rate, [ten1, ten2], decimals=2).tolist()
                 msg = (
                     "It's completely okay to feel nervous or unsure — I'm here to help.\n"
                     "We can start with small, comfortable plans and adjust as you feel confident.\n\n"
@@ -64,11 +43,9 @@ class SalesAgent(BaseAgent):
                 amt = application.loan_amount
                 tchoices = [24, 36, 60]
                 # Calculate dynamic rates for each tenure
-                rates_and_emis = {}
-                for t in tchoices:
-                    rate = self.rate_calculator.calculate_rate(amt, t)
-                    emi = self.calculate_emi(amt, rate, t)
-                    rates_and_emis[t] = {"rate": rate, "emi": emi}
+                rates = self.rate_calculator.calculate_rates(amt, tchoices).tolist()
+                emis = self.calculate_emis(amt, rates, tchoices)
+                rates_and_emis = {t: {"rate": rate, "emi": emi} for t, rate, emi in zip(tchoices, rates, emis)}
                 
                 msg = (
                     "I understand the hesitation — let's make this simple.\n"
@@ -88,15 +65,10 @@ class SalesAgent(BaseAgent):
                 amt = application.loan_amount
                 rate = self.rate_calculator.calculate_rate(amt, application.tenure_months)
 
-                m = ambiguous_tenure
-                if m:
+                if ambiguous_tenure:
                     try:
-                        n1 = int(m.group(1)); u1 = (m.group(2) or "")
-                        n2 = int(m.group(3)); u2 = (m.group(4) or "")
-                        t1 = n1 * 12 if (u1.startswith("y")) else n1
-                        t2 = n2 * 12 if (u2.startswith("y")) else n2
-                        e1 = self.calculate_emi(amt, rate, t1)
-                        e2 = self.calculate_emi(amt, rate, t2)
+                        t1, t2 = ambiguous_tenure
+                        e1, e2 = self.calculate_emis(amt, rate, [t1, t2])
                         msg = (
                             f"You mentioned {t1} months versus {t2} months. For ₹{amt:,.0f} at {rate}% p.a.:\n"
                             f"• {t1} months → EMI ₹{e1:,.0f}\n"
@@ -113,7 +85,7 @@ class SalesAgent(BaseAgent):
 
                 base_t = int(application.tenure_months)
                 choices = sorted(set([max(12, base_t - 12), base_t, min(120, base_t + 12)]))
-                emis = {t: self.calculate_emi(amt, rate, t) for t in choices}
+                emis = dict(zip(choices, self.calculate_emis(amt, rate, choices)))
                 comp_lines = "\n".join([f"• {t} months → EMI ₹{emis[t]:,.0f}" for t in choices])
                 msg = (
                     f"Here are nearby tenure options for ₹{amt:,.0f} at {rate}% p.a.:\n"
@@ -127,19 +99,19 @@ class SalesAgent(BaseAgent):
                 )
 
         # Handle interest rate negotiation requests
-        rate_negotiation_keywords = ["reduce", "lower", "decrease", "discount", "better rate", "negotiate", "can you do better", "best rate", "cheaper", "less interest"]
-        if any(keyword in ml for keyword in rate_negotiation_keywords):
+        if "negotiation" in intents:
             if application.loan_amount:
                 # Get current rate dynamically
+                policy = self.rate_calculator.policy
                 tenure = application.tenure_months or 36
-                current_rate = self.rate_calculator.calculate_rate(application.loan_amount, tenure)
+                current_rate = policy.rate(application.loan_amount, tenure)
                 
                 # Get negotiated rate
-                reduced_rate = self.rate_calculator.get_negotiated_rate(current_rate, application.loan_amount)
+                reduced_rate = policy.negotiated_rate(current_rate, application.loan_amount)
                 
                 if application.tenure_months:
-                    old_emi = self.calculate_emi(application.loan_amount, current_rate, application.tenure_months)
-                    new_emi = self.calculate_emi(application.loan_amount, reduced_rate, application.tenure_months)
+                    old_emi, new_emi = self.calculate_emis(application.loan_amount, [current_rate, reduced_rate],
+                                                           [application.tenure_months] * 2)
                     savings = old_emi - new_emi
                     total_savings = savings * application.tenure_months
                     
@@ -157,7 +129,7 @@ class SalesAgent(BaseAgent):
                     return AgentResponse(
                         agent_name=self.name,
                         message=msg,
-                        data_updates={"interest_rate": reduced_rate, "emi": new_emi}
+                        data_updates={"interest_rate": reduced_rate, "rate_policy_version": policy.version, "emi": new_emi}
                     )
                 else:
                     msg = (
@@ -166,14 +138,15 @@ class SalesAgent(BaseAgent):
                     )
                     
                     tenures = [12, 24, 36, 48, 60]
-                    emi_options = "\n".join([f"• **{t} months** → EMI ₹{self.calculate_emi(application.loan_amount, reduced_rate, t):,.0f}" for t in tenures])
+                    emis = self.calculate_emis(application.loan_amount, reduced_rate, tenures)
+                    emi_options = "\n".join([f"• **{t} months** → EMI ₹{emi:,.0f}" for t, emi in zip(tenures, emis)])
                     
                     msg += f"{emi_options}\n\n **This is our best negotiated rate!** Which tenure works for you?"
                     
                     return AgentResponse(
                         agent_name=self.name,
                         message=msg,
-                        data_updates={"interest_rate": reduced_rate},
+                        data_updates={"interest_rate": reduced_rate, "rate_policy_version": policy.version},
                         action_required="collect_tenure"
                     )
             else:
@@ -186,47 +159,16 @@ class SalesAgent(BaseAgent):
 
         # Extract loan amount from message (allow updates if user provides new amount)
         # Check if user is explicitly updating the amount
-        is_amount_update = any(word in ml for word in ['change', 'update', 'reduce', 'increase', 'lower', 'need', 'want', 'loan'])
+        is_amount_update = "amount_update" in intents
         
-        if not application.loan_amount or is_amount_update:
-            # Look for amount patterns in the message
-            amount_patterns = [
-                r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:lakh|lakhs)',
-                r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:crore|crores)',
-                r'₹\s*(\d+(?:,\d+)*(?:\.\d+)?)',
-                r'(\d+(?:,\d+)*(?:\.\d+)?)\s*rupees?',
-                r'\b(\d{5,})\b'  # 5+ digit numbers as potential amounts
-            ]
-            
-            for pattern in amount_patterns:
-                match = re.search(pattern, ml)
-                if match:
-                    amount_str = match.group(1).replace(',', '')
-                    try:
-                        amount = float(amount_str)
-                        if 'lakh' in ml:
-                            amount *= 100000
-                        elif 'crore' in ml:
-                            amount *= 10000000
-                        
-                        # Accept reasonable loan amounts with upper limit
-                        if 10000 <= amount <= 100000000:  # 10k to 10 crore
-                            application.loan_amount = amount
-                            break
-                    except ValueError:
-                        continue
+        if (not application.loan_amount or is_amount_update) and fields.sales_amount is not None:
+            application.loan_amount = fields.sales_amount
 
         # Only extract tenure if explicitly mentioned with units, not bare numbers
-        if not application.tenure_months:
-            tmatch = re.search(r"(\d+)\s*(months?|month|yrs?|years?|y)\b", ml)
-            if tmatch:
-                tval = int(tmatch.group(1))
-                unit = tmatch.group(2)
-                if unit.startswith("y") or unit.startswith("yr") or unit.startswith("year"):
-                    tval *= 12
-                application.tenure_months = tval
+        if not application.tenure_months and fields.tenure_months is not None:
+            application.tenure_months = fields.tenure_months
 
-        if ("interest" in ml or "rate" in ml) and "negotiate" not in ml and "reduce" not in ml and "lower" not in ml:
+        if "rate_question" in intents and "rate_pushback" not in intents:
             if application.loan_amount is not None:
                 # Calculate dynamic rate for standard 36-month tenure
                 slab = self.rate_calculator.calculate_rate(application.loan_amount, 36)
@@ -254,7 +196,7 @@ class SalesAgent(BaseAgent):
                 action_required="collect_tenure" if application.loan_amount else "collect_loan_amount"
             )
 
-        if any(t in ml for t in ["repayment", "repay", "plan", "plans", "schedule", "installment", "emi options", "tenure options"]):
+        if "repayment" in intents:
             if application.loan_amount is not None:
                 msg = (
                     "Here's how repayment works at SYNFIN:\n"
@@ -326,12 +268,11 @@ class SalesAgent(BaseAgent):
             
             # Calculate dynamic rates for different tenures
             tenures = [12, 24, 36, 48, 60]
-            tenure_options = []
-            
-            for t in tenures:
-                rate = self.rate_calculator.calculate_rate(amt, t)
-                emi = self.calculate_emi(amt, rate, t)
-                tenure_options.append({"tenure": t, "rate": rate, "emi": emi})
+            rates = self.rate_calculator.calculate_rates(amt, tenures).tolist()
+            tenure_options = [
+                {"tenure": t, "rate": rate, "emi": emi}
+                for t, rate, emi in zip(tenures, rates, self.calculate_emis(amt, rates, tenures))
+            ]
             
             # Get rate breakdown for messaging
             breakdown = self.rate_calculator.get_rate_breakdown(amt, 36)
@@ -365,14 +306,22 @@ class SalesAgent(BaseAgent):
         # Use existing rate if already negotiated, otherwise calculate dynamically
         if hasattr(application, 'interest_rate') and application.interest_rate:
             interest_rate = application.interest_rate
+            rate_policy_version = application.rate_policy_version
         else:
-            interest_rate = self.rate_calculator.calculate_rate(
+            policy = self.rate_calculator.policy
+            interest_rate = policy.rate(
                 application.loan_amount, 
                 application.tenure_months,
                 application.customer.credit_score
             )
+            rate_policy_version = policy.version
         
-        emi = self.calculate_emi(application.loan_amount, interest_rate, application.tenure_months)
+        alt_tenure_short = max(12, application.tenure_months - 12)
+        alt_tenure_long = min(60, application.tenure_months + 12)
+        emi, alt_emi_short, alt_emi_long = self.calculate_emis(
+            application.loan_amount, interest_rate,
+            [application.tenure_months, alt_tenure_short, alt_tenure_long]
+        )
         
         context.update({
             "loan_amount": application.loan_amount,
@@ -381,13 +330,7 @@ class SalesAgent(BaseAgent):
             "emi": emi
         })
         
-        total_interest = (emi * application.tenure_months) - application.loan_amount
-        total_payable = emi * application.tenure_months
-        
-        alt_tenure_short = max(12, application.tenure_months - 12)
-        alt_tenure_long = min(60, application.tenure_months + 12)
-        alt_emi_short = self.calculate_emi(application.loan_amount, interest_rate, alt_tenure_short)
-        alt_emi_long = self.calculate_emi(application.loan_amount, interest_rate, alt_tenure_long)
+        total_payable, total_interest = finance.totals(application.loan_amount, emi, application.tenure_months)
         
         summary_msg = (
             f" **Perfect! Here's your personalized loan plan:**\n\n"
@@ -408,6 +351,7 @@ class SalesAgent(BaseAgent):
             message=summary_msg,
             data_updates={
                 "interest_rate": interest_rate,
+                "rate_policy_version": rate_policy_version,
                 "emi": emi,
                 "status": LoanStatus.SALES_DISCUSSION.value
             }
@@ -1,7 +1,7 @@
 import random
-import re
 from agents.base_agent import BaseAgent
 from models.loan_models import LoanApplication, AgentResponse, LoanStatus
+from services.extraction import extract, is_valid_pan, is_valid_aadhar
 
 class VerificationAgent(BaseAgent):
     def __init__(self):
@@ -129,30 +129,16 @@ class VerificationAgent(BaseAgent):
     # === Helpers ===
     def _is_valid_pan(self, pan: str) -> bool:
         """Valid PAN: 5 uppercase letters, 4 digits, 1 uppercase letter."""
-        return bool(re.fullmatch(r"[A-Z]{5}[0-9]{4}[A-Z]", (pan or "").upper()))
+        return is_valid_pan(pan)
 
     def _is_valid_aadhar(self, aadhar: str) -> bool:
         """Valid Aadhar: exactly 12 digits."""
-        return bool(re.fullmatch(r"\d{12}", aadhar or ""))
+        return is_valid_aadhar(aadhar)
 
     def _find_pan_attempt(self, message: str) -> str | None:
         """Try to find a PAN-like token in the message when user mentions PAN."""
-        msg = message or ""
-        if re.search(r"\bpan\b", msg.lower()):
-            m = re.search(r"\b([A-Z0-9]{10})\b", msg.upper())
-            if m:
-                return m.group(1)
-        return None
+        return extract(message).pan_attempt
 
     def _find_aadhar_attempt(self, message: str) -> str | None:
         """Find exactly 12 digits when user mentions Aadhar."""
-        msg = message or ""
-        ml = msg.lower()
-        
-        # Only look for Aadhar if user mentions it
-        if 'aadhar' in ml or 'aadhaar' in ml:
-            # Look for exactly 12 digits
-            m = re.search(r"\b(\d{12})\b", msg)
-            if m:
-                return m.group(1)
-        return None
\ No newline at end of file
+        return extract(message).aadhar_attempt
\ No newline at end of file
@@ -27,12 +27,17 @@ class LoanApplication(BaseModel):
     customer: Customer
     loan_amount: Optional[float] = None
     interest_rate: Optional[float] = None
+    # Version of the rate policy that priced interest_rate
+    rate_policy_version: Optional[str] = None
     tenure_months: Optional[int] = None
     status: LoanStatus = LoanStatus.INITIATED
     pre_approved_limit: Optional[float] = None
     emi: Optional[float] = None
     rejection_reason: Optional[str] = None
     sanction_letter_path: Optional[str] = None
+    # Background delivery of the sanction letter: queued | sent | failed
+    sanction_letter_status: Optional[str] = None
+    sanction_letter_job_id: Optional[str] = None
 
 class ChatMessage(BaseModel):
     message: str
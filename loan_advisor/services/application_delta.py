@@ -0,0 +1,106 @@
+"""Field-level change tracking for application polling
+
+Clients that already hold an application at some version only need the
+fields that changed since. After each save the orchestrator hands the
+dumped application to a ``ChangeLog``, which diffs it against the state
+it kept from the previous save and remembers, per field path (e.g.
+``"loan_amount"``, ``"customer.salary"``), the version that last changed
+it. A delta is then a dictionary lookup: no load, no model dump.
+
+History is per process and bounded: when this process has not seen every
+version since the one a client holds (the application was created or
+saved by another worker, or its entry was evicted), ``delta`` returns
+``None`` and callers fall back to the full application.
+"""
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+APP_CHANGELOG_MAX_ENTRIES = int(os.getenv("APP_CHANGELOG_MAX_ENTRIES", 10000))
+
+_MISSING = object()
+
+
+def diff(before: Dict[str, Any], after: Dict[str, Any], prefix: str = "") -> List[str]:
+    """Dotted paths of the leaf values that differ between two dumped applications."""
+    changed = []
+    for name, value in after.items():
+        old = before.get(name, _MISSING)
+        if old == value:
+            continue
+        if isinstance(value, dict):
+            changed.extend(diff(old if isinstance(old, dict) else {}, value, f"{prefix}{name}."))
+        else:
+            changed.append(prefix + name)
+    return changed
+
+
+def pick(data: Dict[str, Any], paths: List[str]) -> Dict[str, Any]:
+    """The parts of ``data`` at ``paths``, nested the same way (``{"customer": {"salary": ...}}``)."""
+    picked: Dict[str, Any] = {}
+    for path in paths:
+        *parents, leaf = path.split(".")
+        source, target = data, picked
+        for parent in parents:
+            source = source[parent]
+            target = target.setdefault(parent, {})
+        target[leaf] = source[leaf]
+    return picked
+
+
+@dataclass
+class _History:
+    floor: int                   # oldest version the history is complete from
+    version: int                 # version ``state`` was dumped at
+    state: Dict[str, Any]
+    changed: Dict[str, int] = field(default_factory=dict)  # path -> version that last changed it
+
+
+class ChangeLog:
+    """Per-application field history, LRU-bounded to ``max_entries`` applications"""
+
+    def __init__(self, max_entries: int = APP_CHANGELOG_MAX_ENTRIES):
+        self._entries: "OrderedDict[str, _History]" = OrderedDict()
+        self.max_entries = max_entries
+
+    def record(self, app_id: str, base_version: Optional[int], version: int,
+               state: Dict[str, Any]) -> Optional[List[str]]:
+        """Note that saving ``base_version`` (``None`` for a new application) produced ``state`` at ``version``.
+
+        Returns the paths this save changed, or ``None`` if that is not known.
+        """
+        history = self._entries.pop(app_id, None)
+        if base_version is None:
+            changed = diff({}, state)
+            history = _History(0, version, state, dict.fromkeys(changed, version))
+        elif history is None or history.version != base_version:
+            # The state at base_version was never seen here, so what this save changed is unknown
+            changed = None
+            history = _History(version, version, state)
+        else:
+            changed = diff(history.state, state)
+            for path in changed:
+                history.changed[path] = version
+            history.version, history.state = version, state
+        self._entries[app_id] = history
+        while self.max_entries and len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return changed
+
+    def delta(self, app_id: str, since: int, current: int) -> Optional[Dict[str, Any]]:
+        """Fields changed after version ``since`` up to ``current``; ``None`` if not known here."""
+        if since >= current:
+            return {}
+        history = self._entries.get(app_id)
+        if history is None or history.version != current or since < history.floor:
+            return None
+        self._entries.move_to_end(app_id)
+        return pick(history.state, [path for path, version in history.changed.items() if version > since])
+
+    def __len__(self) -> int:
+        return len(self._entries)
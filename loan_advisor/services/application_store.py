@@ -0,0 +1,614 @@
+"""Pluggable persistence for loan applications
+
+``LoanOrchestrator.applications`` is an ``ApplicationStore``. Every stored
+application carries a version number that is bumped on each save; a save
+made against a stale version raises ``VersionConflict`` (optimistic
+concurrency), so two workers or two overlapping turns can never silently
+overwrite each other.
+
+Backends (``APP_STORE``):
+  memory  per-process hot tier (default; single worker) that spills idle
+          and least recently used applications to compressed files
+  sqlite  SQLite database in WAL mode, shared by every worker on the host
+          and surviving restarts. With ``APP_STORE_WRITE_BEHIND_MS`` > 0
+          saves are buffered and committed in batches (one transaction per
+          batch); other workers then see a turn's result after at most that
+          delay, so keep it 0 (write-through) when requests for one
+          application can land on different workers.
+"""
+import asyncio
+import heapq
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from models.loan_models import LoanApplication
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+APP_STORE = os.getenv("APP_STORE", "memory").lower()
+APP_STORE_PATH = os.getenv("APP_STORE_PATH", "data/applications.db")
+APP_STORE_WRITE_BEHIND_MS = float(os.getenv("APP_STORE_WRITE_BEHIND_MS", 0))
+APP_STORE_BATCH_SIZE = int(os.getenv("APP_STORE_BATCH_SIZE", 100))
+# Hot tier of the memory backend (0 disables a limit)
+SESSION_HOT_MAX_ENTRIES = int(os.getenv("SESSION_HOT_MAX_ENTRIES", 10000))
+SESSION_HOT_MAX_BYTES = int(os.getenv("SESSION_HOT_MAX_BYTES", 64 * 1024 * 1024))
+SESSION_IDLE_TTL_SECONDS = float(os.getenv("SESSION_IDLE_TTL_SECONDS", 1800))
+SESSION_SPILL_DIR = os.getenv("SESSION_SPILL_DIR", os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'sessions'))
+# Resolved once, so the spill directory does not depend on the working directory
+SESSION_SPILL_DIR = os.path.abspath(SESSION_SPILL_DIR) if SESSION_SPILL_DIR else ""
+# Spill files of completed/rejected applications are removed this long after being spilled (0 keeps them)
+SESSION_TERMINAL_RETENTION_SECONDS = float(os.getenv("SESSION_TERMINAL_RETENTION_SECONDS", 7 * 24 * 3600))
+# Statuses after which an application no longer changes
+TERMINAL_STATUSES = ("completed", "rejected")
+
+
+class VersionConflict(Exception):
+    """The application was saved by someone else since it was loaded"""
+
+    def __init__(self, application_id: str, expected: Optional[int], actual: Optional[int]):
+        super().__init__(f"Application {application_id} is at version {actual}, expected {expected}")
+        self.application_id = application_id
+        self.expected = expected
+        self.actual = actual
+
+
+class ApplicationStore(ABC):
+    """Versioned application storage
+
+    ``load`` returns a private copy together with its version; ``save``
+    with ``expected_version=None`` creates a new application.
+    """
+
+    conflicts = 0
+
+    @abstractmethod
+    def load(self, app_id: str) -> Optional[Tuple[LoanApplication, int]]:
+        ...
+
+    @abstractmethod
+    def save(self, application: LoanApplication, expected_version: Optional[int] = None) -> int:
+        """Persist ``application`` and return its new version."""
+
+    @abstractmethod
+    def version(self, app_id: str) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    def delete(self, app_id: str):
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def get(self, app_id: str) -> Optional[LoanApplication]:
+        loaded = self.load(app_id)
+        return loaded[0] if loaded else None
+
+    def load_json(self, app_id: str) -> Optional[Tuple[str, int]]:
+        """The application as JSON with its version, without building the model where the backend allows."""
+        loaded = self.load(app_id)
+        return (loaded[0].model_dump_json(), loaded[1]) if loaded else None
+
+    def __contains__(self, app_id: str) -> bool:
+        return self.version(app_id) is not None
+
+    async def prefetch(self, app_id: str):
+        """Bring ``app_id`` into memory ahead of a ``load``, reading off the event loop where the backend can."""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"conflicts": self.conflicts}
+
+    async def flush(self):
+        """Write out anything buffered (no-op for write-through backends)."""
+
+    async def close(self):
+        await self.flush()
+
+    def _conflict(self, app_id: str, expected: Optional[int], actual: Optional[int]) -> VersionConflict:
+        self.conflicts += 1
+        return VersionConflict(app_id, expected, actual)
+
+
+class InMemoryApplicationStore(ApplicationStore):
+    """Hot in-process tier with bounded memory and compressed spill to disk
+
+    Applications are held as JSON (so ``load`` always returns a private copy
+    and their size is known exactly) in LRU order. Once the hot tier holds
+    more than ``max_entries`` applications or ``max_bytes`` of JSON, or an
+    application has been idle for ``idle_ttl`` seconds, the least recently
+    used ones are zlib-compressed into ``spill_dir`` and dropped from memory.
+    ``load``/``save`` rehydrate spilled applications transparently. A limit
+    of 0 disables it; an empty ``spill_dir`` keeps everything in memory.
+
+    Spill files are written and removed in the background (``asyncio.to_thread``,
+    one batch at a time); an application stays readable from memory until its
+    file has landed. Async callers ``prefetch`` an application before loading
+    it so that reading a spilled one back does not block the event loop either.
+    The spill directory is indexed at startup, so applications spilled by a
+    previous process are counted and served again.
+
+    A completed or rejected application is spilled with an expiry
+    ``terminal_retention`` seconds out (wall clock, kept in the file so it
+    survives restarts); once that passes, its file and index entry are
+    removed and the application is gone. Applications still in progress are
+    kept on disk, and in the index, until they finish or are deleted.
+    """
+
+    def __init__(self, max_entries: int = SESSION_HOT_MAX_ENTRIES, max_bytes: int = SESSION_HOT_MAX_BYTES,
+                 idle_ttl: float = SESSION_IDLE_TTL_SECONDS, spill_dir: Optional[str] = SESSION_SPILL_DIR,
+                 terminal_retention: float = SESSION_TERMINAL_RETENTION_SECONDS):
+        # app_id -> (json, version, last access); least recently used first
+        self._entries: "OrderedDict[str, Tuple[str, int, float]]" = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.spill_dir = spill_dir or None
+        self.terminal_retention = terminal_retention
+        self.hot_bytes = 0
+        self.evictions: Dict[str, int] = {}
+        self.rehydrations = 0
+        self.expired = 0
+        # Spill file name -> version of the application in it
+        self._spilled: Dict[str, int] = {}
+        # Spill file name -> wall-clock expiry, for terminal applications only
+        self._expires: Dict[str, float] = {}
+        # (expiry, spill file name), soonest first; entries no longer in _expires are stale
+        self._expiring: List[Tuple[float, str]] = []
+        # Spill file name -> (json, version, expiry) to write, or None to remove the file
+        self._pending_spills: Dict[str, Optional[Tuple[str, int, Optional[float]]]] = {}
+        # Batch being written; stays readable until it lands
+        self._flushing_spills: Dict[str, Optional[Tuple[str, int, Optional[float]]]] = {}
+        self._spill_lock: Optional[asyncio.Lock] = None
+        self._spill_task: Optional[asyncio.Task] = None
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._index_spills()
+
+    def load(self, app_id: str) -> Optional[Tuple[LoanApplication, int]]:
+        entry = self._hot(app_id)
+        if entry is None:
+            return None
+        data, version, _ = entry
+        self._evict()
+        return LoanApplication.model_validate_json(data), version
+
+    def load_json(self, app_id: str) -> Optional[Tuple[str, int]]:
+        entry = self._hot(app_id)
+        if entry is None:
+            return None
+        self._evict()
+        return entry[0], entry[1]
+
+    def save(self, application: LoanApplication, expected_version: Optional[int] = None) -> int:
+        app_id = application.application_id
+        entry = self._hot(app_id)
+        current = entry[1] if entry else None
+        if current != expected_version:
+            raise self._conflict(app_id, expected_version, current)
+        version = (current or 0) + 1
+        self._put(app_id, application.model_dump_json(), version)
+        self._evict()
+        return version
+
+    def version(self, app_id: str) -> Optional[int]:
+        entry = self._entries.get(app_id)
+        if entry is not None:
+            return entry[1]
+        return self._spilled.get(self._spill_name(app_id)) if self.spill_dir else None
+
+    def delete(self, app_id: str):
+        entry = self._entries.pop(app_id, None)
+        if entry is not None:
+            self.hot_bytes -= len(entry[0])
+        self._remove_spill(app_id)
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._spilled)
+
+    async def prefetch(self, app_id: str):
+        if app_id in self._entries or self.version(app_id) is None or self._queued_spill(app_id) is not None:
+            return
+        spilled = await asyncio.to_thread(self._read_spill, app_id)
+        # Another turn may have rehydrated (or deleted) it while the file was being read
+        if spilled is not None and app_id not in self._entries and self.version(app_id) == spilled[1]:
+            self._rehydrate(app_id, spilled)
+
+    async def flush(self):
+        if self._spill_lock is None:
+            self._spill_lock = asyncio.Lock()
+        # Batches land one at a time, so a later write or removal of the same file wins
+        async with self._spill_lock:
+            if not self._pending_spills:
+                return
+            self._flushing_spills, self._pending_spills = self._pending_spills, {}
+            try:
+                await asyncio.to_thread(self._write_spills, self._flushing_spills)
+            except BaseException:
+                # Requeue, behind anything queued for the same application since
+                self._pending_spills = {**self._flushing_spills, **self._pending_spills}
+                raise
+            finally:
+                self._flushing_spills = {}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hot": len(self._entries), "hot_bytes": self.hot_bytes, "spilled": len(self._spilled),
+                "evictions": dict(self.evictions), "rehydrations": self.rehydrations, "expired": self.expired,
+                "conflicts": self.conflicts}
+
+    def _hot(self, app_id: str) -> Optional[Tuple[str, int, float]]:
+        """Return the hot entry for ``app_id`` (rehydrating it from disk if spilled), marked as used."""
+        entry = self._entries.get(app_id)
+        if entry is not None:
+            entry = (entry[0], entry[1], time.monotonic())
+            self._entries[app_id] = entry
+            self._entries.move_to_end(app_id)
+            return entry
+        if self.version(app_id) is None:
+            return None
+        spilled = self._queued_spill(app_id) or self._read_spill(app_id)
+        if spilled is None:
+            return None
+        return self._rehydrate(app_id, spilled)
+
+    def _rehydrate(self, app_id: str, spilled: Tuple[str, int]) -> Tuple[str, int, float]:
+        self._remove_spill(app_id)
+        self.rehydrations += 1
+        return self._put(app_id, *spilled)
+
+    def _put(self, app_id: str, data: str, version: int) -> Tuple[str, int, float]:
+        previous = self._entries.pop(app_id, None)
+        if previous is not None:
+            self.hot_bytes -= len(previous[0])
+        entry = (data, version, time.monotonic())
+        self._entries[app_id] = entry
+        self.hot_bytes += len(data)
+        return entry
+
+    def _evict(self):
+        if not self.spill_dir:
+            return
+        self._expire_spills()
+        now = time.monotonic()
+        # The most recently used entry stays hot even if it alone exceeds max_bytes
+        while len(self._entries) > 1:
+            app_id, (data, version, touched) = next(iter(self._entries.items()))
+            if self.max_entries and len(self._entries) > self.max_entries:
+                reason = "capacity"
+            elif self.max_bytes and self.hot_bytes > self.max_bytes:
+                reason = "bytes"
+            elif self.idle_ttl and now - touched > self.idle_ttl:
+                reason = "idle"
+            else:
+                break
+            self._write_spill(app_id, data, version)
+            del self._entries[app_id]
+            self.hot_bytes -= len(data)
+            self.evictions[reason] = self.evictions.get(reason, 0) + 1
+
+    @staticmethod
+    def _spill_name(app_id: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", app_id) + ".json.z"
+
+    def _spill_path(self, app_id: str) -> str:
+        return os.path.join(self.spill_dir, self._spill_name(app_id))
+
+    def _expire_spills(self):
+        """Drop spilled terminal applications whose retention has passed."""
+        now = time.time()
+        expired = self.expired
+        while self._expiring and self._expiring[0][0] <= now:
+            expires, name = heapq.heappop(self._expiring)
+            # Stale if the application was rehydrated or spilled again since
+            if self._expires.get(name) != expires:
+                continue
+            del self._expires[name]
+            self._spilled.pop(name, None)
+            self._pending_spills[name] = None
+            self.expired += 1
+        if self.expired != expired:
+            self._queue_spills()
+
+    def _set_expiry(self, name: str, expires: Optional[float]):
+        if expires is None:
+            self._expires.pop(name, None)
+            return
+        self._expires[name] = expires
+        heapq.heappush(self._expiring, (expires, name))
+
+    def _index_spills(self):
+        """Index the files a previous process left in ``spill_dir``; half-written ones are removed."""
+        for name in os.listdir(self.spill_dir):
+            path = os.path.join(self.spill_dir, name)
+            try:
+                if name.endswith(".json.z.tmp"):
+                    os.remove(path)
+                elif name.endswith(".json.z"):
+                    with open(path, "rb") as f:
+                        # The header is the first line; no need to inflate the whole application
+                        head = zlib.decompressobj().decompress(f.read(), 64)
+                    version, expires = self._parse_header(head.split(b"\n", 1)[0].decode("ascii"))
+                    self._spilled[name] = version
+                    self._set_expiry(name, expires)
+            except (OSError, ValueError, zlib.error) as e:
+                logger.warning(f"Ignoring unreadable spill file {path}: {e}")
+        if self._spilled:
+            logger.info(f"Found {len(self._spilled)} spilled applications in {self.spill_dir}")
+
+    def _write_spill(self, app_id: str, data: str, version: int):
+        name = self._spill_name(app_id)
+        expires = None
+        if self.terminal_retention and json.loads(data).get("status") in TERMINAL_STATUSES:
+            expires = time.time() + self.terminal_retention
+        self._spilled[name] = version
+        self._set_expiry(name, expires)
+        self._pending_spills[name] = (data, version, expires)
+        self._queue_spills()
+
+    def _remove_spill(self, app_id: str):
+        name = self._spill_name(app_id)
+        if self.spill_dir and self._spilled.pop(name, None) is not None:
+            self._expires.pop(name, None)
+            self._pending_spills[name] = None
+            self._queue_spills()
+
+    def _queued_spill(self, app_id: str) -> Optional[Tuple[str, int]]:
+        """Data of a spill that has not landed on disk yet."""
+        name = self._spill_name(app_id)
+        spill = self._pending_spills[name] if name in self._pending_spills else self._flushing_spills.get(name)
+        return spill[:2] if spill else None
+
+    def _queue_spills(self):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts/tests): write now
+            batch, self._pending_spills = self._pending_spills, {}
+            self._write_spills(batch)
+            return
+        if self._spill_task is None or self._spill_task.done():
+            self._spill_task = asyncio.ensure_future(self._flush_spills())
+
+    async def _flush_spills(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Writing spilled applications failed: {e}")
+
+    def _write_spills(self, batch: Dict[str, Optional[Tuple[str, int, Optional[float]]]]):
+        """Compress and write (or remove) the spill files of ``batch``; runs in a worker thread."""
+        for name, spill in batch.items():
+            path = os.path.join(self.spill_dir, name)
+            if spill is None:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            data, version, expires = spill
+            # Header line: "<version>" or "<version> <expiry>"
+            header = f"{version}" if expires is None else f"{version} {expires!r}"
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(f"{header}\n{data}".encode("utf-8")))
+            os.replace(tmp_path, path)
+
+    def _read_spill(self, app_id: str) -> Optional[Tuple[str, int]]:
+        try:
+            with open(self._spill_path(app_id), "rb") as f:
+                raw = zlib.decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            return None
+        header, data = raw.split("\n", 1)
+        return data, self._parse_header(header)[0]
+
+    @staticmethod
+    def _parse_header(header: str) -> Tuple[int, Optional[float]]:
+        version, _, expires = header.partition(" ")
+        return int(version), float(expires) if expires else None
+
+
+class SQLiteApplicationStore(ApplicationStore):
+    """SQLite (WAL) store with optional write-behind batching
+
+    Buffered saves keep the version the database last held (``base``) so
+    the batch commit can still detect a concurrent writer: the UPDATE only
+    applies ``WHERE version = base``. A batch entry that loses that race is
+    dropped and counted in ``conflicts``.
+    """
+
+    def __init__(self, path: str = APP_STORE_PATH, write_behind_ms: float = APP_STORE_WRITE_BEHIND_MS,
+                 batch_size: int = APP_STORE_BATCH_SIZE):
+        self.path = path
+        self.write_behind = max(write_behind_ms, 0) / 1000
+        self.batch_size = max(batch_size, 1)
+        # app_id -> (json, version, base version in the database or None if new)
+        self._pending: Dict[str, Tuple[str, int, Optional[int]]] = {}
+        # Batch being committed; stays readable until the commit lands
+        self._flushing: Dict[str, Tuple[str, int, Optional[int]]] = {}
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.rows_written = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS applications ("
+            " application_id TEXT PRIMARY KEY,"
+            " version INTEGER NOT NULL,"
+            " status TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+
+    def load(self, app_id: str) -> Optional[Tuple[LoanApplication, int]]:
+        loaded = self.load_json(app_id)
+        if loaded is None:
+            return None
+        return LoanApplication.model_validate_json(loaded[0]), loaded[1]
+
+    def load_json(self, app_id: str) -> Optional[Tuple[str, int]]:
+        pending = self._buffered(app_id)
+        if pending is not None:
+            return pending[0], pending[1]
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, version FROM applications WHERE application_id = ?", (app_id,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def save(self, application: LoanApplication, expected_version: Optional[int] = None) -> int:
+        app_id = application.application_id
+        pending = self._buffered(app_id)
+        current = pending[1] if pending else self._db_version(app_id)
+        if current != expected_version:
+            raise self._conflict(app_id, expected_version, current)
+        version = (current or 0) + 1
+        data = application.model_dump_json()
+
+        if not self.write_behind:
+            with self._lock:
+                written = self._write(app_id, data, version, expected_version, application.status.value)
+            if not written:
+                raise self._conflict(app_id, expected_version, self._db_version(app_id))
+            return version
+
+        queued = self._pending.get(app_id)
+        base = queued[2] if queued else expected_version
+        self._pending[app_id] = (data, version, base)
+        self._schedule_flush()
+        return version
+
+    def version(self, app_id: str) -> Optional[int]:
+        pending = self._buffered(app_id)
+        return pending[1] if pending else self._db_version(app_id)
+
+    def delete(self, app_id: str):
+        self._pending.pop(app_id, None)
+        self._flushing.pop(app_id, None)
+        with self._lock:
+            self._conn.execute("DELETE FROM applications WHERE application_id = ?", (app_id,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            stored = self._conn.execute("SELECT COUNT(*) FROM applications").fetchone()[0]
+        new_ids = {k for k, (_, _, base) in {**self._flushing, **self._pending}.items() if base is None}
+        return stored + len(new_ids)
+
+    async def flush(self):
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        # Batches commit one at a time so a later batch's base version already exists
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            self._flushing, self._pending = self._pending, {}
+            try:
+                await asyncio.to_thread(self._write_batch, self._flushing)
+            except BaseException:
+                # Requeue, keeping the newest data but the base version the database still holds
+                for app_id, (data, version, base) in self._flushing.items():
+                    queued = self._pending.get(app_id)
+                    self._pending[app_id] = (queued[0], queued[1], base) if queued else (data, version, base)
+                raise
+            finally:
+                self._flushing = {}
+
+    async def close(self):
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": len(self._pending), "batches": self.batches,
+                "rows_written": self.rows_written, "conflicts": self.conflicts}
+
+    def _buffered(self, app_id: str) -> Optional[Tuple[str, int, Optional[int]]]:
+        return self._pending.get(app_id) or self._flushing.get(app_id)
+
+    def _db_version(self, app_id: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM applications WHERE application_id = ?", (app_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _write(self, app_id: str, data: str, version: int, base: Optional[int], status: str) -> bool:
+        """Insert or compare-and-swap one row; returns False if another writer got there first."""
+        now = time.time()
+        if base is None:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO applications (application_id, version, status, data, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)", (app_id, version, status, data, now)
+            )
+        else:
+            cursor = self._conn.execute(
+                "UPDATE applications SET version = ?, status = ?, data = ?, updated_at = ? "
+                "WHERE application_id = ? AND version = ?", (version, status, data, now, app_id, base)
+            )
+        self.rows_written += cursor.rowcount
+        return cursor.rowcount == 1
+
+    def _write_batch(self, batch: Dict[str, Tuple[str, int, Optional[int]]]):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for app_id, (data, version, base) in batch.items():
+                    status = json.loads(data)["status"]
+                    if not self._write(app_id, data, version, base, status):
+                        self.conflicts += 1
+                        logger.warning(f"Dropped buffered write for application {app_id}: "
+                                       f"version {base} was superseded by another writer")
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.batches += 1
+
+    def _schedule_flush(self):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts/tests): fall back to writing the batch now
+            batch, self._pending = self._pending, {}
+            self._write_batch(batch)
+            return
+        if len(self._pending) >= self.batch_size:
+            asyncio.ensure_future(self.flush())
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.write_behind)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Write-behind flush failed: {e}")
+
+
+def create_application_store() -> ApplicationStore:
+    """Build the store selected by ``APP_STORE``."""
+    if APP_STORE == "sqlite":
+        return SQLiteApplicationStore()
+    if APP_STORE != "memory":
+        logger.warning(f"Unknown APP_STORE={APP_STORE!r}, using in-memory store")
+    return InMemoryApplicationStore()
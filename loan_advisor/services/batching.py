@@ -0,0 +1,45 @@
+"""Concurrent execution of a batch of keyed jobs
+
+Used by ``/chat/batch``: items sharing a key (the application id) run one
+after another in batch order, different keys run concurrently, and no more
+than ``concurrency`` items are in flight at once.
+"""
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHAT_BATCH_CONCURRENCY = int(os.getenv("CHAT_BATCH_CONCURRENCY", 16))
+CHAT_BATCH_MAX_ITEMS = int(os.getenv("CHAT_BATCH_MAX_ITEMS", 500))
+
+T = TypeVar("T")
+
+
+async def run_batch(items: Sequence[T], key: Callable[[T], Optional[str]],
+                    handler: Callable[[T], Awaitable[Any]], concurrency: int = CHAT_BATCH_CONCURRENCY) -> List[Any]:
+    """Run ``handler`` on every item and return the results in item order.
+
+    Items whose ``key`` is ``None`` are independent of every other item.
+    ``handler`` is expected to turn its own failures into results; an
+    exception escaping it is returned in that item's slot.
+    """
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    results: List[Any] = [None] * len(items)
+    chains: Dict[Any, List[int]] = {}
+    for index, item in enumerate(items):
+        item_key = key(item)
+        chains.setdefault(("item", index) if item_key is None else ("key", item_key), []).append(index)
+
+    async def run_chain(indexes: List[int]):
+        for index in indexes:
+            async with semaphore:
+                try:
+                    results[index] = await handler(items[index])
+                except Exception as e:
+                    results[index] = e
+
+    await asyncio.gather(*(run_chain(indexes) for indexes in chains.values()))
+    return results
@@ -0,0 +1,252 @@
+"""Bulk loan quotes: rows of amount, tenure and credit score in, NDJSON quotes out
+
+Rows come as JSON lines (``{"loan_amount": 500000, "tenure_months": 36,
+"credit_score": 760}``) or CSV with a header row; ``amount``/``tenure`` are
+accepted for the first two, the credit score is optional, and an ``id``
+column is echoed back so quotes can be joined to a lead list. Every input
+line gives one output line, in order:
+
+    {"line": 2, "id": "L1", "loan_amount": 500000.0, "tenure_months": 36, "credit_score": 760,
+     "interest_rate": 11.0, "emi": 16369.36, "total_interest": 89296.96, "total_payable": 589296.96,
+     "policy_version": "2024-11-01.1"}
+    {"line": 3, "error": "tenure_months: must be a whole number of months from 1 to 360"}
+
+Rows are parsed and priced ``BULK_QUOTE_CHUNK_ROWS`` at a time: one
+vectorized rate lookup (``RatePolicy.rates``) and one vectorized EMI
+(``finance.emi``) per chunk, the same numbers SalesAgent quotes row by
+row. Only one chunk is held at a time, so memory stays flat however long
+the input is. A whole run is priced with one version of the rate policy.
+"""
+import asyncio
+import csv
+import json
+import os
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from . import finance
+from .extraction import MAX_LOAN_AMOUNT
+from .metrics import counter
+from .rate_policy import RatePolicy
+
+load_dotenv()
+
+BULK_QUOTE_CHUNK_ROWS = int(os.getenv("BULK_QUOTE_CHUNK_ROWS", 10000))
+# Largest request body POST /quotes/bulk spools before answering 413 (0 disables the cap)
+BULK_QUOTE_MAX_BODY_BYTES = int(os.getenv("BULK_QUOTE_MAX_BODY_BYTES", 256 * 1024 * 1024))
+
+FORMATS = ("jsonl", "csv")
+MAX_TENURE_MONTHS = 360
+MIN_CREDIT_SCORE, MAX_CREDIT_SCORE = 300, 900
+
+BULK_QUOTES = counter("loan_bulk_quotes_total", "Rows through the bulk quoting API, by outcome")
+
+# Accepted names of each input column: amount, tenure, credit score, id
+_KEYS = (("loan_amount", "amount"), ("tenure_months", "tenure"), ("credit_score", "score"), ("id",))
+
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+_encode_string = json.encoder.encode_basestring
+_decode = json.JSONDecoder().raw_decode
+
+
+class BulkQuoter:
+    """One bulk quoting run (see module docstring)"""
+
+    def __init__(self, policy: RatePolicy, fmt: str = "jsonl", chunk_rows: int = BULK_QUOTE_CHUNK_ROWS):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}, expected one of {', '.join(FORMATS)}")
+        self.policy = policy
+        self.fmt = fmt
+        self.chunk_rows = max(chunk_rows, 1)
+        self.quoted = 0
+        self.failed = 0
+        # CSV header and the positions of amount, tenure, score and id in it
+        self._header: Optional[List[str]] = None
+        self._columns: List[Optional[int]] = []
+
+    def quote_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """NDJSON for ``lines``, one block of output lines per chunk."""
+        chunk: List[Tuple[int, str]] = []
+        for line_no, line in enumerate(lines, 1):
+            chunk.append((line_no, line))
+            if len(chunk) >= self.chunk_rows:
+                yield self._quote_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield self._quote_chunk(chunk)
+
+    async def quote_stream(self, body: AsyncIterable[bytes]) -> AsyncIterator[str]:
+        """``quote_lines`` for a request body arriving in pieces; chunks are priced off the event loop."""
+        chunk: List[Tuple[int, str]] = []
+        line_no = 0
+        pending = b""
+        async for data in body:
+            # Split on the newline bytes first, so a character cut between two pieces is decoded whole
+            complete, newline, pending = (pending + data).rpartition(b"\n")
+            if not newline:
+                continue
+            for line in complete.decode("utf-8", errors="replace").split("\n"):
+                line_no += 1
+                chunk.append((line_no, line))
+                if len(chunk) >= self.chunk_rows:
+                    yield await asyncio.to_thread(self._quote_chunk, chunk)
+                    chunk = []
+        if pending:
+            chunk.append((line_no + 1, pending.decode("utf-8", errors="replace")))
+        if chunk:
+            yield await asyncio.to_thread(self._quote_chunk, chunk)
+
+    def _quote_chunk(self, chunk: List[Tuple[int, str]]) -> str:
+        lines, (raw_amounts, raw_tenures, raw_scores, ids), out = self._parse(chunk)
+        quoted = 0
+        if lines:
+            amounts, bad_amounts = _floats(raw_amounts)
+            tenures, bad_tenures = _floats(raw_tenures)
+            scores, bad_scores = _floats(raw_scores)
+            # Checked for the whole chunk at once; the messages are only built for the rows that fail
+            with np.errstate(invalid="ignore"):
+                valid_amount = ~bad_amounts & (amounts > 0) & (amounts <= MAX_LOAN_AMOUNT)
+                valid_tenure = ~bad_tenures & (tenures == np.floor(tenures)) & (tenures >= 1) & (tenures <= MAX_TENURE_MONTHS)
+                valid_score = ~bad_scores & (np.isnan(scores) | ((scores == np.floor(scores)) &
+                                                                (scores >= MIN_CREDIT_SCORE) & (scores <= MAX_CREDIT_SCORE)))
+            valid = valid_amount & valid_tenure & valid_score
+            for i in np.flatnonzero(~valid).tolist():
+                if not valid_amount[i]:
+                    message = f"loan_amount: must be a positive number up to {MAX_LOAN_AMOUNT}"
+                elif not valid_tenure[i]:
+                    message = f"tenure_months: must be a whole number of months from 1 to {MAX_TENURE_MONTHS}"
+                else:
+                    message = f"credit_score: must be a whole number from {MIN_CREDIT_SCORE} to {MAX_CREDIT_SCORE}"
+                out[lines[i]] = _error(lines[i], ids[i], message)
+
+            index = np.flatnonzero(valid)
+            amounts, tenures, scores = amounts[index], tenures[index], scores[index]
+            rates = self.policy.rates(amounts, tenures, scores)
+            emis = finance.emi(amounts, rates, tenures, decimals=2)
+            total_payable, total_interest = finance.totals(amounts, emis, tenures)
+            # JSON has no NaN or Infinity: a row the policy cannot price gets an error line instead
+            finite = np.isfinite(rates) & np.isfinite(emis) & np.isfinite(total_payable) & np.isfinite(total_interest)
+            if not finite.all():
+                for i in index[~finite].tolist():
+                    out[lines[i]] = _error(lines[i], ids[i], "could not be quoted: the rate policy gave no finite rate or EMI")
+                index, amounts, tenures, scores = index[finite], amounts[finite], tenures[finite], scores[finite]
+                rates, emis = rates[finite], emis[finite]
+                total_payable, total_interest = total_payable[finite], total_interest[finite]
+            version = _encode(self.policy.version)
+            # Fixed-shape records, formatted directly (floats as repr, like json.dumps)
+            for i, amount, tenure, score, rate, emi, interest, payable in zip(
+                    index.tolist(), amounts.tolist(), tenures.astype(np.int64).tolist(),
+                    np.where(np.isnan(scores), -1, scores).astype(np.int64).tolist(), rates.tolist(), emis.tolist(),
+                    np.round(total_interest, 2).tolist(), np.round(total_payable, 2).tolist()):
+                id_field = "" if ids[i] is None else f', "id": {_encode_id(ids[i])}'
+                out[lines[i]] = (
+                    f'{{"line": {lines[i]}{id_field}, '
+                    f'"loan_amount": {amount!r}, "tenure_months": {tenure}, '
+                    f'"credit_score": {"null" if score < 0 else score}, "interest_rate": {rate!r}, "emi": {emi!r}, '
+                    f'"total_interest": {interest!r}, "total_payable": {payable!r}, "policy_version": {version}}}\n'
+                )
+            quoted = len(index)
+
+        self.quoted += quoted
+        self.failed += len(out) - quoted
+        BULK_QUOTES.inc(quoted, outcome="quoted")
+        BULK_QUOTES.inc(len(out) - quoted, outcome="invalid")
+        return "".join(out[line_no] for line_no in sorted(out))
+
+    def _parse(self, chunk: List[Tuple[int, str]]) -> Tuple[List[int], Tuple[List[Any], ...], Dict[int, str]]:
+        """Line numbers of the parsed rows, their amount, tenure, score and id columns
+        (None where missing), and the error lines of rows that did not parse."""
+        if chunk[0][0] == 1:
+            chunk = [(1, chunk[0][1].lstrip("\ufeff"))] + chunk[1:]
+        lines: List[int] = []
+        errors: Dict[int, str] = {}
+
+        if self.fmt == "jsonl":
+            rows = []
+            for line_no, line in chunk:
+                if not line or line.isspace():
+                    continue
+                try:
+                    row, end = _decode(line)
+                    if end != len(line) and not line[end:].isspace():
+                        row = json.loads(line)  # Raises for what follows the object
+                except json.JSONDecodeError:
+                    try:
+                        row = json.loads(line)  # Leading whitespace, or the actual error
+                    except json.JSONDecodeError as e:
+                        errors[line_no] = _error(line_no, None, f"not valid JSON: {e.msg}")
+                        continue
+                if not isinstance(row, dict):
+                    errors[line_no] = _error(line_no, None, "each line must be a JSON object")
+                    continue
+                lines.append(line_no)
+                rows.append(row)
+            columns = tuple([row.get(keys[0], row.get(keys[-1])) for row in rows] for keys in _KEYS)
+            return lines, columns, errors
+
+        # One row per line: quoted fields cannot hold line breaks
+        rows = []
+        for (line_no, _), values in zip(chunk, csv.reader(line for _, line in chunk)):
+            if len(values) <= 1 and not "".join(values).strip():
+                continue  # Blank line
+            if self._header is None:
+                self._header = [name.strip().lower() for name in values]
+                self._columns = [next((self._header.index(k) for k in keys if k in self._header), None)
+                                 for keys in _KEYS]
+                continue
+            lines.append(line_no)
+            rows.append(values)
+        columns = tuple([] if c is None else [row[c] or None if c < len(row) else None for row in rows]
+                        for c in self._columns)
+        return lines, tuple(column or [None] * len(rows) for column in columns), errors
+
+
+def _floats(values: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """``values`` as floats (None -> NaN) and a mask of those that are not numbers.
+
+    Only a missing value is NaN-and-valid: a ``"nan"`` string or JSON ``NaN``
+    parses as a float but is flagged like any other non-number.
+    """
+    try:
+        # Numbers, numeric strings and None in one call; anything else falls back to one at a time
+        if not any(isinstance(v, bool) for v in values):
+            floats = np.array(values, dtype=np.float64)
+            if floats.ndim == 1:
+                bad = np.isnan(floats)
+                for i in np.flatnonzero(bad).tolist():
+                    bad[i] = values[i] is not None
+                return floats, bad
+    except (TypeError, ValueError):
+        pass
+    floats = np.full(len(values), np.nan)
+    bad = np.zeros(len(values), dtype=bool)
+    for i, value in enumerate(values):
+        if value is None or isinstance(value, str) and not value.strip():
+            continue
+        try:
+            if isinstance(value, bool):
+                raise ValueError
+            floats[i] = float(value)
+            bad[i] = np.isnan(floats[i])
+        except (TypeError, ValueError):
+            bad[i] = True
+    return floats, bad
+
+
+def _encode_id(value: Any) -> str:
+    # Lead ids are strings or integers; anything else goes through the full encoder
+    if type(value) is str:
+        return _encode_string(value)
+    if type(value) is int:
+        return str(value)
+    return _encode(value)
+
+
+def _error(line_no: int, row_id: Any, message: str) -> str:
+    record = {"line": line_no}
+    if row_id is not None:
+        record["id"] = row_id
+    record["error"] = message
+    return _encode(record) + "\n"
@@ -0,0 +1,378 @@
+"""Append-only journal of every turn applied to each application
+
+Each saved turn appends a ``turn`` event: the customer message, the client
+``data_update``, every agent response (with its ``data_updates``) and the
+fields the turn changed (``changes``, as in services/application_delta.py).
+A ``snapshot`` event with the full application is written when the
+application is created, every ``JOURNAL_SNAPSHOT_EVERY`` turns, and
+whenever a turn's changes are not known. ``replay`` rebuilds an
+application from its newest snapshot plus the turns after it.
+
+Storage: ``JOURNAL_DIR`` (default ``data/journal`` in the repository root)
+holds segment files shared by all applications. Each journal instance (one
+per process) appends to its own segment (``*.open``), sealed (renamed to
+``*.log``) once it reaches ``JOURNAL_SEGMENT_BYTES`` or on shutdown. A
+segment left open by a process that crashed or was never closed is sealed
+by the next journal started on the directory, so compaction collects it.
+Records are framed as
+
+    payload length | crc32 | version | app id length | kind | app id | payload
+
+so a reader can find one application's records and its newest snapshot
+from the headers alone, parse only the JSON it needs, and stop cleanly at
+a torn tail after a crash. Appends are buffered and written with one
+``write`` + ``fsync`` per batch (every ``JOURNAL_FSYNC_MS`` or
+``JOURNAL_BATCH_BYTES``); a crash can lose at most that window, never
+corrupt earlier records. Compaction rewrites sealed segments keeping, per
+application, only its newest snapshot and the turns after it (older
+messages are dropped).
+"""
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+JOURNAL_ENABLED = os.getenv("JOURNAL_ENABLED", "true").lower() == "true"
+# Resolved once, so the directory does not depend on the working directory
+JOURNAL_DIR = os.path.abspath(os.getenv(
+    "JOURNAL_DIR", os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'journal')))
+JOURNAL_FSYNC_MS = float(os.getenv("JOURNAL_FSYNC_MS", 50))
+JOURNAL_BATCH_BYTES = int(os.getenv("JOURNAL_BATCH_BYTES", 1024 * 1024))
+JOURNAL_SEGMENT_BYTES = int(os.getenv("JOURNAL_SEGMENT_BYTES", 16 * 1024 * 1024))
+JOURNAL_SNAPSHOT_EVERY = int(os.getenv("JOURNAL_SNAPSHOT_EVERY", 50))
+# Compact once this many sealed segments exist (0 disables automatic compaction)
+JOURNAL_COMPACT_SEGMENTS = int(os.getenv("JOURNAL_COMPACT_SEGMENTS", 8))
+
+SNAPSHOT = 0
+TURN = 1
+KINDS = {SNAPSHOT: "snapshot", TURN: "turn"}
+
+_HEADER = struct.Struct(">IIIHB")
+# Applications whose turns-since-snapshot count is remembered
+_MAX_TRACKED = 100_000
+
+
+@dataclass
+class Record:
+    app_id: str
+    kind: int
+    version: int
+    payload: bytes
+
+    def event(self) -> Dict[str, Any]:
+        return json.loads(self.payload)
+
+
+def _frame(key: bytes, kind: int, version: int, payload: bytes) -> bytes:
+    crc = zlib.crc32(payload, zlib.crc32(key))
+    return _HEADER.pack(len(payload), crc, version, len(key), kind) + key + payload
+
+
+def encode_record(app_id: str, kind: int, version: int, event: Dict[str, Any]) -> bytes:
+    payload = json.dumps(event, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _frame(app_id.encode("utf-8"), kind, version, payload)
+
+
+def read_records(path: str) -> Iterator[Record]:
+    """Records of one segment, in order, up to the first torn or corrupt one."""
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        length, crc, version, key_length, kind = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        end = start + key_length + length
+        if end > len(data):
+            break
+        key, payload = data[start:start + key_length], data[start + key_length:end]
+        if zlib.crc32(payload, zlib.crc32(key)) != crc:
+            logger.warning(f"Corrupt journal record in {path} at offset {offset}, ignoring the rest")
+            break
+        yield Record(key.decode("utf-8"), kind, version, payload)
+        offset = end
+
+
+def segments(directory: str) -> List[str]:
+    """Sealed and open segment files, oldest first."""
+    paths = glob.glob(os.path.join(directory, "*.log")) + glob.glob(os.path.join(directory, "*.open"))
+    return sorted(paths, key=os.path.basename)
+
+
+def _merge(state: Dict[str, Any], changes: Dict[str, Any]):
+    for name, value in changes.items():
+        if isinstance(value, dict) and isinstance(state.get(name), dict):
+            _merge(state[name], value)
+        else:
+            state[name] = value
+
+
+def _latest(records: Iterable[Record], app_ids: Optional[set]) -> Dict[str, Tuple[Record, Dict[int, Record]]]:
+    """Per application: newest snapshot and the turns after it (by version), from headers only."""
+    found: Dict[str, Tuple[Optional[Record], Dict[int, Record]]] = {}
+    for record in records:
+        if app_ids is not None and record.app_id not in app_ids:
+            continue
+        snapshot, turns = found.get(record.app_id, (None, {}))
+        if record.kind == SNAPSHOT and (snapshot is None or record.version >= snapshot.version):
+            snapshot = record
+            turns = {v: r for v, r in turns.items() if v > record.version}
+        elif record.kind == TURN and (snapshot is None or record.version > snapshot.version):
+            turns[record.version] = record
+        found[record.app_id] = (snapshot, turns)
+    return {app_id: entry for app_id, entry in found.items() if entry[0] is not None}
+
+
+def replay(directory: str = JOURNAL_DIR, app_ids: Optional[Iterable[str]] = None) -> Dict[str, Tuple[Dict[str, Any], int]]:
+    """Rebuild ``{app_id: (application dict, version)}`` from snapshot plus tail.
+
+    Replay stops at the first missing version (a turn lost in a crash) and
+    returns the state up to it. Only the JSON of the newest snapshot and the
+    turns after it is parsed.
+    """
+    wanted = set(app_ids) if app_ids is not None else None
+    records = (record for path in segments(directory) for record in read_records(path))
+    rebuilt = {}
+    for app_id, (snapshot, turns) in _latest(records, wanted).items():
+        state, version = snapshot.event()["state"], snapshot.version
+        while version + 1 in turns:
+            version += 1
+            _merge(state, turns[version].event().get("changes") or {})
+        rebuilt[app_id] = (state, version)
+    return rebuilt
+
+
+def history(app_id: str, directory: str = JOURNAL_DIR) -> List[Dict[str, Any]]:
+    """Every event still journaled for ``app_id`` in version order (a turn before the snapshot taken after it)."""
+    # Keyed to drop duplicates (a compaction interrupted after writing its output leaves its inputs behind)
+    events = {}
+    for path in segments(directory):
+        for record in read_records(path):
+            if record.app_id == app_id:
+                event = {"type": KINDS[record.kind], "version": record.version, **record.event()}
+                events[(record.version, record.kind == SNAPSHOT)] = event
+    return [events[key] for key in sorted(events)]
+
+
+class EventJournal:
+    """Buffered appender for one process (see module docstring)"""
+
+    def __init__(self, directory: str = JOURNAL_DIR, fsync_ms: float = JOURNAL_FSYNC_MS,
+                 batch_bytes: int = JOURNAL_BATCH_BYTES, segment_bytes: int = JOURNAL_SEGMENT_BYTES,
+                 snapshot_every: int = JOURNAL_SNAPSHOT_EVERY, compact_segments: int = JOURNAL_COMPACT_SEGMENTS):
+        self.directory = directory
+        self.fsync_delay = max(fsync_ms, 0) / 1000
+        self.batch_bytes = batch_bytes
+        self.segment_bytes = segment_bytes
+        self.snapshot_every = snapshot_every
+        self.compact_segments = compact_segments
+        os.makedirs(directory, exist_ok=True)
+        # Unique per instance, and sorts by creation time
+        self._writer = f"{time.time_ns():020d}-{os.getpid()}-{id(self) & 0xffff:04x}"
+        self._sequence = 0
+        self._segment_path: Optional[str] = None
+        self._segment_size = 0
+        self._buffer: List[bytes] = []
+        self._buffered_bytes = 0
+        self._since_snapshot: Dict[str, int] = {}
+        self._compact_due = False
+        self._lock = threading.Lock()
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self.records = 0
+        self.fsyncs = 0
+        self.compactions = 0
+        self._seal_orphans()
+
+    def record_created(self, app_id: str, version: int, state: Dict[str, Any]):
+        self._append(app_id, SNAPSHOT, version, {"state": state})
+        self._since_snapshot[app_id] = 0
+
+    def record_turn(self, app_id: str, version: int, turn: Dict[str, Any], state: Dict[str, Any],
+                    changes: Optional[Dict[str, Any]]):
+        """Journal a saved turn; ``changes`` is ``None`` when what it changed is not known."""
+        self._append(app_id, TURN, version, {**turn, "changes": changes})
+        count = self._since_snapshot.pop(app_id, 0) + 1
+        if changes is None or count >= self.snapshot_every:
+            self._append(app_id, SNAPSHOT, version, {"state": state})
+            count = 0
+        self._since_snapshot[app_id] = count
+        # Least recently written first; a forgotten count just restarts at 0
+        if len(self._since_snapshot) > _MAX_TRACKED:
+            self._since_snapshot.pop(next(iter(self._since_snapshot)))
+
+    async def flush(self):
+        """Write and fsync everything appended so far."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            batch, self._buffer, self._buffered_bytes = self._buffer, [], 0
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except BaseException:
+                self._buffer[:0] = batch
+                self._buffered_bytes += sum(len(b) for b in batch)
+                raise
+        if self._compact_due:
+            # Outside the flush lock: appends keep flowing while sealed segments are rewritten
+            self._compact_due = False
+            asyncio.ensure_future(self._compact_in_background())
+
+    async def close(self):
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+        with self._lock:
+            self._seal()
+
+    def stats(self) -> Dict[str, int]:
+        return {"records": self.records, "fsyncs": self.fsyncs, "buffered_bytes": self._buffered_bytes,
+                "compactions": self.compactions}
+
+    def compact(self) -> bool:
+        """Rewrite sealed segments keeping each application's newest snapshot and later turns.
+
+        Returns False if another process is compacting. Open segments are
+        left alone but taken into account: a snapshot in an open segment
+        supersedes sealed records of that application.
+        """
+        with open(os.path.join(self.directory, "compact.lock"), "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            sealed = sorted(glob.glob(os.path.join(self.directory, "*.log")), key=os.path.basename)
+            if len(sealed) < 2:
+                return True
+            newest_snapshot: Dict[str, int] = {}
+            for path in segments(self.directory):
+                for record in read_records(path):
+                    if record.kind == SNAPSHOT and record.version >= newest_snapshot.get(record.app_id, 0):
+                        newest_snapshot[record.app_id] = record.version
+            # Named after the newest input, so it sorts where those records were
+            target = sealed[-1][:-len(".log")] + "-c.log"
+            tmp = target + ".tmp"
+            with open(tmp, "wb") as out:
+                for path in sealed:
+                    for record in read_records(path):
+                        if record.version >= newest_snapshot.get(record.app_id, 0):
+                            out.write(_frame(record.app_id.encode("utf-8"), record.kind, record.version, record.payload))
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp, target)
+            for path in sealed:
+                if path != target:
+                    os.remove(path)
+            self.compactions += 1
+            return True
+
+    def _append(self, app_id: str, kind: int, version: int, event: Dict[str, Any]):
+        data = encode_record(app_id, kind, version, event)
+        self._buffer.append(data)
+        self._buffered_bytes += len(data)
+        self._schedule_flush()
+
+    def _write(self, batch: List[bytes]):
+        with self._lock:
+            if self._segment_path is None or self._segment_size >= self.segment_bytes:
+                self._seal()
+                self._sequence += 1
+                self._segment_path = os.path.join(self.directory, f"{self._writer}-{self._sequence:06d}.open")
+                self._segment_size = 0
+            data = b"".join(batch)
+            with open(self._segment_path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self._segment_size += len(data)
+            self.records += len(batch)
+            self.fsyncs += 1
+            if self._segment_size >= self.segment_bytes:
+                self._seal()
+                if self.compact_segments and len(glob.glob(os.path.join(self.directory, "*.log"))) >= self.compact_segments:
+                    self._compact_due = True
+
+    def _seal(self):
+        if self._segment_path is not None:
+            os.replace(self._segment_path, self._segment_path[:-len(".open")] + ".log")
+            self._segment_path = None
+
+    def _seal_orphans(self):
+        """Seal open segments whose writing process has exited (crashed, or never closed its journal)."""
+        sealed = 0
+        for path in glob.glob(os.path.join(self.directory, "*.open")):
+            # <time_ns>-<pid>-<instance>-<sequence>.open
+            try:
+                pid = int(os.path.basename(path).split("-")[1])
+            except (IndexError, ValueError):
+                continue
+            if pid == os.getpid() or _process_alive(pid):
+                continue
+            try:
+                os.replace(path, path[:-len(".open")] + ".log")
+                sealed += 1
+            except FileNotFoundError:
+                pass  # Sealed by another process starting at the same time
+        if sealed:
+            logger.info(f"Sealed {sealed} journal segments left open by exited processes in {self.directory}")
+            if self.compact_segments and len(glob.glob(os.path.join(self.directory, "*.log"))) >= self.compact_segments:
+                self._compact_due = True
+
+    def _schedule_flush(self):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts/tests): write the batch now
+            batch, self._buffer, self._buffered_bytes = self._buffer, [], 0
+            self._write(batch)
+            if self._compact_due:
+                self._compact_due = False
+                self.compact()
+            return
+        if self._buffered_bytes >= self.batch_bytes:
+            asyncio.ensure_future(self.flush())
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_later())
+
+    async def _compact_in_background(self):
+        try:
+            await asyncio.to_thread(self.compact)
+        except Exception as e:
+            logger.error(f"Journal compaction failed: {e}")
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.fsync_delay)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Journal flush failed: {e}")
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Someone else's process
+    return True
+
+
+def create_journal() -> Optional[EventJournal]:
+    """The journal selected by ``JOURNAL_ENABLED``/``JOURNAL_DIR``, or ``None`` when disabled."""
+    return EventJournal() if JOURNAL_ENABLED else None
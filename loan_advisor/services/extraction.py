@@ -0,0 +1,269 @@
+"""Structured data extraction from customer messages
+
+Every pattern used to pull amounts, tenure, KYC identifiers, email and
+salary out of a chat message lives here, compiled once at import.
+``extract(message)`` lowercases/uppercases the message once and returns an
+``ExtractedFields`` whose fields are parsed lazily (each at most once), so
+the orchestrator and the agents handling the same turn share one parse.
+
+Fields keep the rules of the code that consumes them; where two callers
+historically disagreed (e.g. what counts as a loan amount while chatting
+with the orchestrator vs. inside SalesAgent) both readings are exposed
+under separate names rather than silently unified.
+"""
+import re
+from functools import cached_property, lru_cache
+from typing import FrozenSet, List, Optional, Tuple
+
+from .intents import detect_intents
+
+LAKH = 100_000
+CRORE = 10_000_000
+# Accepted loan amounts (10k to 10 crore)
+MIN_LOAN_AMOUNT = 10_000
+MAX_LOAN_AMOUNT = 100_000_000
+
+NAME_TRIGGERS = ("my name is", "i am", "i'm")
+SALARY_KEYWORDS = ("salary", "income", "earning", "per month", "monthly", "per annum", "annual")
+LOAN_KEYWORDS = ("loan", "amount", "rupees", "₹", "need", "want", "borrow")
+
+AMOUNT_RE = re.compile(r"(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:lakh|lakhs|crore|crores)?")
+# SalesAgent's amount readings, tried in priority order
+SALES_AMOUNT_RES = (
+    re.compile(r"(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:lakh|lakhs)"),
+    re.compile(r"(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:crore|crores)"),
+    re.compile(r"₹\s*(\d+(?:,\d+)*(?:\.\d+)?)"),
+    re.compile(r"(\d+(?:,\d+)*(?:\.\d+)?)\s*rupees?"),
+    re.compile(r"\b(\d{5,})\b"),  # 5+ digit numbers as potential amounts
+)
+AMOUNT_UPDATE_RE = re.compile(
+    r"(?:amount|loan\s*amount)[^\d]*(\d[\d,]*)(?:\s*)(lakh|lakhs|lac|lacs|lkhs|lkh|crore|crores)?", re.IGNORECASE
+)
+# "tenure to 48 months" style directives are covered too: they always contain "<n> <unit>"
+TENURE_RE = re.compile(r"(\d+)\s*(months?|month|years?|yrs?|y)\b")
+TENURE_ALTERNATIVES_RE = re.compile(r"\b(\d+)\s*(months?|years?)\b.*\bor\b.*\b(\d+)\s*(months?|years?)\b")
+
+PAN_RE = re.compile(r"[A-Z]{5}[0-9]{4}[A-Z]")
+PAN_LIKE_RE = re.compile(r"\b([A-Z0-9]{10})\b")
+PAN_WORD_RE = re.compile(r"\bpan\b")
+AADHAR_RE = re.compile(r"\b\d{12}\b")
+AADHAR_FULL_RE = re.compile(r"\d{12}")
+EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b")
+
+_UNIT = r"(lakh|lakhs|lac|lacs|lkhs|lkh|crore|crores)?"
+SALARY_IS_RE = re.compile(r"salary\s+is\s+([\d,\s]+)(?:\s*)" + _UNIT, re.IGNORECASE)
+SALARY_RE = re.compile(r"salary[^\d]*([\d,\s]+)(?:\s*)" + _UNIT, re.IGNORECASE)
+GENERIC_AMOUNT_RE = re.compile(r"([\d,\s]+)(?:\s*)" + _UNIT, re.IGNORECASE)
+MONTHLY_RE = re.compile(r"\b(month|monthly|per\s*month|a\s*month)\b")
+YEARLY_RE = re.compile(r"\b(year|yearly|per\s*year|annum|annual|p\.?a\.?)\b")
+CRORE_UNIT_RE = re.compile(r"crore|crores")
+LAKH_UNIT_RE = re.compile(r"lakh|lakhs|lac|lacs|lkhs|lkh")
+
+
+def _months(value: int, unit: str) -> int:
+    return value * 12 if unit.startswith("y") else value
+
+
+def _scale(base: float, unit: Optional[str]) -> float:
+    """Apply a lakh/crore unit word to a number."""
+    if not unit:
+        return base
+    u = unit.lower()
+    if CRORE_UNIT_RE.search(u):
+        return base * CRORE
+    if LAKH_UNIT_RE.search(u):
+        return base * LAKH
+    return base
+
+
+class ExtractedFields:
+    """Everything a single message says about the application
+
+    Attributes are computed on first access and are ``None`` when the
+    message does not mention them.
+    """
+
+    def __init__(self, message: str):
+        self.message = message or ""
+        self.lower = self.message.lower()
+        self.upper = self.message.upper()
+
+    @cached_property
+    def name(self) -> Optional[str]:
+        """Word following "is"/"am" in "my name is ..." / "I am ..." messages."""
+        if not any(trigger in self.lower for trigger in NAME_TRIGGERS):
+            return None
+        parts = self.message.split()
+        for i, part in enumerate(parts):
+            if part.lower() in ("is", "am") and i + 1 < len(parts):
+                return parts[i + 1].strip(".,!?")
+        return None
+
+    @cached_property
+    def mentions_lakh_or_crore(self) -> bool:
+        return "lakh" in self.lower or "crore" in self.lower
+
+    @cached_property
+    def loan_amount(self) -> Optional[float]:
+        """Loan amount as read during free conversation (orchestrator rules).
+
+        Ignored when the message talks about salary, or is just an email
+        address; otherwise needs a loan keyword or a lakh/crore unit.
+        """
+        lower = self.lower
+        if any(keyword in lower for keyword in SALARY_KEYWORDS):
+            return None
+        has_loan_context = any(keyword in lower for keyword in LOAN_KEYWORDS)
+        if "@" in self.message and not has_loan_context:
+            return None
+        if not (has_loan_context or self.mentions_lakh_or_crore):
+            return None
+        match = AMOUNT_RE.search(self.message)
+        if not match:
+            return None
+        amount = float(match.group(1).replace(",", ""))
+        if amount < MIN_LOAN_AMOUNT and not self.mentions_lakh_or_crore:
+            return None
+        if "lakh" in lower:
+            amount *= LAKH
+        elif "crore" in lower:
+            amount *= CRORE
+        return amount if MIN_LOAN_AMOUNT <= amount <= MAX_LOAN_AMOUNT else None
+
+    @cached_property
+    def sales_amount(self) -> Optional[float]:
+        """Loan amount as read by SalesAgent: first plausible amount by pattern priority."""
+        for pattern in SALES_AMOUNT_RES:
+            match = pattern.search(self.lower)
+            if not match:
+                continue
+            try:
+                amount = float(match.group(1).replace(",", ""))
+            except ValueError:
+                continue
+            if "lakh" in self.lower:
+                amount *= LAKH
+            elif "crore" in self.lower:
+                amount *= CRORE
+            if MIN_LOAN_AMOUNT <= amount <= MAX_LOAN_AMOUNT:
+                return amount
+        return None
+
+    @cached_property
+    def amount_update(self) -> Optional[float]:
+        """Explicit "amount ..." restatement, e.g. "reduce amount to 3 lakhs" (no range check)."""
+        match = AMOUNT_UPDATE_RE.search(self.message)
+        if not match:
+            return None
+        try:
+            base = float(match.group(1).replace(",", ""))
+        except ValueError:
+            return None
+        return _scale(base, match.group(2))
+
+    @cached_property
+    def tenure_months(self) -> Optional[int]:
+        """Tenure with an explicit unit ("24 months", "3 years"); bare numbers are ignored."""
+        match = TENURE_RE.search(self.lower)
+        if not match:
+            return None
+        return _months(int(match.group(1)), match.group(2))
+
+    @cached_property
+    def tenure_alternatives(self) -> Optional[Tuple[int, int]]:
+        """Two tenures the customer is choosing between ("24 months or 3 years"), in months."""
+        match = TENURE_ALTERNATIVES_RE.search(self.lower)
+        if not match:
+            return None
+        return (_months(int(match.group(1)), match.group(2)), _months(int(match.group(3)), match.group(4)))
+
+    @cached_property
+    def pan(self) -> Optional[str]:
+        """Well-formed PAN anywhere, else any 10-character token when "pan" is mentioned."""
+        match = PAN_RE.search(self.upper)
+        if match:
+            return match.group()
+        if "pan" in self.lower:
+            attempt = PAN_LIKE_RE.search(self.upper)
+            if attempt:
+                return attempt.group(1)
+        return None
+
+    @cached_property
+    def pan_attempt(self) -> Optional[str]:
+        """10-character token offered as a PAN (the word "pan" must appear), valid or not."""
+        if PAN_WORD_RE.search(self.lower):
+            match = PAN_LIKE_RE.search(self.upper)
+            if match:
+                return match.group(1)
+        return None
+
+    @cached_property
+    def aadhar(self) -> Optional[str]:
+        """Any standalone 12-digit number."""
+        match = AADHAR_RE.search(self.message)
+        return match.group() if match else None
+
+    @cached_property
+    def aadhar_attempt(self) -> Optional[str]:
+        """12-digit number offered while mentioning Aadhar/Aadhaar."""
+        if "aadhar" in self.lower or "aadhaar" in self.lower:
+            return self.aadhar
+        return None
+
+    @cached_property
+    def email(self) -> Optional[str]:
+        match = EMAIL_RE.search(self.message)
+        return match.group() if match else None
+
+    @cached_property
+    def salary(self) -> Optional[float]:
+        """Monthly salary in rupees; yearly figures ("12 lakhs per annum") are divided by 12."""
+        is_monthly = bool(MONTHLY_RE.search(self.lower))
+        is_yearly = bool(YEARLY_RE.search(self.lower))
+        patterns = [SALARY_IS_RE, SALARY_RE]
+        if "salary" in self.lower or is_monthly or is_yearly:
+            patterns.append(GENERIC_AMOUNT_RE)
+        # First pattern yielding a number wins ("salary is 60,000" before "salary 60000")
+        for pattern in patterns:
+            match = pattern.search(self.message)
+            if not match:
+                continue
+            try:
+                value = _scale(float(match.group(1).replace(",", "").replace(" ", "")), match.group(2))
+            except ValueError:
+                continue
+            return value if is_monthly or not is_yearly else round(value / 12)
+        return None
+
+    @cached_property
+    def intents(self) -> FrozenSet[str]:
+        """Keyword intents the message signals (see ``services.intents``)."""
+        return detect_intents(self.lower)
+
+    def all(self) -> List[str]:
+        """Names of the fields this message provides (forces every field)."""
+        return [field for field in FIELDS if getattr(self, field) is not None]
+
+
+FIELDS = (
+    "name", "loan_amount", "sales_amount", "amount_update", "tenure_months", "tenure_alternatives",
+    "pan", "pan_attempt", "aadhar", "aadhar_attempt", "email", "salary",
+)
+
+
+@lru_cache(maxsize=1024)
+def extract(message: str) -> ExtractedFields:
+    """Parse ``message`` once; repeated calls for the same text (orchestrator,
+    then the agent handling the turn) return the same result object."""
+    return ExtractedFields(message)
+
+
+def is_valid_pan(pan: Optional[str]) -> bool:
+    """Valid PAN: 5 uppercase letters, 4 digits, 1 uppercase letter."""
+    return bool(PAN_RE.fullmatch((pan or "").upper()))
+
+
+def is_valid_aadhar(aadhar: Optional[str]) -> bool:
+    """Valid Aadhar: exactly 12 digits."""
+    return bool(AADHAR_FULL_RE.fullmatch(aadhar or ""))
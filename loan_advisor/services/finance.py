@@ -0,0 +1,242 @@
+"""Loan arithmetic: EMI, totals, amortization and affordability, vectorized with NumPy
+
+Every EMI the agents quote comes from here. The functions take scalars or
+array-likes of principal, annual rate (% p.a.) and tenure (months) and
+broadcast them against each other, so a grid of tenures or a batch of
+quotes is one NumPy call:
+
+    emi(500000, 10.5, 36, decimals=2)                  # 16251.22, a float
+    emi(500000, [10.5, 11.0], [36, 60], decimals=2)    # ndarray of 2
+
+EMI = P·r·(1+r)^n / ((1+r)^n − 1) with the monthly rate r = annual / 1200.
+A zero (or negative) rate or tenure means no interest: P / max(n, 1).
+
+Scalars are computed in plain Python and come back as floats, bit for bit
+what the agents computed inline before. Arrays are computed with NumPy,
+whose vectorized ``power`` can differ from the C library in the last bit;
+rounded results (``decimals``) still equal Python's ``round(emi, decimals)``
+exactly, because the few values landing within that error of a rounding
+boundary are recomputed with the scalar formula.
+
+The affordability solvers invert the EMI formula for a maximum EMI: the
+shortest tenure (closed form, a logarithm), the largest principal and the
+highest rate that fit. Scalars give Python numbers or ``None`` when
+nothing fits, arrays give float arrays with NaN there.
+"""
+import math
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+ArrayLike = Union[float, int, np.ndarray, list, tuple]
+
+_EPS = np.finfo(np.float64).eps
+
+# EMI may take at most this share of the monthly salary
+MAX_EMI_TO_SALARY = 0.5
+# Longest tenure offered, in months
+MAX_TENURE_MONTHS = 120
+# Upper bound of the rate search in max_rate, % p.a.
+_RATE_CEILING = 100.0
+
+
+def _emi_scalar(principal: float, annual_rate: float, tenure_months: float) -> float:
+    r = annual_rate / (12 * 100)
+    if r <= 0 or tenure_months <= 0:
+        return principal / max(tenure_months, 1)
+    growth = (1 + r) ** tenure_months
+    if growth == 1:
+        # Rate too small to register over this tenure
+        return principal / tenure_months
+    return principal * r * growth / (growth - 1)
+
+
+def _is_scalar(*values) -> bool:
+    return not any(isinstance(v, (list, tuple, range, np.ndarray)) for v in values)
+
+
+def _arrays(*values) -> Tuple[np.ndarray, ...]:
+    return np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in values))
+
+
+def emi(principal: ArrayLike, annual_rate: ArrayLike, tenure_months: ArrayLike,
+        decimals: int = None) -> ArrayLike:
+    """Monthly installment; rounded like ``round(x, decimals)`` when ``decimals`` is given."""
+    if _is_scalar(principal, annual_rate, tenure_months):
+        value = _emi_scalar(principal, annual_rate, tenure_months)
+        return value if decimals is None else round(value, decimals)
+
+    p, annual, n = _arrays(principal, annual_rate, tenure_months)
+    r = annual / (12 * 100)
+    growth = np.power(1 + r, n)
+    flat = (r <= 0) | (n <= 0) | (growth == 1)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        values = np.where(flat, p / np.maximum(n, 1), p * r * growth / (growth - 1))
+    if decimals is None:
+        return values
+
+    scale = 10.0 ** decimals
+    scaled = values * scale
+    rounded = np.round(values, decimals)
+    # A last-bit error in growth is magnified by about 1 / (growth - 1) in
+    # the EMI; anything that close to a rounding boundary (x.5 after scaling)
+    # is settled by the scalar formula, which is what round() would see
+    with np.errstate(divide="ignore", invalid="ignore"):
+        amplification = np.where(flat, 1.0, 1 + 1 / np.abs(growth - 1))
+    tolerance = 64 * _EPS * amplification * np.maximum(np.abs(scaled), 1)
+    near = np.abs(scaled - np.floor(scaled) - 0.5) <= tolerance
+    for i in zip(*np.nonzero(near)):
+        rounded[i] = round(_emi_scalar(float(p[i]), float(annual[i]), float(n[i])), decimals)
+    return rounded
+
+
+def totals(principal: ArrayLike, emi_value: ArrayLike, tenure_months: ArrayLike) -> Tuple[ArrayLike, ArrayLike]:
+    """(total payable, total interest) for paying ``emi_value`` for ``tenure_months``."""
+    if _is_scalar(principal, emi_value, tenure_months):
+        total_payable = emi_value * tenure_months
+        return total_payable, total_payable - principal
+    p, e, n = _arrays(principal, emi_value, tenure_months)
+    total_payable = e * n
+    return total_payable, total_payable - p
+
+
+@dataclass
+class Schedule:
+    """Month-by-month amortization, shape ``(..., months)``; zeros after each loan's tenure"""
+    month: np.ndarray
+    payment: np.ndarray
+    interest: np.ndarray
+    principal: np.ndarray
+    balance: np.ndarray
+
+    @property
+    def total_interest(self) -> np.ndarray:
+        return self.interest.sum(axis=-1)
+
+    @property
+    def total_payable(self) -> np.ndarray:
+        return self.payment.sum(axis=-1)
+
+
+def amortization(principal: ArrayLike, annual_rate: ArrayLike, tenure_months: ArrayLike,
+                 decimals: int = 2) -> Schedule:
+    """Amortization schedules for every (principal, rate, tenure), in one pass.
+
+    Each month pays the EMI (rounded to ``decimals``, as quoted), split into
+    interest on the opening balance and principal; the last installment
+    settles whatever the rounding left over, so every balance ends at zero.
+    """
+    p, annual, n = _arrays(principal, annual_rate, tenure_months)
+    n = np.maximum(n.astype(np.int64), 1)
+    installment = np.asarray(emi(p, annual, n, decimals=decimals))
+    r = np.maximum(annual / (12 * 100), 0)[..., None]
+    months = int(n.max()) if n.size else 0
+    k = np.arange(1, months + 1)
+
+    growth = np.power(1 + r, k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Closed form of the balance after k payments; straight-line at zero rate
+        annuity = np.where(r > 0, (growth - 1) / np.where(r > 0, r, 1), k)
+    balance = p[..., None] * growth - installment[..., None] * annuity
+    active = k <= n[..., None]
+    balance = np.where(k < n[..., None], np.maximum(balance, 0), 0.0)
+    opening = np.concatenate([p[..., None], balance[..., :-1]], axis=-1)
+    interest = np.where(active, opening * r, 0.0)
+    principal_paid = np.where(active, opening - balance, 0.0)
+    return Schedule(
+        month=np.where(active, k, 0),
+        payment=interest + principal_paid,
+        interest=interest,
+        principal=principal_paid,
+        balance=balance,
+    )
+
+
+def min_tenure(principal: ArrayLike, annual_rate: ArrayLike, max_emi: ArrayLike,
+               min_months: ArrayLike = 1, max_months: ArrayLike = MAX_TENURE_MONTHS) -> Union[Optional[int], np.ndarray]:
+    """Shortest whole tenure in [min_months, max_months] whose EMI is at most ``max_emi``.
+
+    EMI <= E  <=>  (1+r)^n >= E / (E - P·r)  <=>  n >= -ln(1 - P·r/E) / ln(1+r),
+    or n >= P/E at zero rate; no tenure fits when E <= P·r (the interest alone
+    is more than E). The ceiling of the bound is then checked against
+    ``emi`` one month either side, so the answer is exactly the first month a
+    scan over the tenures would find.
+    """
+    if _is_scalar(principal, annual_rate, max_emi, min_months, max_months):
+        n = _min_tenure_bound_scalar(principal, annual_rate, max_emi)
+        if n is None:
+            return None
+        n = max(n, int(min_months))
+        if n - 1 >= min_months and emi(principal, annual_rate, n - 1) <= max_emi:
+            n -= 1
+        elif emi(principal, annual_rate, n) > max_emi:
+            n += 1
+        return n if n <= max_months else None
+
+    p, annual, e, lo, hi = _arrays(principal, annual_rate, max_emi, min_months, max_months)
+    n = np.maximum(_min_tenure_bound(p, annual, e), lo)
+    down = (n - 1 >= lo) & (emi(p, annual, np.maximum(n - 1, 1)) <= e)
+    n = np.where(down, n - 1, n)
+    up = ~down & (emi(p, annual, n) > e)
+    n = np.where(up, n + 1, n)
+    return np.where(n <= hi, n, np.nan)
+
+
+def _min_tenure_bound_scalar(p: float, annual: float, e: float) -> Optional[int]:
+    r = annual / (12 * 100)
+    if e <= 0:
+        return None
+    if r <= 0:
+        return math.ceil(p / e)
+    share = p * r / e
+    if share >= 1:
+        return None
+    return math.ceil(-math.log1p(-share) / math.log1p(r))
+
+
+def _min_tenure_bound(p, annual, e):
+    r = annual / (12 * 100)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = p * r / e
+        bound = np.where(r > 0, -np.log1p(-share) / np.log1p(r), p / e)
+    feasible = (e > 0) & ((r <= 0) | (share < 1))
+    return np.where(feasible, np.ceil(bound), np.nan)
+
+
+def max_principal(annual_rate: ArrayLike, tenure_months: ArrayLike, max_emi: ArrayLike) -> ArrayLike:
+    """Largest principal whose EMI over ``tenure_months`` is at most ``max_emi``."""
+    # EMI is linear in the principal: divide by the EMI of one rupee
+    return _divide(max_emi, emi(1.0, annual_rate, tenure_months))
+
+
+def _divide(numerator, denominator):
+    if _is_scalar(numerator, denominator):
+        return numerator / denominator if denominator > 0 else None
+    num, den = _arrays(numerator, denominator)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / den, np.nan)
+
+
+def max_rate(principal: ArrayLike, tenure_months: ArrayLike, max_emi: ArrayLike,
+             iterations: int = 52) -> Union[Optional[float], np.ndarray]:
+    """Highest annual rate (% p.a.) at which the EMI is at most ``max_emi``.
+
+    EMI rises monotonically with the rate but cannot be inverted in closed
+    form, so every element is bisected at once over [0, 100]% p.a. No rate
+    fits when even the interest-free EMI, P/n, is above ``max_emi``.
+    """
+    scalar = _is_scalar(principal, tenure_months, max_emi)
+    p, n, e = _arrays(principal, tenure_months, max_emi)
+    low = np.zeros_like(p)
+    high = np.full_like(p, _RATE_CEILING)
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        fits = emi(p, mid, n) <= e
+        low = np.where(fits, mid, low)
+        high = np.where(fits, high, mid)
+    rate = np.where(emi(p, high, n) <= e, high, low)
+    rate = np.where(emi(p, 0.0, n) <= e, rate, np.nan)
+    if scalar:
+        return None if np.isnan(rate) else float(rate)
+    return rate
@@ -2,28 +2,29 @@ import json
 from fastapi.exceptions import HTTPException
 from fastapi import status
 import os
-from langchain_groq import ChatGroq
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
+from .llm_service import get_llm_client, get_rate_limiter, LLM_BACKEND
+from .rate_limiter import PRIORITY_BACKGROUND, estimate_tokens
 
 load_dotenv()
 
 # Set default Groq API key and model from environment
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "llama-3.3-70b-versatile")
+# Token budget for rate limiting: fixed prompt scaffolding and a typical HTML email body
+EMAIL_PROMPT_TOKEN_ESTIMATE = 350
+EMAIL_COMPLETION_TOKEN_ESTIMATE = 600
 
 # Check if Groq API key is available
-if not GROQ_API_KEY:
+if not GROQ_API_KEY and LLM_BACKEND != "stub":
     print("WARNING: No Groq API key found in environment variables. API will not function properly.")
 
-def generate_email(recipient_email: str, context: str):
+async def generate_email(recipient_email: str, context: str):
     try:
-        # Initialize LLM with the API key
-        llm = ChatGroq(
-            groq_api_key=GROQ_API_KEY,
-            model_name=DEFAULT_MODEL
-        )
+        # Shared, pooled client from the LLM service registry
+        llm = get_llm_client(DEFAULT_MODEL)
         
         # Create the prompt template
         prompt = ChatPromptTemplate.from_messages([
@@ -62,7 +63,13 @@ IMPORTANT: Return ONLY the JSON object, nothing else.
         
         # Create and invoke the chain
         chain = prompt | llm | StrOutputParser()
-        generated_email = chain.invoke({"context": context, "recipient_email": recipient_email})
+        # Background priority: queued behind interactive chat turns under quota pressure
+        limiter = get_rate_limiter()
+        prompt_tokens = estimate_tokens(context, recipient_email) + EMAIL_PROMPT_TOKEN_ESTIMATE
+        estimated = prompt_tokens + EMAIL_COMPLETION_TOKEN_ESTIMATE
+        async with limiter.limit(PRIORITY_BACKGROUND, estimated):
+            generated_email = await chain.ainvoke({"context": context, "recipient_email": recipient_email})
+        limiter.record_usage(estimated, prompt_tokens + estimate_tokens(generated_email))
         # print("✉️Generated Email:", generated_email)
         return generated_email
     except Exception as e:
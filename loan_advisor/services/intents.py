@@ -0,0 +1,116 @@
+"""Keyword intent detection compiled into a single-pass matcher
+
+``INTENT_KEYWORDS`` is the routing vocabulary of the orchestrator and the
+agents. Keywords are plain substrings of the lowercased message (as the
+original ``any(k in ml for k in [...])`` checks were, so "plans" also
+signals "plan" and "not sure" also contains "sure"). They are compiled
+once into a trie-shaped regex inside a lookahead, which reports the
+longest keyword starting at every position of the message in one scan;
+every shorter keyword starting there is a prefix of it, so the full set of
+matched intents is recovered without a second pass.
+
+``INTENT_PATTERNS`` holds the few signals that need word boundaries or
+structure and cannot be expressed as substrings.
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, Mapping, Tuple
+
+INTENT_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    # Orchestrator routing
+    "sales": (
+        "emi", "interest", "rate", "tenure", "months", "years", "loan", "amount", "rupees", "₹", "lakh", "crore",
+        "repayment", "repay", "installment", "schedule", "plan", "plans", "options",
+    ),
+    "pan": ("pan",),
+    "aadhar": ("aadhar",),
+    "kyc": ("kyc",),
+    "underwriting": ("credit score", "underwriting"),
+    "eligibility": ("eligibility", "approve", "approval", "salary"),
+    "pdf": ("sanction letter", "pdf"),
+    # SalesAgent
+    "uncertainty": (
+        "unsure", "not sure", "nervous", "confused", "uncertain", "hesitant", "anxious",
+        "doubt", "dilemma", "overwhelmed", "worried", "maybe", "perhaps", "not confident",
+    ),
+    "negotiation": (
+        "reduce", "lower", "decrease", "discount", "better rate", "negotiate", "can you do better", "best rate",
+        "cheaper", "less interest",
+    ),
+    "amount_update": ("change", "update", "reduce", "increase", "lower", "need", "want", "loan"),
+    "rate_question": ("interest", "rate"),
+    "rate_pushback": ("negotiate", "reduce", "lower"),
+    "repayment": ("repayment", "repay", "plan", "plans", "schedule", "installment", "emi options", "tenure options"),
+    # EligibilityAgent
+    "affirmative": ("yes", "ok", "okay", "sure", "do that", "do it", "proceed", "go ahead", "please do"),
+    "confirmation": ("yes", "confirm", "proceed", "approve", "accept", "agree"),
+    "salary": ("salary",),
+}
+
+INTENT_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    # Word forms not covered by the "confused" keyword, and phrasing with arbitrary whitespace
+    "uncertainty": (
+        r"\bconfus(?:e|ed|ion)\b",
+        r"\bnot\s+(?:sure|confident)\b",
+        r"\b(?:can't|cannot)\s+(?:decide|choose)\b",
+    ),
+}
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Regex alternation shaped as a trie; longer continuations are tried first."""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            return ("(?:" + body + ")" if len(branches) == 1 and len(body) > 1 else body) + "?"
+        return body
+
+    return build(trie)
+
+
+class IntentMatcher:
+    """Compiled form of an intent table"""
+
+    def __init__(self, keywords: Mapping[str, Iterable[str]], patterns: Mapping[str, Iterable[str]] = None):
+        owners: Dict[str, set] = {}
+        for intent, words in keywords.items():
+            for word in words:
+                owners.setdefault(word.lower(), set()).add(intent)
+        # Intents signalled by a matched keyword: its own plus those of every keyword it starts with
+        self._intents_for: Dict[str, FrozenSet[str]] = {
+            word: frozenset().union(*(owners[word[:i]] for i in range(1, len(word) + 1) if word[:i] in owners))
+            for word in owners
+        }
+        self._keywords = re.compile("(?=(" + _trie_regex(owners) + "))")
+        patterns = patterns or {}
+        groups = [f"(?P<p{i}>{pattern})" for i, pattern in enumerate(p for ps in patterns.values() for p in ps)]
+        self._pattern_intents = [intent for intent, ps in patterns.items() for _ in ps]
+        self._patterns = re.compile("|".join(groups)) if groups else None
+
+    def match(self, text: str) -> FrozenSet[str]:
+        """Every intent whose keywords or patterns occur in ``text`` (already lowercased)."""
+        found = set()
+        for m in self._keywords.finditer(text):
+            found |= self._intents_for[m.group(1)]
+        if self._patterns is not None:
+            for m in self._patterns.finditer(text):
+                found.add(self._pattern_intents[int(m.lastgroup[1:])])
+        return frozenset(found)
+
+
+INTENTS = IntentMatcher(INTENT_KEYWORDS, INTENT_PATTERNS)
+
+
+def detect_intents(text: str) -> FrozenSet[str]:
+    """Intents present in an already-lowercased message."""
+    return INTENTS.match(text)
@@ -0,0 +1,299 @@
+"""Persistent in-process job queue for work that must not hold up a turn
+
+Jobs (e.g. rendering, uploading and emailing a sanction letter) are written
+to SQLite (``JOB_QUEUE_PATH``, default ``data/jobs.db`` in the repository
+root) when enqueued and on every state change, and
+run by ``JOB_WORKERS`` asyncio workers. A failed attempt is retried with
+exponential backoff (``JOB_BACKOFF_BASE_SECONDS`` doubling up to
+``JOB_BACKOFF_MAX_SECONDS``, with jitter) until ``JOB_MAX_ATTEMPTS``.
+
+Handlers can ``checkpoint`` progress, so a retry resumes after the last
+completed step instead of redoing it (no second upload because the email
+failed). A running job holds a lease of ``JOB_TIMEOUT_SECONDS``: it is
+cancelled when the lease runs out, and a job left running by a crashed
+process is picked up again once its lease has expired (on a clean shutdown
+it is put back in the queue straight away). Several processes
+can share one database; a job is claimed with a compare-and-swap, so only
+one of them runs it.
+"""
+import asyncio
+import heapq
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Resolved once, so the database does not depend on the working directory
+JOB_QUEUE_PATH = os.path.abspath(os.getenv(
+    "JOB_QUEUE_PATH", os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'jobs.db')))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+JOB_BACKOFF_BASE_SECONDS = float(os.getenv("JOB_BACKOFF_BASE_SECONDS", 2))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", 300))
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", 300))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+ACTIVE = (QUEUED, RUNNING)
+
+JOBS_TOTAL = counter("loan_jobs_total", "Background job attempts by kind and outcome")
+JOB_SECONDS = histogram("loan_job_seconds", "Duration of background job attempts")
+
+
+@dataclass
+class Job:
+    kind: str
+    application_id: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    job_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = QUEUED
+    attempts: int = 0
+    max_attempts: int = JOB_MAX_ATTEMPTS
+    run_at: float = field(default_factory=time.time)
+    progress: Dict[str, Any] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    last_error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class JobFailed(Exception):
+    """Raised by a handler for a failure that retrying cannot fix"""
+
+
+Handler = Callable[[Job], Awaitable[Optional[Dict[str, Any]]]]
+
+_COLUMNS = ("job_id", "kind", "application_id", "payload", "status", "attempts", "max_attempts", "run_at",
+            "progress", "result", "last_error", "created_at", "updated_at")
+_JSON_COLUMNS = ("payload", "progress", "result")
+
+
+class JobQueue:
+    """SQLite-backed queue with asyncio workers (see module docstring)"""
+
+    def __init__(self, path: str = JOB_QUEUE_PATH, workers: int = JOB_WORKERS,
+                 backoff_base: float = JOB_BACKOFF_BASE_SECONDS, backoff_max: float = JOB_BACKOFF_MAX_SECONDS,
+                 timeout: float = JOB_TIMEOUT_SECONDS):
+        self.path = path
+        self.workers = max(workers, 1)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._handlers: Dict[str, Handler] = {}
+        # (run_at, job_id) of jobs this process will try to run
+        self._due: List[Tuple[float, str]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode a commit then needs no fsync: a crashed process loses nothing, and a power
+        # cut can only roll back the last commits, never corrupt the database (the application
+        # store runs the same way). Claims and saves by the workers also run in a thread.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY, kind TEXT NOT NULL, application_id TEXT NOT NULL,"
+            " payload TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL,"
+            " max_attempts INTEGER NOT NULL, run_at REAL NOT NULL, progress TEXT NOT NULL,"
+            " result TEXT, last_error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_by_application ON jobs (application_id, kind)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, run_at)")
+
+    def register(self, kind: str, handler: Handler):
+        self._handlers[kind] = handler
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        """Start the workers on the running loop and pick up jobs left queued (or abandoned) in the database."""
+        if self._tasks:
+            return
+        asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._due = []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, run_at, status, updated_at FROM jobs WHERE status IN (?, ?)", ACTIVE
+            ).fetchall()
+        now = time.time()
+        for job_id, run_at, status, updated_at in rows:
+            if status == QUEUED:
+                heapq.heappush(self._due, (run_at, job_id))
+            elif updated_at + self.timeout < now:
+                # Its lease ran out: the process running it is gone
+                heapq.heappush(self._due, (now, job_id))
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        with self._lock:
+            self._conn.close()
+
+    def enqueue(self, kind: str, application_id: str, payload: Optional[Dict[str, Any]] = None,
+                job_id: Optional[str] = None) -> Job:
+        """Queue a job, or return the active one of the same kind for the application."""
+        active = self.active(kind, application_id)
+        if active is not None:
+            return active
+        job = Job(kind=kind, application_id=application_id, payload=payload or {})
+        if job_id is not None:
+            job.job_id = job_id
+        self._save(job)
+        self._schedule(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._from_row(row) if row else None
+
+    def active(self, kind: str, application_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE application_id = ? AND kind = ? AND status IN (?, ?)"
+                " ORDER BY created_at DESC LIMIT 1", (application_id, kind, *ACTIVE)
+            ).fetchone()
+        return self._from_row(row) if row else None
+
+    def checkpoint(self, job: Job, **progress):
+        """Persist progress so a retry can skip completed steps."""
+        job.progress.update(progress)
+        self._save(job)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def _schedule(self, job: Job):
+        if self._tasks:
+            heapq.heappush(self._due, (job.run_at, job.job_id))
+            self._wakeup.set()
+            return
+        try:
+            # Loads the job (and any others) from the database
+            self.start()
+        except RuntimeError:
+            pass  # No running loop (scripts): runs once a loop calls start()
+
+    async def _worker(self):
+        while True:
+            job_id = await self._next_due()
+            job = await asyncio.to_thread(self._claim, job_id)
+            if job is not None:
+                await self._run(job)
+
+    async def _next_due(self) -> str:
+        while True:
+            now = time.time()
+            if self._due and self._due[0][0] <= now:
+                return heapq.heappop(self._due)[1]
+            self._wakeup.clear()
+            timeout = self._due[0][0] - now if self._due else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _claim(self, job_id: str) -> Optional[Job]:
+        """Mark a due job running unless another worker or process got it first."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ?"
+                " WHERE job_id = ? AND ((status = ? AND run_at <= ?) OR (status = ? AND updated_at < ?))",
+                (RUNNING, now, job_id, QUEUED, now, RUNNING, now - self.timeout),
+            )
+        return self.get(job_id) if cursor.rowcount == 1 else None
+
+    async def _run(self, job: Job):
+        handler = self._handlers.get(job.kind)
+        started = time.perf_counter()
+        try:
+            if handler is None:
+                raise JobFailed(f"No handler for job kind {job.kind!r}")
+            job.result = await asyncio.wait_for(handler(job), self.timeout)
+            job.status = SUCCEEDED
+            job.last_error = None
+            outcome = "succeeded"
+        except asyncio.CancelledError:
+            # Shutdown: hand it back so the next start runs it again straight away
+            job.status = QUEUED
+            job.run_at = time.time()
+            self._save(job)
+            raise
+        except Exception as e:
+            job.last_error = f"{type(e).__name__}: {e}"
+            if isinstance(e, JobFailed) or job.attempts >= job.max_attempts:
+                job.status = FAILED
+                outcome = "failed"
+                logger.error(f"Job {job.job_id} ({job.kind}) failed after {job.attempts} attempts: {job.last_error}")
+            else:
+                delay = min(self.backoff_base * 2 ** (job.attempts - 1), self.backoff_max)
+                job.status = QUEUED
+                job.run_at = time.time() + delay * random.uniform(0.8, 1.2)
+                outcome = "retried"
+                logger.warning(f"Job {job.job_id} ({job.kind}) attempt {job.attempts} failed, "
+                               f"retrying in {delay:.0f}s: {job.last_error}")
+        JOB_SECONDS.observe(time.perf_counter() - started, kind=job.kind)
+        JOBS_TOTAL.inc(kind=job.kind, outcome=outcome)
+        await asyncio.to_thread(self._save, job)
+        if job.status == QUEUED:
+            self._schedule(job)
+
+    def _save(self, job: Job):
+        job.updated_at = time.time()
+        values = [getattr(job, column) for column in _COLUMNS]
+        values = [json.dumps(v) if column in _JSON_COLUMNS and v is not None else v
+                  for column, v in zip(_COLUMNS, values)]
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                values,
+            )
+
+    @staticmethod
+    def _from_row(row) -> Job:
+        data = dict(zip(_COLUMNS, row))
+        for column in _JSON_COLUMNS:
+            if data[column] is not None:
+                data[column] = json.loads(data[column])
+        return Job(**data)
+
+
+def create_job_queue(shard: Optional[int] = None) -> JobQueue:
+    """The queue at ``JOB_QUEUE_PATH``; sharded workers each get their own file,
+    since a job can only run on the worker holding its application."""
+    path = JOB_QUEUE_PATH
+    if shard is not None:
+        root, ext = os.path.splitext(path)
+        path = f"{root}-{shard}{ext}"
+    return JobQueue(path)
@@ -1,128 +1,517 @@
 import os
+import re
+import json
+import time
+import asyncio
+import httpx
 from langchain_groq import ChatGroq
-from langchain_core.output_parsers import StrOutputParser
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
 from dotenv import load_dotenv
-from typing import Dict, Any
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable
 import logging
+from .response_cache import ResponseCache
+from .single_flight import SingleFlight
+from .rate_limiter import LLMRateLimiter, PRIORITY_INTERACTIVE, estimate_tokens
+from .resilience import CircuitBreaker, CircuitOpenError, CallTimeoutError, QueueTimeoutError, LatencyTracker, hedged
+from . import metrics
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-class LLMService:
-    def __init__(self):
-        self.model = "llama-3.3-70b-versatile"
-        self.client = ChatGroq(api_key=os.getenv("GROQ_API_KEY"), model_name=self.model)
-    
-    async def generate_response(self, agent_name: str, context: Dict[str, Any], user_message: str) -> str:
-        system_prompt = self._get_agent_prompt(agent_name, context)
-        
-        try:
-            prompt = ChatPromptTemplate.from_messages([("system", system_prompt)])
-            chain = prompt | self.client | StrOutputParser()
-            response = chain.invoke({"input": user_message})
-            logger.info(f"✅LLM response for {agent_name}: {response}")
-            return response
-        except Exception as e:
-            logger.error(f"Error generating response: {e}")
-            return self._get_fallback_response(agent_name, context)
-    
-    def _canonical_agent(self, agent_name: str) -> str:
-        n = (agent_name or "").lower()
-        if ("master" in n) or ("aura" in n):
-            return "Master Agent"
-        if ("sales" in n) or ("fina" in n):
-            return "Sales Agent"
-        if ("verification" in n) or ("kyc" in n) or ("vera" in n):
-            return "Verification Agent"
-        if ("underwriting" in n) or ("credo" in n):
-            return "Underwriting Agent"
-        if ("eligibility" in n) or ("elia" in n):
-            return "Eligibility Agent"
-        if ("pdf" in n) or ("docon" in n) or ("letter" in n):
-            return "PDF Agent"
-        return agent_name
+DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "llama-3.3-70b-versatile")
+# "groq" (default) or "stub" for the deterministic offline backend (see stub_llm.py)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq").lower()
+LLM_STUB_LATENCY_MS = float(os.getenv("LLM_STUB_LATENCY_MS", 0))
+LLM_STUB_JITTER_MS = float(os.getenv("LLM_STUB_JITTER_MS", 0))
+LLM_STUB_ERROR_RATE = float(os.getenv("LLM_STUB_ERROR_RATE", 0))
+LLM_STUB_SEED = int(os.getenv("LLM_STUB_SEED", 0))
+LLM_STUB_RESPONSES_FILE = os.getenv("LLM_STUB_RESPONSES_FILE")
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 20))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", 10))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 512))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", 300))
+LLM_COALESCE_ENABLED = os.getenv("LLM_COALESCE_ENABLED", "true").lower() == "true"
+# Provider quota (0, the default, disables a limit); set them to your plan's limits,
+# e.g. LLM_RPM=30 LLM_TPM=12000 for Groq's llama-3.3-70b free tier
+LLM_RPM = float(os.getenv("LLM_RPM", 0))
+LLM_TPM = float(os.getenv("LLM_TPM", 0))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", LLM_MAX_CONNECTIONS))
+LLM_COMPLETION_TOKEN_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKEN_ESTIMATE", 200))
+# Tail-latency controls
+LLM_CALL_TIMEOUT_SECONDS = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", 20))
+LLM_TURN_DEADLINE_SECONDS = float(os.getenv("LLM_TURN_DEADLINE_SECONDS", 25))
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 0))  # e.g. 95; 0 disables hedging
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20))
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", 5))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30))
 
-    def _get_agent_prompt(self, agent_name: str, context: Dict[str, Any]) -> str:
-        base_context = f"""
-Customer: {context.get('customer_name', 'Unknown')}
-Loan Status: {context.get('status', 'initiated')}
-Loan Amount: {context.get('loan_amount', 'Not specified')}
-"""
-        
-        prompts = {
-            "Master Agent": f"""You are a friendly Master Agent for SYNFIN. Your job is to:
+# Stands in for the customer's name inside cached completions so that turns
+# differing only by name share one cache entry.
+NAME_PLACEHOLDER = "\x00customer_name\x00"
+
+# Process-wide registry: one chat model per model name, all sharing a single pooled
+# async HTTP client so every agent (and email drafting) reuses warm connections.
+_clients: Dict[str, BaseChatModel] = {}
+_http_async_client: Optional[httpx.AsyncClient] = None
+_llm_service: Optional["LLMService"] = None
+_rate_limiter: Optional[LLMRateLimiter] = None
+
+# Set by streaming callers (e.g. /chat/stream); when present, completions are
+# streamed and each token is forwarded to the sink as it arrives.
+TokenSink = Callable[[str], Awaitable[None]]
+token_sink: ContextVar[Optional[TokenSink]] = ContextVar("llm_token_sink", default=None)
+
+# Monotonic time by which every LLM call in the current /chat turn must finish.
+turn_deadline: ContextVar[Optional[float]] = ContextVar("llm_turn_deadline", default=None)
+
+
+@contextmanager
+def llm_turn_deadline(seconds: float = LLM_TURN_DEADLINE_SECONDS):
+    """Bound the total LLM time of one turn; nested scopes keep the outer deadline."""
+    if turn_deadline.get() is not None or seconds <= 0:
+        yield
+        return
+    reset_token = turn_deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        turn_deadline.reset(reset_token)
+
+
+def _get_http_async_client() -> httpx.AsyncClient:
+    global _http_async_client
+    if _http_async_client is None or _http_async_client.is_closed:
+        _http_async_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+            )
+        )
+    return _http_async_client
+
+
+def get_llm_client(model: str = DEFAULT_MODEL) -> BaseChatModel:
+    """Return the shared chat model for ``model`` on the configured backend, creating it on first use."""
+    client = _clients.get(model)
+    if client is None:
+        client = _build_stub_client() if LLM_BACKEND == "stub" else ChatGroq(
+            api_key=os.getenv("GROQ_API_KEY"),
+            model_name=model,
+            http_async_client=_get_http_async_client(),
+        )
+        _clients[model] = client
+    return client
+
+
+def _build_stub_client() -> BaseChatModel:
+    from .stub_llm import StubChatModel
+
+    responses = {}
+    if LLM_STUB_RESPONSES_FILE:
+        with open(LLM_STUB_RESPONSES_FILE, encoding="utf-8") as f:
+            responses = json.load(f)
+    return StubChatModel(
+        latency_ms=LLM_STUB_LATENCY_MS,
+        jitter_ms=LLM_STUB_JITTER_MS,
+        error_rate=LLM_STUB_ERROR_RATE,
+        seed=LLM_STUB_SEED,
+        responses=responses,
+    )
+
+
+def get_rate_limiter() -> LLMRateLimiter:
+    """Return the limiter shared by every outbound Groq call in this process."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = LLMRateLimiter(LLM_RPM, LLM_TPM, LLM_MAX_CONCURRENCY)
+    return _rate_limiter
+
+
+def get_llm_service() -> "LLMService":
+    """Return the process-wide LLMService shared by all agents."""
+    global _llm_service
+    if _llm_service is None:
+        _llm_service = LLMService()
+    return _llm_service
+
+
+async def close_llm_clients():
+    """Release pooled connections (called on application shutdown)."""
+    global _http_async_client
+    _clients.clear()
+    if _http_async_client is not None:
+        await _http_async_client.aclose()
+        _http_async_client = None
+
+
+AGENT_PROMPTS: Dict[str, str] = {
+    "Master Agent": """You are a friendly Master Agent for SYNFIN. Your job is to:
 1. Welcome customers warmly
 2. Collect their name if not provided
 3. Generate interest in personal loans
 4. Mention competitive rates starting from 10.5%
 
-Current context: {base_context}
-
 Be conversational, helpful, and focus on building rapport. Keep responses under 100 words.
 Identity rule: Do not introduce yourself with a personal name. If identity is needed, say you are the SYNFIN Loan Assistant. Never use phrases like "My name is ...".""",
 
-            "Sales Agent": f"""You are a Sales Agent at SYNFIN specializing in loan products. Your job is to:
+    "Sales Agent": """You are a Sales Agent at SYNFIN specializing in loan products. Your job is to:
 1. Discuss loan amounts (ask if not provided)
 2. Explain tenure options (12-60 months)
 3. Calculate and present EMI details
 4. Set interest rates: ≤5L=10.5%, ≤10L=11.5%, >10L=12.5%, the interest rate is flexible and user can negotiate
 5. You have act in user best interest to choose a good tenure and EMI plan and convince user to proceed to KYC verification
 
-Current context: {base_context}
-
 Important style rule: Do NOT begin with a greeting if the customer has already been welcomed by another agent. Avoid starting with phrases like "Hello", "Hi", or "Welcome". Begin directly with the next actionable question or summary.
 
 Important sequencing rule: Do NOT mention KYC or request PAN/Aadhar until both loan amount and tenure are captured and an EMI summary has been presented. If the user asks about interest, provide the applicable rate slab immediately and then ask for tenure to proceed to EMI.
 Identity rule: Do not introduce yourself with a personal name. If identity is needed, refer to yourself as the SYNFIN Sales Agent.
 Be professional, clear about terms, and guide towards KYC verification once details are complete.""",
 
-            "Verification Agent": f"""You are a KYC Verification Agent at SYNFIN. Your job is to:
+    "Verification Agent": """You are a KYC Verification Agent at SYNFIN. Your job is to:
 1. Collect PAN number (format: ABCDE1234F)
 2. Collect Aadhar number (12 digits)
 3. Verify documents through mock APIs
 4. Proceed to underwriting after successful verification
 
-Current context: {base_context}
-
 Be security-focused, explain why documents are needed, and reassure about data safety.""",
 
-            "Underwriting Agent": f"""You are an Underwriting Agent at SYNFIN. Your job is to:
+    "Underwriting Agent": """You are an Underwriting Agent at SYNFIN. Your job is to:
 1. Fetch credit scores (600-800 range)
 2. Set pre-approved limits based on credit score
 3. Explain credit assessment results
 4. Move to eligibility check
 
-Current context: {base_context}
-
 Be analytical, explain credit score impact, and maintain professional tone.""",
 
-            "Eligibility Agent": f"""You are an Eligibility Agent at SYNFIN making loan decisions. Your job is to:
+    "Eligibility Agent": """You are an Eligibility Agent at SYNFIN making loan decisions. Your job is to:
 1. Check if loan ≤ pre-approved limit AND credit ≥700 (instant approval)
 2. Request salary if conditions not met
 3. Verify EMI ≤50% of salary
 4. Approve or reject based on criteria
 5. If rejecting, provide actionable suggestions (reduce amount, increase tenure, add co-applicant/additional income, lower other EMIs) and invite the user to recalculate EMI via the Sales Agent
 
-Current context: {base_context}
-
 Be decisive, explain reasoning clearly, congratulate on approvals, and be helpful on rejections with clear next steps.""",
 
-            "PDF Agent": f"""You are a PDF Generation Agent at SYNFIN. Your job is to:
+    "PDF Agent": """You are a PDF Generation Agent at SYNFIN. Your job is to:
 1. Confirm loan approval
 2. Generate sanction letter
 3. Provide download information
 4. Close conversation professionally
 
-Current context: {base_context}
-
 Be congratulatory, professional, and provide clear next steps."""
-        }
+}
+
+DEFAULT_AGENT_PROMPT_KEY = "Default"
+AGENT_PROMPTS[DEFAULT_AGENT_PROMPT_KEY] = "You are a helpful loan processing agent."
+
+# Per-turn context goes in its own trailing system message so the instruction
+# prefix stays byte-identical across turns (provider-side prompt caching).
+CONTEXT_PROMPT = """Current context:
+Customer: {customer_name}
+Loan Status: {status}
+Loan Amount: {loan_amount}"""
+
+# Compiled once at import; only the template inputs vary per call.
+AGENT_PROMPT_TEMPLATES: Dict[str, ChatPromptTemplate] = {
+    name: ChatPromptTemplate.from_messages([
+        ("system", text),
+        ("system", CONTEXT_PROMPT),
+        ("human", "{input}"),
+    ])
+    for name, text in AGENT_PROMPTS.items()
+}
+
+
+def _message_text(message: Any) -> str:
+    """Text of a chat model message or chunk (plain strings pass through)."""
+    if isinstance(message, str):
+        return message
+    content = getattr(message, "content", "")
+    return content if isinstance(content, str) else str(content)
+
+
+class LLMService:
+    def __init__(self, model: str = DEFAULT_MODEL):
+        self.model = model
+        self._chains: Dict[str, Runnable] = {}
+        self.cache = ResponseCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SECONDS) if LLM_CACHE_ENABLED else None
+        self.inflight = SingleFlight() if LLM_COALESCE_ENABLED else None
+        self.limiter = get_rate_limiter()
+        self.breaker = CircuitBreaker(LLM_BREAKER_FAILURE_THRESHOLD, LLM_BREAKER_RESET_SECONDS)
+        self.latency = LatencyTracker(min_samples=LLM_HEDGE_MIN_SAMPLES)
+        self.timeouts = 0
+        self.hedges = 0
+        self._warm_chains()
+        self._register_metrics()
+
+    @property
+    def client(self) -> BaseChatModel:
+        return get_llm_client(self.model)
+    
+    async def generate_response(self, agent_name: str, context: Dict[str, Any], user_message: str, use_cache: bool = True, priority: int = PRIORITY_INTERACTIVE) -> str:
+        canonical = self._canonical_agent(agent_name)
+        inputs = self._prompt_inputs(context, user_message)
+        use_cache = use_cache and self.cache is not None
+        name = self._cacheable_name(inputs["customer_name"])
+        sink = token_sink.get()
+        cache_key = self._cache_key(canonical, inputs)
         
+        if use_cache:
+            cached = self.cache.get(cache_key)
+            metrics.LLM_CACHE_LOOKUPS.inc(agent=canonical, result="miss" if cached is None else "hit")
+            if cached is not None:
+                logger.info(f"✅LLM cache hit for {agent_name}")
+                response = self._unmask_name(cached, name)
+                if sink:
+                    await sink(response)
+                return response
+        
+        if self._call_timeout() <= 0:
+            logger.warning(f"Turn deadline exhausted before LLM call for {agent_name}")
+            metrics.LLM_FALLBACKS.inc(agent=canonical, reason="deadline")
+            return self._get_fallback_response(agent_name, context)
+        
+        try:
+            chain = self._get_chain(canonical)
+            led = False
+
+            async def call() -> str:
+                nonlocal led
+                led = True
+                if not self.breaker.allow():
+                    raise CircuitOpenError("LLM circuit breaker is open")
+                probe = self.breaker.state == CircuitBreaker.HALF_OPEN
+                try:
+                    response = await self._invoke(chain, inputs, sink, priority, canonical)
+                except (QueueTimeoutError, asyncio.CancelledError):
+                    # Never got a provider answer: says nothing about the provider's health
+                    if probe:
+                        self.breaker.release_probe()
+                    raise
+                except CallTimeoutError:
+                    self.timeouts += 1
+                    self.breaker.record_failure()
+                    raise
+                except Exception:
+                    self.breaker.record_failure()
+                    raise
+                self.breaker.record_success()
+                return self._mask_name(response, name)
+
+            # Identical concurrent prompts share one provider request; a follower
+            # waits no longer than its own call would have been allowed to take
+            if self.inflight:
+                timeout = self._call_timeout()
+                try:
+                    masked = await self.inflight.do(cache_key, call, timeout)
+                except asyncio.TimeoutError:
+                    if led:
+                        raise
+                    raise CallTimeoutError(f"Coalesced LLM call exceeded {timeout:.1f}s deadline")
+            else:
+                masked = await call()
+            response = self._unmask_name(masked, name)
+            if not led:
+                logger.info(f"✅LLM coalesced response for {agent_name}")
+                metrics.LLM_COALESCED.inc(agent=canonical)
+                if sink:
+                    await sink(response)
+                return response
+            logger.info(f"✅LLM response for {agent_name}: {response}")
+            if use_cache:
+                self.cache.set(cache_key, masked)
+            return response
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            reason = ("circuit_open" if isinstance(e, CircuitOpenError) else "timeout" if isinstance(e, CallTimeoutError)
+                      else "queue" if isinstance(e, QueueTimeoutError) else "error")
+            metrics.LLM_FALLBACKS.inc(agent=canonical, reason=reason)
+            return self._get_fallback_response(agent_name, context)
+    
+    def _call_timeout(self) -> float:
+        """Seconds this call may take: the per-call timeout capped by the turn deadline."""
+        deadline = turn_deadline.get()
+        if deadline is None:
+            return LLM_CALL_TIMEOUT_SECONDS
+        return min(LLM_CALL_TIMEOUT_SECONDS, deadline - time.monotonic())
+
+    def _queue_timeout(self) -> Optional[float]:
+        """Seconds this call may wait for the rate limiter: what is left of the turn, if it has a deadline."""
+        deadline = turn_deadline.get()
+        return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+    async def _invoke(self, chain: Runnable, inputs: Dict[str, Any], sink: Optional[TokenSink] = None,
+                      priority: int = PRIORITY_INTERACTIVE, canonical: str = DEFAULT_AGENT_PROMPT_KEY) -> str:
+        # Hedge only buffered calls: two concurrent token streams cannot share one sink
+        hedge_after = self.latency.percentile(LLM_HEDGE_PERCENTILE) if LLM_HEDGE_PERCENTILE > 0 and sink is None else None
+        if hedge_after is not None:
+            return await hedged(lambda: self._attempt(chain, inputs, sink, priority, canonical), hedge_after, self._on_hedge)
+        return await self._attempt(chain, inputs, sink, priority, canonical)
+
+    def _on_hedge(self):
+        self.hedges += 1
+
+    async def _attempt(self, chain: Runnable, inputs: Dict[str, Any], sink: Optional[TokenSink],
+                       priority: int, canonical: str) -> str:
+        prompt_tokens = estimate_tokens(AGENT_PROMPTS.get(canonical, ""), *map(str, inputs.values()))
+        estimated = prompt_tokens + LLM_COMPLETION_TOKEN_ESTIMATE
+        # Queueing for the limiter has its own budget; only the provider call is timed
+        try:
+            await asyncio.wait_for(self.limiter.acquire(priority, estimated), self._queue_timeout())
+        except asyncio.TimeoutError:
+            raise QueueTimeoutError("Turn deadline passed while waiting for the LLM rate limiter")
+        try:
+            timeout = self._call_timeout()
+            if timeout <= 0:
+                raise QueueTimeoutError("Turn deadline passed while waiting for the LLM rate limiter")
+            started = time.monotonic()
+            try:
+                response, usage = await asyncio.wait_for(self._request(chain, inputs, sink), timeout)
+            except asyncio.TimeoutError:
+                raise CallTimeoutError(f"LLM call exceeded {timeout:.1f}s deadline")
+            elapsed = time.monotonic() - started
+            self.latency.record(elapsed)
+        finally:
+            self.limiter.release()
+        # Provider-reported usage when available, otherwise the same estimate the limiter used
+        if usage:
+            prompt_tokens, completion_tokens = usage.get("input_tokens", prompt_tokens), usage.get("output_tokens", 0)
+        else:
+            completion_tokens = estimate_tokens(response)
+        metrics.LLM_REQUEST_SECONDS.observe(elapsed, agent=canonical)
+        metrics.LLM_PROMPT_TOKENS.observe(prompt_tokens, agent=canonical)
+        metrics.LLM_COMPLETION_TOKENS.observe(completion_tokens, agent=canonical)
+        self.limiter.record_usage(estimated, prompt_tokens + completion_tokens)
+        return response
+    
+    @staticmethod
+    async def _request(chain: Runnable, inputs: Dict[str, Any], sink: Optional[TokenSink]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """One provider call: the completion text and its reported token usage, if any."""
+        usage = None
+        if sink is None:
+            message = await chain.ainvoke(inputs)
+            return _message_text(message), getattr(message, "usage_metadata", None)
+        parts = []
+        async for chunk in chain.astream(inputs):
+            token = _message_text(chunk)
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            if token:
+                parts.append(token)
+                await sink(token)
+        return "".join(parts), usage
+
+    def _canonical_agent(self, agent_name: str) -> str:
+        n = (agent_name or "").lower()
+        if ("master" in n) or ("aura" in n):
+            return "Master Agent"
+        if ("sales" in n) or ("fina" in n):
+            return "Sales Agent"
+        if ("verification" in n) or ("kyc" in n) or ("vera" in n):
+            return "Verification Agent"
+        if ("underwriting" in n) or ("credo" in n):
+            return "Underwriting Agent"
+        if ("eligibility" in n) or ("elia" in n):
+            return "Eligibility Agent"
+        if ("pdf" in n) or ("docon" in n) or ("letter" in n):
+            return "PDF Agent"
+        return agent_name
+
+    def _get_chain(self, canonical: str) -> Runnable:
+        """Return the compiled ``prompt | client`` chain for a canonical agent.
+
+        The chain yields the raw AI message (not a parsed string) so the
+        provider's token usage is available for metrics and rate limiting.
+        """
+        key = canonical if canonical in AGENT_PROMPTS else DEFAULT_AGENT_PROMPT_KEY
+        chain = self._chains.get(key)
+        if chain is None:
+            chain = AGENT_PROMPT_TEMPLATES[key] | self.client
+            self._chains[key] = chain
+        return chain
+
+    def _warm_chains(self):
+        """Compile every agent chain up front; falls back to lazy compilation on failure."""
+        try:
+            for key in AGENT_PROMPT_TEMPLATES:
+                self._get_chain(key)
+        except Exception as e:
+            logger.warning(f"Deferring LLM chain compilation: {e}")
+
+    def _register_metrics(self):
+        """Expose the live cache, coalescing, limiter and breaker state on /metrics."""
+        def cache_stat(key):
+            return lambda: self.cache.stats()[key] if self.cache else None
+
+        def per_priority(key):
+            return lambda: {metrics.labels(priority=p): v for p, v in self.limiter.stats()[key].items()}
+
+        metrics.register_callback("llm_cache_hits_total", "Response cache hits", cache_stat("hits"), "counter")
+        metrics.register_callback("llm_cache_misses_total", "Response cache misses", cache_stat("misses"), "counter")
+        metrics.register_callback("llm_cache_evictions_total", "Response cache evictions", cache_stat("evictions"), "counter")
+        metrics.register_callback("llm_cache_entries", "Entries currently in the response cache", cache_stat("size"))
+        metrics.register_callback("llm_inflight_requests", "Distinct provider calls currently in flight",
+                                  lambda: self.inflight.in_flight() if self.inflight else None)
+        metrics.register_callback("llm_limiter_active", "Provider calls holding a rate limiter slot", lambda: self.limiter.active)
+        metrics.register_callback("llm_limiter_queue_depth", "Calls waiting on the rate limiter", self.limiter.queue_depth)
+        metrics.register_callback("llm_limiter_admitted_total", "Calls admitted by the rate limiter", per_priority("admitted"), "counter")
+        metrics.register_callback("llm_limiter_wait_seconds_total", "Time spent queued in the rate limiter",
+                                  per_priority("wait_seconds"), "counter")
+        metrics.register_callback("llm_breaker_open", "1 while the circuit breaker rejects calls",
+                                  lambda: int(self.breaker.state != CircuitBreaker.CLOSED))
+        metrics.register_callback("llm_breaker_rejections_total", "Calls rejected by the open breaker",
+                                  lambda: self.breaker.rejections, "counter")
+        metrics.register_callback("llm_timeouts_total", "Provider calls that hit their timeout", lambda: self.timeouts, "counter")
+        metrics.register_callback("llm_hedges_total", "Hedged second attempts started", lambda: self.hedges, "counter")
+
+    def _prompt_inputs(self, context: Dict[str, Any], user_message: str) -> Dict[str, Any]:
+        return {
+            "customer_name": context.get('customer_name', 'Unknown'),
+            "status": context.get('status', 'initiated'),
+            "loan_amount": context.get('loan_amount', 'Not specified'),
+            "input": user_message,
+        }
+
+    def _cacheable_name(self, name: Any) -> Optional[str]:
+        """Names short enough to collide with ordinary words are kept in the key instead."""
+        if isinstance(name, str) and len(name.strip()) >= 2:
+            return name.strip()
+        return None
+
+    def _cache_key(self, canonical: str, inputs: Dict[str, Any]) -> Tuple[str, ...]:
+        """Key on everything the prompt depends on, with the customer name abstracted away."""
+        name = self._cacheable_name(inputs["customer_name"])
+        loan_amount = inputs["loan_amount"]
+        if isinstance(loan_amount, float) and loan_amount.is_integer():
+            loan_amount = int(loan_amount)
+        return (
+            canonical,
+            NAME_PLACEHOLDER if name else str(inputs["customer_name"]),
+            str(inputs["status"]),
+            str(loan_amount),
+            " ".join(str(inputs["input"]).lower().split()),
+        )
+
+    def _mask_name(self, response: str, name: Optional[str]) -> str:
+        if not name:
+            return response
+        return re.sub(rf"\b{re.escape(name)}\b", NAME_PLACEHOLDER, response)
+
+    def _unmask_name(self, response: str, name: Optional[str]) -> str:
+        return response.replace(NAME_PLACEHOLDER, name) if name else response
+
+    def _get_agent_prompt(self, agent_name: str, context: Dict[str, Any]) -> str:
+        """Render the full prompt text for an agent (debugging/inspection helper)."""
         canonical = self._canonical_agent(agent_name)
-        return prompts.get(canonical, "You are a helpful loan processing agent.")
+        key = canonical if canonical in AGENT_PROMPTS else DEFAULT_AGENT_PROMPT_KEY
+        messages = AGENT_PROMPT_TEMPLATES[key].format_messages(**self._prompt_inputs(context, ""))
+        return "\n\n".join(m.content for m in messages[:-1])
     
     def _get_fallback_response(self, agent_name: str, context: Dict[str, Any]) -> str:
         fallbacks = {
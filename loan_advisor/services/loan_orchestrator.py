@@ -1,8 +1,12 @@
-import uuid
-from typing import Dict, Any, Optional
+import asyncio
+import json
+import math
+from dataclasses import dataclass
+from typing import Dict, Any, AsyncIterable, AsyncIterator, List, Optional, Callable, Awaitable, Sequence, Tuple
 import re
 import os
 import sys
+import logging
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from agents.master_agent import MasterAgent
 from agents.sales_agent import SalesAgent
@@ -11,6 +15,63 @@ from agents.underwriting_agent import UnderwritingAgent
 from agents.eligibility_agent import EligibilityAgent
 from agents.pdf_agent import PDFAgent
 from models.loan_models import LoanApplication, Customer, LoanStatus, AgentResponse
+from services.llm_service import close_llm_clients, token_sink, llm_turn_deadline
+from services.metrics import PHASE_SECONDS, labels, register_callback, render_prometheus
+from services.application_store import ApplicationStore, VersionConflict, create_application_store
+from services.application_delta import ChangeLog, pick
+from services.event_journal import EventJournal, create_journal
+from services.striped_lock import StripedLock
+from services.extraction import extract
+from services.batching import CHAT_BATCH_CONCURRENCY, CHAT_BATCH_MAX_ITEMS, run_batch
+from services.sharding import SHARD_COUNT, HashRing, new_application_id, worker_shard
+from services.job_queue import Job, JobFailed, JobQueue, create_job_queue
+from services.rate_calculator import RateCalculator
+from services.bulk_quotes import BULK_QUOTE_MAX_BODY_BYTES, BulkQuoter
+from services import finance
+
+logger = logging.getLogger(__name__)
+
+# Receives (agent_name, text) as a turn produces output, for streaming clients.
+TextCallback = Callable[[str, str], Awaitable[None]]
+
+# Run the predicted chained agent concurrently with the current one (see _start_speculation).
+# Off by default: the only hand-off below (Master -> Sales) has an LLM call on the
+# Master side only, so overlapping them saves well under a millisecond per turn
+# while costing a deep copy and two dumps of the application.
+SPECULATIVE_HANDOFF = os.getenv("SPECULATIVE_HANDOFF", "false").lower() == "true"
+# Locks turns for one application are serialized on (see StripedLock)
+APP_LOCK_STRIPES = int(os.getenv("APP_LOCK_STRIPES", 1024))
+
+STATUS_AGENT_MAP = {
+    LoanStatus.INITIATED: "master_agent",
+    LoanStatus.SALES_DISCUSSION: "sales_agent",
+    LoanStatus.KYC_VERIFICATION: "verification_agent",
+    LoanStatus.UNDERWRITING: "underwriting_agent",
+    LoanStatus.ELIGIBILITY_CHECK: "eligibility_agent",
+    LoanStatus.APPROVED: "pdf_agent"
+}
+
+# Background job rendering, uploading and emailing the sanction letter
+SANCTION_LETTER_JOB = "sanction_letter"
+
+# (current agent, status) -> (predicted next agent, status it hands off with,
+# precondition for the hand-off). Speculation only pays off where both agents
+# wait on the LLM; the next agent must be free of external side effects
+# (PDFAgent, which uploads and emails, must never run speculatively).
+SPECULATIVE_HANDOFFS: Dict[Tuple[str, LoanStatus], Tuple[str, LoanStatus, Callable[[LoanApplication], bool]]] = {
+    ("master_agent", LoanStatus.INITIATED): (
+        "sales_agent", LoanStatus.SALES_DISCUSSION,
+        lambda app: bool(app.customer.name and app.customer.email),
+    ),
+}
+
+
+@dataclass
+class Speculation:
+    agent_key: str
+    application: LoanApplication  # private copy the speculative agent works on
+    snapshot: Dict[str, Any]      # predicted state of the real application at hand-off
+    task: asyncio.Task
 
 class LoanOrchestrator:
     def __init__(self):
@@ -22,44 +83,118 @@ class LoanOrchestrator:
             "eligibility_agent": EligibilityAgent(),
             "pdf_agent": PDFAgent()
         }
-        self.applications: Dict[str, LoanApplication] = {}
+        self.applications: ApplicationStore = create_application_store()
+        self.changes = ChangeLog()
+        self.journal: Optional[EventJournal] = create_journal()
+        self.locks = StripedLock(APP_LOCK_STRIPES)
+        self.speculative = SPECULATIVE_HANDOFF
+        self.batch_concurrency = CHAT_BATCH_CONCURRENCY
+        self.batch_max_items = CHAT_BATCH_MAX_ITEMS
+        self.bulk_max_body_bytes = BULK_QUOTE_MAX_BODY_BYTES
+        # As a sharded worker, only mint application ids the front routes back here
+        self.shard = worker_shard()
+        self.ring = HashRing(SHARD_COUNT) if self.shard is not None else None
+        self.jobs: JobQueue = create_job_queue(self.shard)
+        self.jobs.register(SANCTION_LETTER_JOB, self._deliver_sanction_letter)
+        self.rate_calculator = RateCalculator()
+        self.speculation_hits = 0
+        self.speculation_misses = 0
+        register_callback("loan_applications", "Applications held by the orchestrator", lambda: len(self.applications))
+        register_callback("loan_store_conflicts_total", "Saves rejected because the application changed concurrently",
+                          lambda: self.applications.conflicts, "counter")
+        register_callback("loan_sessions_hot", "Applications held in memory",
+                          lambda: self.applications.stats().get("hot"))
+        register_callback("loan_sessions_hot_bytes", "Serialized size of the applications held in memory",
+                          lambda: self.applications.stats().get("hot_bytes"))
+        register_callback("loan_session_evictions_total", "Applications spilled to disk, by reason",
+                          lambda: {labels(reason=r): n for r, n in self.applications.stats().get("evictions", {}).items()}, "counter")
+        register_callback("loan_session_rehydrations_total", "Spilled applications loaded back into memory",
+                          lambda: self.applications.stats().get("rehydrations"), "counter")
+        register_callback("loan_lock_waiting", "Turns waiting for their application's lock",
+                          lambda: self.locks.waiting)
+        register_callback("loan_lock_contended_total", "Turns that found their application's lock held",
+                          lambda: self.locks.contended, "counter")
+        register_callback("loan_journal_records_total", "Events written to the application journal",
+                          lambda: self.journal.records if self.journal else None, "counter")
+        register_callback("loan_journal_fsyncs_total", "Journal write batches (one fsync each)",
+                          lambda: self.journal.fsyncs if self.journal else None, "counter")
+        register_callback("loan_jobs", "Background jobs by status",
+                          lambda: {labels(status=s): n for s, n in self.jobs.stats().items()})
+        register_callback("loan_speculation_hits_total", "Speculative hand-offs whose result was used",
+                          lambda: self.speculation_hits, "counter")
+        register_callback("loan_speculation_misses_total", "Speculative hand-offs discarded or failed",
+                          lambda: self.speculation_misses, "counter")
     
-    async def start_application(self, customer_id: str, initial_message: str = "") -> Dict[str, Any]:
-        app_id = str(uuid.uuid4())
+    async def start_application(self, customer_id: str, initial_message: str = "", on_text: Optional[TextCallback] = None) -> Dict[str, Any]:
+        app_id = new_application_id(self.ring, self.shard)
         application = LoanApplication(
             application_id=app_id,
             customer=Customer(customer_id=customer_id)
         )
         
-        self.applications[app_id] = application
+        version = self.applications.save(application)
+        state = application.model_dump()
+        self.changes.record(app_id, None, version, state)
+        if self.journal is not None:
+            self.journal.record_created(app_id, version, state)
         
-        response = await self.process_message(app_id, initial_message or "Hello")
+        response = await self.process_message(app_id, initial_message or "Hello", on_text=on_text)
         return {
             "application_id": app_id,
             "response": response
         }
     
-    async def process_message(self, app_id: str, message: str, data_update: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        if app_id not in self.applications:
+    async def process_message(self, app_id: str, message: str, data_update: Optional[Dict[str, Any]] = None, on_text: Optional[TextCallback] = None) -> Dict[str, Any]:
+        # Turns for one application run one at a time, in arrival order, so a
+        # retried or double-sent message cannot race the first (e.g. two PDFs)
+        async with self.locks.hold(app_id):
+            # All LLM calls of this turn (including a chained agent) share one deadline
+            with llm_turn_deadline():
+                return await self._process_message(app_id, message, data_update, on_text)
+
+    async def process_batch(self, items: Sequence[Any], app_id: Callable[[Any], Optional[str]],
+                            handler: Callable[[Any], Awaitable[Any]]) -> List[Any]:
+        """Run many turns at once: in order per ``app_id(item)``, at most ``batch_concurrency`` in flight."""
+        return await run_batch(items, app_id, handler, self.batch_concurrency)
+
+    async def _process_message(self, app_id: str, message: str, data_update: Optional[Dict[str, Any]] = None, on_text: Optional[TextCallback] = None) -> Dict[str, Any]:
+        await self.applications.prefetch(app_id)
+        loaded = self.applications.load(app_id)
+        if loaded is None:
             return {"error": "Application not found"}
         
-        application = self.applications[app_id]
+        # A private copy: nothing is visible to other turns or workers until it is saved
+        application, version = loaded
         
         # Update application data if provided
         if data_update:
             self._update_application_data(application, data_update)
+        sanction_letter_job = application.sanction_letter_job_id
         
         # Parse message for data extraction
-        self._extract_data_from_message(application, message)
+        with PHASE_SECONDS.time(phase="extract"):
+            self._extract_data_from_message(application, message)
 
         # Route to appropriate agent based on user intent keywords
-        self._route_by_intent(application, message)
+        with PHASE_SECONDS.time(phase="route"):
+            self._route_by_intent(application, message)
         
         # Get current agent based on status
-        current_agent = self._get_current_agent(application)
+        current_key = self._current_agent_key(application)
+        current_agent = self.agents[current_key]
+
+        # Start the predicted next agent now instead of after this one's LLM round-trip
+        speculation = self._start_speculation(current_key, application) if self.speculative else None
         
         # Process with agent
-        response = await current_agent.process(application, message)
+        try:
+            with PHASE_SECONDS.time(phase="agent", agent=current_key):
+                response = await self._run_agent(current_agent, application, message, on_text)
+        except BaseException:
+            self._discard_speculation(speculation)
+            raise
+        # What each agent said and asked to update, for the journal
+        responses = [response.model_dump()]
         
         # Update application with response data
         if response.data_updates:
@@ -67,24 +202,163 @@ class LoanOrchestrator:
         
         # Check if we need to move to next agent
         if response.next_agent and response.next_agent in self.agents:
-            next_agent = self.agents[response.next_agent]
-            next_response = await next_agent.process(application, "")
+            with PHASE_SECONDS.time(phase="chained_agent", agent=response.next_agent):
+                next_response = await self._take_speculation(speculation, response.next_agent, application)
+                if next_response is None:
+                    next_agent = self.agents[response.next_agent]
+                    next_response = await next_agent.process(application, "")
+            responses.append(next_response.model_dump())
             if next_response.message:
                 # Avoid duplicating salutations when chaining agents (e.g., Master → Sales)
                 deduped = self._dedupe_greeting(response.message or "", next_response.message or "")
                 if deduped:
                     response.message += "\n\n" + deduped
+                    if on_text:
+                        await on_text(next_response.agent_name, "\n\n" + deduped)
             if next_response.data_updates:
                 self._update_application_data(application, next_response.data_updates)
+        else:
+            self._discard_speculation(speculation)
+
+        try:
+            new_version = self.applications.save(application, expected_version=version)
+        except VersionConflict as e:
+            logger.warning(f"Discarding turn for {app_id}: {e}")
+            return {"error": "Application was updated by another request, please retry", "status_code": 409}
+        self._record_saved(app_id, version, new_version, application,
+                           {"message": message, "data_update": data_update, "responses": responses})
+
+        # PDFAgent asked for a sanction letter: queue it only now that the turn is saved
+        job_id = None
+        if application.sanction_letter_status == "queued" and application.sanction_letter_job_id != sanction_letter_job:
+            job_id = self.jobs.enqueue(SANCTION_LETTER_JOB, app_id, job_id=application.sanction_letter_job_id).job_id
         
+        # Clients fetch the application itself only when they ask for it (see application_data)
         return {
             "agent_name": response.agent_name,
             "message": response.message,
             "status": application.status.value,
             "action_required": response.action_required,
-            "application_data": application.dict()
+            "version": new_version,
+            "job_id": job_id
         }
 
+    def _record_saved(self, app_id: str, version: int, new_version: int, application: LoanApplication,
+                      turn: Dict[str, Any]):
+        """Feed a saved change to the delta log and the journal."""
+        state = application.model_dump()
+        changed = self.changes.record(app_id, version, new_version, state)
+        if self.journal is not None:
+            self.journal.record_turn(app_id, new_version, turn, state, None if changed is None else pick(state, changed))
+
+    async def _deliver_sanction_letter(self, job: Job) -> Dict[str, Any]:
+        """Job handler: send the letter PDFAgent promised, then complete the application."""
+        await self.applications.prefetch(job.application_id)
+        loaded = self.applications.load(job.application_id)
+        if loaded is None:
+            raise JobFailed("Application not found")
+        application, _ = loaded
+        if application.sanction_letter_job_id != job.job_id:
+            raise JobFailed("Superseded by a newer sanction letter")
+
+        # Runs outside the application's lock: the customer can keep chatting meanwhile
+        try:
+            result = await self.agents["pdf_agent"].deliver_sanction_letter(
+                application, job.progress, lambda **progress: self.jobs.checkpoint(job, **progress)
+            )
+        except Exception as e:
+            if isinstance(e, JobFailed) or job.attempts >= job.max_attempts:
+                await self._finish_sanction_letter(job, {"sanction_letter_status": "failed"})
+            raise
+        await self._finish_sanction_letter(job, {
+            "status": LoanStatus.COMPLETED.value,
+            "sanction_letter_status": "sent",
+            "sanction_letter_path": result["sanction_letter_path"],
+        })
+        return result
+
+    async def _finish_sanction_letter(self, job: Job, updates: Dict[str, Any]):
+        async with self.locks.hold(job.application_id):
+            await self.applications.prefetch(job.application_id)
+            loaded = self.applications.load(job.application_id)
+            if loaded is None:
+                return
+            application, version = loaded
+            if application.sanction_letter_job_id != job.job_id:
+                return
+            if application.status != LoanStatus.APPROVED:
+                # The conversation moved on (e.g. back to eligibility) while the letter was out
+                updates = {k: v for k, v in updates.items() if k != "status"}
+            self._update_application_data(application, updates)
+            # A conflict means another process saved first; the job is retried
+            new_version = self.applications.save(application, expected_version=version)
+            self._record_saved(job.application_id, version, new_version, application,
+                               {"job": job.job_id, "kind": job.kind, "data_update": updates})
+
+    def _start_speculation(self, current_key: str, application: LoanApplication) -> Optional[Speculation]:
+        """Launch the predicted chained agent on a copy of the application."""
+        predicted = SPECULATIVE_HANDOFFS.get((current_key, application.status))
+        if not predicted or not predicted[2](application):
+            return None
+        next_key, next_status, _ = predicted
+        copy = application.model_copy(deep=True)
+        copy.status = next_status
+        snapshot = copy.model_dump()
+        task = asyncio.create_task(self.agents[next_key].process(copy, ""))
+        return Speculation(next_key, copy, snapshot, task)
+
+    async def _take_speculation(self, speculation: Optional[Speculation], next_key: str,
+                                application: LoanApplication) -> Optional[AgentResponse]:
+        """Return the speculative result if it was computed from exactly the state the
+        real hand-off produced (adopting the copy's state); otherwise discard it."""
+        if speculation is None:
+            return None
+        if speculation.agent_key != next_key or speculation.snapshot != application.model_dump():
+            self._discard_speculation(speculation)
+            return None
+        try:
+            next_response = await speculation.task
+        except Exception as e:
+            logger.warning(f"Speculative {next_key} failed, re-running sequentially: {e}")
+            self.speculation_misses += 1
+            return None
+        for field in type(application).model_fields:
+            setattr(application, field, getattr(speculation.application, field))
+        self.speculation_hits += 1
+        return next_response
+
+    def _discard_speculation(self, speculation: Optional[Speculation]):
+        if speculation is None:
+            return
+        speculation.task.cancel()
+        # Retrieve the outcome so a failed or cancelled task is not reported as unhandled
+        speculation.task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self.speculation_misses += 1
+
+    async def _run_agent(self, agent, application: LoanApplication, message: str, on_text: Optional[TextCallback] = None) -> AgentResponse:
+        """Run an agent, forwarding LLM tokens and then any remaining deterministic text to ``on_text``."""
+        if on_text is None:
+            return await agent.process(application, message)
+
+        streamed: list[str] = []
+
+        async def sink(token: str):
+            streamed.append(token)
+            await on_text(agent.name, token)
+
+        reset_token = token_sink.set(sink)
+        try:
+            response = await agent.process(application, message)
+        finally:
+            token_sink.reset(reset_token)
+
+        text = response.message or ""
+        already_sent = "".join(streamed)
+        remaining = text[len(already_sent):] if text.startswith(already_sent) else text
+        if remaining:
+            await on_text(response.agent_name, remaining)
+        return response
+
     def _dedupe_greeting(self, first_msg: str, second_msg: str) -> str:
         """If both messages begin with a greeting, strip the salutation from the second.
         Keeps the content while removing repeated "Hello/Hi/Welcome" style openers.
@@ -104,18 +378,11 @@ class LoanOrchestrator:
             return strip_leading_greeting(second_msg)
         return second_msg
     
+    def _current_agent_key(self, application: LoanApplication) -> str:
+        return STATUS_AGENT_MAP.get(application.status, "master_agent")
+
     def _get_current_agent(self, application: LoanApplication):
-        status_agent_map = {
-            LoanStatus.INITIATED: "master_agent",
-            LoanStatus.SALES_DISCUSSION: "sales_agent",
-            LoanStatus.KYC_VERIFICATION: "verification_agent",
-            LoanStatus.UNDERWRITING: "underwriting_agent",
-            LoanStatus.ELIGIBILITY_CHECK: "eligibility_agent",
-            LoanStatus.APPROVED: "pdf_agent"
-        }
-        
-        agent_name = status_agent_map.get(application.status, "master_agent")
-        return self.agents[agent_name]
+        return self.agents[self._current_agent_key(application)]
     
     def _update_application_data(self, application: LoanApplication, updates: Dict[str, Any]):
         for key, value in updates.items():
@@ -127,139 +394,40 @@ class LoanOrchestrator:
                 setattr(application.customer, key, value)
     
     def _extract_data_from_message(self, application: LoanApplication, message: str):
-        message_lower = message.lower()
-        
-        # Extract name
-        if not application.customer.name and any(word in message_lower for word in ["my name is", "i am", "i'm"]):
-            parts = message.split()
-            for i, part in enumerate(parts):
-                if part.lower() in ["is", "am"] and i + 1 < len(parts):
-                    application.customer.name = parts[i + 1].strip(".,!?")
-                    break
-        
-        # Extract loan amount - only if not already set and in sales discussion
-        # CRITICAL: Skip if message contains salary keywords to avoid confusion
+        fields = extract(message)
+        customer = application.customer
+
+        if not customer.name and fields.name is not None:
+            customer.name = fields.name
+
+        # Loan amount only while discussing the loan, and never overwritten here
+        # (salary figures and bare emails are filtered out by the extractor)
         if not application.loan_amount and application.status == LoanStatus.SALES_DISCUSSION:
-            # Skip loan amount extraction if salary is being discussed
-            salary_keywords = ['salary', 'income', 'earning', 'per month', 'monthly', 'per annum', 'annual']
-            is_salary_context = any(keyword in message_lower for keyword in salary_keywords)
-            
-            if not is_salary_context:
-                # Look for loan-related keywords near numbers
-                loan_keywords = ['loan', 'amount', 'rupees', '₹', 'need', 'want', 'borrow']
-                has_loan_context = any(keyword in message_lower for keyword in loan_keywords)
-                
-                # Skip loan amount extraction if message contains email but no loan context
-                if '@' in message and not has_loan_context:
-                    pass  # Skip loan amount extraction but continue with other extractions
-                elif has_loan_context or any(word in message_lower for word in ['lakh', 'crore']):
-                    amount_match = re.search(r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:lakh|lakhs|crore|crores)?', message)
-                    if amount_match:
-                        amount_str = amount_match.group(1).replace(',', '')
-                        amount = float(amount_str)
-                        # Only consider reasonable loan amounts (above 10,000)
-                        if amount >= 10000 or 'lakh' in message_lower or 'crore' in message_lower:
-                            if 'lakh' in message_lower:
-                                amount *= 100000
-                            elif 'crore' in message_lower:
-                                amount *= 10000000
-                            # Cap at reasonable maximum and set valid amount
-                            if 10000 <= amount <= 100000000:  # 10k to 10 crore
-                                application.loan_amount = amount
-        
-        
-        # Case A: explicit unit provided (always allow update if present in message)
-        tenure_match = re.search(r'(\d+)\s*(months?|month|years?|yrs?|y)\b', message_lower)
-        if tenure_match:
-            tenure = int(tenure_match.group(1))
-            unit = tenure_match.group(2)
-            if unit.startswith('y') or unit.startswith('yr') or unit.startswith('year'):
-                tenure *= 12
-            application.tenure_months = tenure
-        else:
-            # Case B: directive patterns like "tenure to <n> months"
-            dir_match = re.search(r'(?:tenure\s*(?:to|is|=)\s*)(\d{1,3})\s*(months?|month|years?|yrs?|y)\b', message_lower)
-            if dir_match:
-                n = int(dir_match.group(1))
-                unit = dir_match.group(2)
-                if unit.startswith('y') or unit.startswith('yr') or unit.startswith('year'):
-                    n *= 12
-                application.tenure_months = n
-            # Removed auto-extraction of bare numbers to let SalesAgent handle EMI options properly
-        
-        # Extract PAN - look for PAN keyword or 10-character alphanumeric pattern
-        if not application.customer.pan:
-            # Try exact format first: 5 letters + 4 digits + 1 letter
-            pan_match = re.search(r'[A-Z]{5}[0-9]{4}[A-Z]', message.upper())
-            if pan_match:
-                application.customer.pan = pan_match.group()
-            elif 'pan' in message_lower:
-                # If user mentions PAN, extract any 10-character alphanumeric sequence
-                pan_attempt = re.search(r'\b([A-Z0-9]{10})\b', message.upper())
-                if pan_attempt:
-                    application.customer.pan = pan_attempt.group(1)
-        
-        # Extract Aadhar
-        if not application.customer.aadhar:
-            aadhar_match = re.search(r'\b\d{12}\b', message)
-            if aadhar_match:
-                application.customer.aadhar = aadhar_match.group()
-        
-        # Extract email
-        if not application.customer.email:
-            email_match = re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', message)
-            if email_match:
-                application.customer.email = email_match.group()
-        
-        # Extract salary - improved to handle "My monthly salary is 60,000" format
-        if not application.customer.salary:
-            # Support lakh/crore units and month/year qualifiers
-            def to_rupees(num_str: str, unit: Optional[str]) -> float:
-                try:
-                    # Remove commas and spaces from number string
-                    base = float(num_str.replace(',', '').replace(' ', ''))
-                except Exception:
-                    return float('nan')
-                if not unit:
-                    return base
-                u = (unit or "").lower()
-                if re.search(r'crore|crores', u):
-                    return base * 10000000
-                if re.search(r'lakh|lakhs|lac|lacs|lkhs|lkh', u):
-                    return base * 100000
-                return base
-
-            is_monthly = bool(re.search(r'\b(month|monthly|per\s*month|a\s*month)\b', message_lower))
-            is_yearly = bool(re.search(r'\b(year|yearly|per\s*year|annum|annual|p\.?a\.?)\b', message_lower))
-
-            # Case 1: explicit salary mention with "is" pattern (e.g., "My monthly salary is 60,000" or "70 000")
-            salary_is_match = re.search(r'salary\s+is\s+([\d,\s]+)(?:\s*)(lakh|lakhs|lac|lacs|lkhs|lkh|crore|crores)?', message, re.IGNORECASE)
-            if salary_is_match:
-                value = to_rupees(salary_is_match.group(1), salary_is_match.group(2))
-                if value == value:  # not NaN
-                    application.customer.salary = value if is_monthly or not is_yearly else round(value / 12)
-                    return
-
-            # Case 2: explicit salary mention (e.g., "salary 60000")
-            salary_match = re.search(r'salary[^\d]*([\d,\s]+)(?:\s*)(lakh|lakhs|lac|lacs|lkhs|lkh|crore|crores)?', message, re.IGNORECASE)
-            if salary_match:
-                value = to_rupees(salary_match.group(1), salary_match.group(2))
-                if value == value:  # not NaN
-                    application.customer.salary = value if is_monthly or not is_yearly else round(value / 12)
-                    return
-
-            # Case 3: generic amount near monthly/yearly context
-            generic_match = re.search(r'([\d,\s]+)(?:\s*)(lakh|lakhs|lac|lacs|lkhs|lkh|crore|crores)?', message, re.IGNORECASE)
-            if generic_match and ('salary' in message_lower or is_monthly or is_yearly):
-                value = to_rupees(generic_match.group(1), generic_match.group(2))
-                if value == value:
-                    application.customer.salary = value if is_monthly or not is_yearly else round(value / 12)
+            if fields.loan_amount is not None:
+                application.loan_amount = fields.loan_amount
+
+        # Tenure with an explicit unit always updates; bare numbers are left to SalesAgent's EMI options
+        if fields.tenure_months is not None:
+            application.tenure_months = fields.tenure_months
+
+        if not customer.pan and fields.pan is not None:
+            customer.pan = fields.pan
+
+        if not customer.aadhar and fields.aadhar is not None:
+            customer.aadhar = fields.aadhar
+
+        if not customer.email and fields.email is not None:
+            customer.email = fields.email
+
+        if not customer.salary and fields.salary is not None:
+            customer.salary = fields.salary
 
     def _route_by_intent(self, application: LoanApplication, message: str):
         """Adjust application status based on message intent to switch agents appropriately.
         Minimal, keyword-based routing to improve user experience.
         """
-        ml = message.lower()
+        fields = extract(message)
+        intents = fields.intents
 
         # Gate: Always collect customer name and email before progressing to sales/KYC/underwriting/eligibility/pdf
         # If name or email is missing, keep the flow with the Master Agent to collect it.
@@ -267,23 +435,20 @@ class LoanOrchestrator:
             application.status = LoanStatus.INITIATED
             return
         # Sales-related intents: EMI, interest, tenure, loan amount
-        sales_intent = any(k in ml for k in [
-            'emi', 'interest', 'rate', 'tenure', 'months', 'years', 'loan', 'amount', 'rupees', '₹', 'lakh', 'crore',
-            'repayment', 'repay', 'installment', 'schedule', 'plan', 'plans', 'options'
-        ])
+        sales_intent = "sales" in intents
         # Verification-related intents: PAN/Aadhar/KYC
-        pan_intent = ('pan' in ml) or bool(re.search(r'[A-Z]{5}[0-9]{4}[A-Z]{1}', message.upper()))
-        aadhar_intent = ('aadhar' in ml) or bool(re.search(r'\b\d{12}\b', message))
+        pan_intent = "pan" in intents or fields.pan is not None
+        aadhar_intent = "aadhar" in intents or fields.aadhar is not None
         # Only treat generic 'kyc' as verification intent once core sales details are complete
         verification_intent = pan_intent or aadhar_intent or (
-            ('kyc' in ml) and bool(application.loan_amount) and bool(application.tenure_months)
+            "kyc" in intents and bool(application.loan_amount) and bool(application.tenure_months)
         )
         # Underwriting intent
-        underwriting_intent = ('credit score' in ml) or ('underwriting' in ml)
+        underwriting_intent = "underwriting" in intents
         # Eligibility intent
-        eligibility_intent = ('eligibility' in ml) or ('approve' in ml) or ('approval' in ml) or ('salary' in ml)
+        eligibility_intent = "eligibility" in intents
         # PDF intent
-        pdf_intent = ('sanction letter' in ml) or ('pdf' in ml)
+        pdf_intent = "pdf" in intents
 
         # Prefer verification when PAN/Aadhar provided or explicit KYC requested after sales details
         if verification_intent:
@@ -309,5 +474,86 @@ class LoanOrchestrator:
         if pdf_intent and application.status in {LoanStatus.APPROVED, LoanStatus.COMPLETED}:
             application.status = LoanStatus.APPROVED
     
+    async def prefetch_application(self, app_id: str):
+        """Read a spilled application back into memory off the event loop, ahead of a sync lookup."""
+        await self.applications.prefetch(app_id)
+
     def get_application(self, app_id: str) -> Optional[LoanApplication]:
-        return self.applications.get(app_id)
\ No newline at end of file
+        return self.applications.get(app_id)
+
+    def get_application_json(self, app_id: str) -> Optional[Tuple[str, int]]:
+        """Stored JSON and version of an application, without re-serializing it."""
+        return self.applications.load_json(app_id)
+
+    def application_data(self, app_id: str, since_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """What a client holding ``since_version`` of an application needs to catch up.
+
+        ``changes`` holds only the fields changed since that version when
+        this process knows them (``full`` is False), otherwise the whole
+        application (``full`` is True), e.g. when no version was given.
+        """
+        if since_version is not None:
+            current = self.applications.version(app_id)
+            if current is None:
+                return None
+            changes = self.changes.delta(app_id, since_version, current)
+            if changes is not None:
+                return {"version": current, "full": False, "changes": changes}
+        loaded = self.applications.load_json(app_id)
+        if loaded is None:
+            return None
+        data, version = loaded
+        return {"version": version, "full": True, "changes": json.loads(data)}
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    def quote_affordability(self, monthly_salary: float, loan_amount: float, tenure_months: int,
+                            interest_rate: Optional[float] = None, credit_score: Optional[int] = None) -> Dict[str, Any]:
+        """EMI for the given terms and how far each of them can move while the EMI stays
+        within the salary limit (the other two held fixed). ``interest_rate`` defaults to
+        the dynamic rate for the amount, tenure and credit score."""
+        policy = self.rate_calculator.policy
+        if interest_rate is None:
+            interest_rate = policy.rate(loan_amount, tenure_months, credit_score)
+        max_emi = monthly_salary * finance.MAX_EMI_TO_SALARY
+        emi = finance.emi(loan_amount, interest_rate, tenure_months, decimals=2)
+        max_loan_amount = finance.max_principal(interest_rate, tenure_months, max_emi)
+        max_interest_rate = finance.max_rate(loan_amount, tenure_months, max_emi)
+        return {
+            "monthly_salary": monthly_salary,
+            "max_emi": round(max_emi, 2),
+            "loan_amount": loan_amount,
+            "tenure_months": tenure_months,
+            "interest_rate": interest_rate,
+            "policy_version": policy.version,
+            "emi": emi,
+            "emi_to_salary": round(emi / monthly_salary * 100, 2),
+            "affordable": emi <= max_emi,
+            "min_tenure_months": finance.min_tenure(loan_amount, interest_rate, max_emi, 12, finance.MAX_TENURE_MONTHS),
+            # Rounded down so the limits themselves still fit
+            "max_loan_amount": None if max_loan_amount is None else math.floor(max_loan_amount),
+            "max_interest_rate": None if max_interest_rate is None else math.floor(max_interest_rate * 100) / 100,
+        }
+
+    def quote_bulk(self, body: AsyncIterable[bytes], fmt: str = "jsonl") -> AsyncIterator[str]:
+        """Rate and EMI for every JSONL/CSV row of ``body``, as NDJSON (see services/bulk_quotes.py).
+        Raises ValueError for an unknown format."""
+        return BulkQuoter(self.rate_calculator.policy, fmt).quote_stream(body)
+
+    def render_metrics(self) -> str:
+        """Prometheus text exposition of every registered metric."""
+        return render_prometheus()
+
+    async def startup(self):
+        """Start the job workers, resuming jobs a previous run left unfinished."""
+        self.jobs.start()
+
+    async def shutdown(self):
+        """Stop the job workers, flush buffered application and journal writes and release pooled LLM connections."""
+        await self.jobs.close()
+        await self.applications.close()
+        if self.journal is not None:
+            await self.journal.close()
+        await close_llm_clients()
\ No newline at end of file
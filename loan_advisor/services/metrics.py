@@ -0,0 +1,161 @@
+"""In-process metrics with Prometheus text exposition
+
+Dependency-free counters and histograms for per-phase latency, LLM token
+usage and cache/fallback behaviour, plus callback metrics that read live
+values (queue depth, breaker state) at scrape time. Rendered by the
+``/metrics`` route in ``app.py``.
+"""
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (f'{k}="{v.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, List[float]] = {}  # bucket counts..., sum, count
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> float:
+        series = self._series.get(_label_key(labels))
+        return series[-1] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            cumulative = 0.0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {_format_value(series[-1])}")
+        return lines
+
+
+CallbackValue = Union[float, Dict[LabelKey, float]]
+
+
+class CallbackMetric:
+    """Gauge or counter whose value is read from live state at scrape time"""
+
+    def __init__(self, name: str, help_text: str, metric_type: str, fn: Callable[[], CallbackValue]):
+        self.name = name
+        self.help = help_text
+        self.type = metric_type
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        if isinstance(value, dict):
+            for key, v in sorted(value.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_format_value(v)}")
+        elif value is not None:
+            lines.append(f"{self.name} {_format_value(value)}")
+        return lines
+
+
+_registry: Dict[str, Union[Counter, Histogram, CallbackMetric]] = {}
+
+
+def counter(name: str, help_text: str) -> Counter:
+    return _registry.setdefault(name, Counter(name, help_text))
+
+
+def histogram(name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    return _registry.setdefault(name, Histogram(name, help_text, buckets))
+
+
+def register_callback(name: str, help_text: str, fn: Callable[[], CallbackValue], metric_type: str = "gauge"):
+    """Register (or replace) a metric computed by ``fn`` on every scrape."""
+    _registry[name] = CallbackMetric(name, help_text, metric_type, fn)
+
+
+def labels(**kv) -> LabelKey:
+    """Build a label key for callback metrics returning per-label values."""
+    return _label_key(kv)
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for name in sorted(_registry):
+        lines.extend(_registry[name].render())
+    return "\n".join(lines) + "\n"
+
+
+# Shared instruments
+PHASE_SECONDS = histogram("loan_phase_seconds", "Time spent in each phase of a chat turn")
+LLM_REQUEST_SECONDS = histogram("llm_request_seconds", "Provider round-trip time per LLM call")
+LLM_PROMPT_TOKENS = histogram("llm_prompt_tokens", "Prompt tokens per LLM call", TOKEN_BUCKETS)
+LLM_COMPLETION_TOKENS = histogram("llm_completion_tokens", "Completion tokens per LLM call", TOKEN_BUCKETS)
+LLM_CACHE_LOOKUPS = counter("llm_cache_lookups_total", "Response cache lookups per agent, by result")
+LLM_COALESCED = counter("llm_coalesced_total", "Calls answered by another caller's in-flight request")
+LLM_FALLBACKS = counter("llm_fallback_total", "LLM calls answered by the canned fallback, by reason")
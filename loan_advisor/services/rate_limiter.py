@@ -0,0 +1,156 @@
+"""Async token-bucket rate limiter with priorities for outbound LLM calls"""
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BACKGROUND: "background"}
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough token estimate (~4 characters per token) used for TPM budgeting."""
+    return sum(len(t or "") for t in texts) // 4 + 1
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding at most ``rate_per_minute`` tokens"""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.refill_per_second = self.capacity / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` tokens are available (0 if available now)."""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount: float):
+        if not self.unlimited:
+            self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, amount: float):
+        """Correct a previous estimate; positive ``amount`` takes more tokens (may go into debt)."""
+        if not self.unlimited:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class LLMRateLimiter:
+    """Admit LLM calls under RPM, TPM and concurrency limits, highest priority first
+
+    Waiters are served strictly in (priority, arrival) order, so background
+    work such as email drafting only runs when no interactive turn is queued.
+    A limit of 0 disables that dimension.
+    """
+
+    def __init__(self, rpm: float = 0, tpm: float = 0, max_concurrency: int = 0):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future, int]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Metrics
+        self.max_queue_depth = 0
+        self.admitted: Dict[str, int] = {}
+        self.wait_seconds: Dict[str, float] = {}
+
+    @asynccontextmanager
+    async def limit(self, priority: int = PRIORITY_INTERACTIVE, estimated_tokens: int = 1):
+        await self.acquire(priority, estimated_tokens)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE, estimated_tokens: int = 1):
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future, estimated_tokens))
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth())
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as we were cancelled: give the slot back
+                self.release()
+            else:
+                future.cancel()
+                self._dispatch()
+            raise
+        label = PRIORITY_NAMES.get(priority, str(priority))
+        self.admitted[label] = self.admitted.get(label, 0) + 1
+        self.wait_seconds[label] = self.wait_seconds.get(label, 0.0) + (time.monotonic() - started)
+
+    def release(self):
+        self.active -= 1
+        self._dispatch()
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """Reconcile the TPM bucket once the real size of a call is known."""
+        self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, f, _ in self._waiters if not f.done())
+
+    def _dispatch(self):
+        while self._waiters:
+            _, _, future, estimated = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.max_concurrency and self.active >= self.max_concurrency:
+                return  # release() will dispatch again
+            delay = max(self.requests.wait_time(1), self.tokens.wait_time(estimated))
+            if delay > 0:
+                self._schedule(delay)
+                return
+            heapq.heappop(self._waiters)
+            self.requests.consume(1)
+            self.tokens.consume(estimated)
+            self.active += 1
+            future.set_result(None)
+
+    def _schedule(self, delay: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "queue_depth": self.queue_depth(),
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": dict(self.admitted),
+            "wait_seconds": {k: round(v, 4) for k, v in self.wait_seconds.items()},
+            "rpm_available": None if self.requests.unlimited else round(self.requests.tokens, 2),
+            "tpm_available": None if self.tokens.unlimited else round(self.tokens.tokens, 2),
+        }
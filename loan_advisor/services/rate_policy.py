@@ -0,0 +1,388 @@
+"""Versioned rate policy, loaded from a config file and hot-reloaded
+
+Everything that prices a loan lives in one JSON file (``RATE_POLICY_PATH``,
+default ``config/rate_policy.json`` in the repository root): the base rate, the amount, tenure and
+credit-score slabs with their premiums, the bounds of the final rate, the
+negotiation discounts and their floor, and the flat slab rates the
+eligibility check uses. Each file carries a ``version``, which is stamped on
+every quote priced with it.
+
+A file is validated in full and compiled into an immutable ``RatePolicy``
+(rate lookups are a precomputed ``RateTable``) before it is used. The store
+checks the file's modification time at most every
+``RATE_POLICY_POLL_SECONDS``; a changed file is compiled off to the side
+and swapped in with a single reference assignment, so a request sees either
+the old policy or the new one, never a mix, and nothing restarts. A file that
+does not validate is logged and ignored: the last good policy stays in force.
+Without a file the built-in ``DEFAULT_RATE_POLICY`` applies.
+"""
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .metrics import counter
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Resolved once, so the file found does not depend on the working directory
+RATE_POLICY_PATH = os.path.abspath(os.getenv(
+    "RATE_POLICY_PATH", os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'rate_policy.json')))
+RATE_POLICY_POLL_SECONDS = float(os.getenv("RATE_POLICY_POLL_SECONDS", 5))
+
+POLICY_RELOADS = counter("loan_rate_policy_reloads_total", "Rate policy file reloads, by outcome")
+
+# The policy in force when there is no policy file
+DEFAULT_RATE_POLICY: Dict[str, Any] = {
+    "version": "builtin",
+    "base_rate": 9.0,
+    "min_rate": 9.5,
+    "max_rate": 15.0,
+    # Volume discount: up to each bound, then above the last
+    "amount_slabs": [
+        {"up_to": 500000, "premium": 1.5},
+        {"up_to": 1000000, "premium": 1.2},
+        {"up_to": 2500000, "premium": 1.0},
+        {"up_to": 5000000, "premium": 0.8},
+        {"up_to": 10000000, "premium": 0.6},
+        {"premium": 0.4},
+    ],
+    # Time risk: up to each bound in months, then longer
+    "tenure_slabs": [
+        {"up_to": 12, "premium": 0.0},
+        {"up_to": 24, "premium": 0.3},
+        {"up_to": 36, "premium": 0.5},
+        {"up_to": 48, "premium": 0.7},
+        {"premium": 1.0},
+    ],
+    # Credit score: below the first floor, then from each floor up
+    "credit_bands": [
+        {"premium": 1.5},
+        {"from": 650, "premium": 0.8},
+        {"from": 700, "premium": 0.3},
+        {"from": 750, "premium": 0.0},
+        {"from": 800, "premium": -0.5},
+    ],
+    "no_credit_premium": 0.0,
+    # Larger loans get bigger discounts, never below the floor
+    "negotiation": {
+        "floor": 9.5,
+        "discounts": [
+            {"discount": 0.5},
+            {"from": 2000000, "discount": 0.75},
+            {"from": 5000000, "discount": 1.0},
+        ],
+    },
+    # Flat rate by amount when eligibility recomputes the EMI for changed terms
+    "slab_rates": {
+        "default": 11.5,
+        "slabs": [
+            {"up_to": 500000, "rate": 10.5},
+            {"up_to": 1000000, "rate": 11.5},
+            {"rate": 12.5},
+        ],
+    },
+}
+
+
+class RatePolicyError(ValueError):
+    """Raised for a rate policy that does not validate"""
+
+
+class RateTable:
+    """The rate slabs compiled into a lookup table
+
+    Every rate is the base rate plus one premium per slab (amount, tenure,
+    credit score), clamped and rounded to 0.5%, so it depends only on which
+    slab each input falls in. All combinations are computed once, with the
+    same arithmetic as the ladders they replace, and a lookup is a bisect over
+    the amount and credit boundaries, an index into a dense per-month tenure
+    array, and three tuple indexes: bit-identical results, no arithmetic.
+    """
+
+    def __init__(self, base_rate: float, amount_bounds: Sequence[float], amount_premiums: Sequence[float],
+                 tenure_bounds: Sequence[int], tenure_premiums: Sequence[float],
+                 credit_floors: Sequence[int], credit_premiums: Sequence[float], no_credit_premium: float,
+                 min_rate: float, max_rate: float, dense_months: int = 120):
+        self.amount_bounds = tuple(amount_bounds)
+        self.tenure_bounds = tuple(tenure_bounds)
+        self.amount_premiums = tuple(amount_premiums)
+        self.tenure_premiums = tuple(tenure_premiums)
+        self.credit_floors = tuple(credit_floors)
+        # Credit buckets: one per floor band, then "no score"
+        credit = tuple(credit_premiums) + (no_credit_premium,)
+        self.no_credit = len(credit) - 1
+        self.table: Tuple[Tuple[Tuple[float, ...], ...], ...] = tuple(
+            tuple(tuple(self._final_rate(base_rate + a + t + c, min_rate, max_rate) for c in credit)
+                  for t in tenure_premiums)
+            for a in amount_premiums
+        )
+        self.array = np.array(self.table)
+        self.array.flags.writeable = False
+        # Tenure bucket of every whole month up to dense_months
+        self.tenure_index = tuple(bisect.bisect_left(self.tenure_bounds, m) for m in range(dense_months + 1))
+
+    @staticmethod
+    def _final_rate(rate: float, min_rate: float, max_rate: float) -> float:
+        # Ensure rate is within reasonable bounds, then round to nearest 0.5%
+        rate = max(min_rate, min(max_rate, rate))
+        return round(rate * 2) / 2
+
+    def _amount_bucket(self, loan_amount: float) -> int:
+        # Slabs are "amount <= bound"; NaN fails every comparison and lands in the last slab
+        if loan_amount != loan_amount:
+            return len(self.amount_bounds)
+        return bisect.bisect_left(self.amount_bounds, loan_amount)
+
+    def _tenure_bucket(self, tenure_months) -> int:
+        if type(tenure_months) is int and 0 <= tenure_months < len(self.tenure_index):
+            return self.tenure_index[tenure_months]
+        if tenure_months != tenure_months:
+            return len(self.tenure_bounds)
+        return bisect.bisect_left(self.tenure_bounds, tenure_months)
+
+    def _credit_bucket(self, credit_score) -> int:
+        if not credit_score:
+            return self.no_credit
+        # Bands are "score >= floor"; NaN fails every comparison and lands in the lowest band
+        if credit_score != credit_score:
+            return 0
+        return bisect.bisect_right(self.credit_floors, credit_score)
+
+    def amount_premium(self, loan_amount: float) -> float:
+        return self.amount_premiums[self._amount_bucket(loan_amount)]
+
+    def tenure_premium(self, tenure_months) -> float:
+        return self.tenure_premiums[self._tenure_bucket(tenure_months)]
+
+    def rate(self, loan_amount: float, tenure_months: int, credit_score: Optional[int]) -> float:
+        return self.table[self._amount_bucket(loan_amount)][self._tenure_bucket(tenure_months)][self._credit_bucket(credit_score)]
+
+    def rates(self, loan_amounts, tenures, credit_scores=None) -> np.ndarray:
+        amounts, months, scores = np.broadcast_arrays(
+            np.asarray(loan_amounts, dtype=np.float64),
+            np.asarray(tenures, dtype=np.float64),
+            np.asarray(np.nan if credit_scores is None else credit_scores, dtype=np.float64),
+        )
+        # searchsorted sorts NaN last, matching the scalar lookups for amount and tenure
+        a = np.searchsorted(self.amount_bounds, amounts, side="left")
+        t = np.searchsorted(self.tenure_bounds, months, side="left")
+        # Missing scores (None/NaN) and 0 mean "no score"
+        c = np.where(np.isnan(scores) | (scores == 0), self.no_credit,
+                     np.searchsorted(self.credit_floors, np.nan_to_num(scores), side="right"))
+        return self.array[a, t, c]
+
+
+@dataclass(frozen=True)
+class RatePolicy:
+    """One version of the rate policy, validated and compiled for lookups"""
+    version: str
+    base_rate: float
+    min_rate: float
+    max_rate: float
+    table: RateTable
+    negotiation_floor: float
+    discount_floors: Tuple[float, ...]
+    discounts: Tuple[float, ...]
+    slab_bounds: Tuple[float, ...]
+    slab_rates: Tuple[float, ...]
+    default_slab_rate: float
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RatePolicy":
+        """Validate a policy document (the JSON file's contents) and compile it."""
+        if not isinstance(data, dict):
+            raise RatePolicyError("policy must be a JSON object")
+        unknown = set(data) - set(DEFAULT_RATE_POLICY)
+        if unknown:
+            raise RatePolicyError(f"unknown keys: {', '.join(sorted(unknown))}")
+        version = data.get("version")
+        if not isinstance(version, str) or not version.strip():
+            raise RatePolicyError("version: must be a non-empty string")
+
+        base_rate = _number(data, "base_rate")
+        min_rate = _number(data, "min_rate")
+        max_rate = _number(data, "max_rate")
+        if not 0 < min_rate <= max_rate:
+            raise RatePolicyError("min_rate/max_rate: need 0 < min_rate <= max_rate")
+        amount_bounds, amount_premiums = _slabs(data, "amount_slabs", "up_to", "premium")
+        tenure_bounds, tenure_premiums = _slabs(data, "tenure_slabs", "up_to", "premium")
+        credit_floors, credit_premiums = _slabs(data, "credit_bands", "from", "premium")
+        no_credit_premium = _number(data, "no_credit_premium")
+
+        negotiation = _section(data, "negotiation")
+        negotiation_floor = _number(negotiation, "floor", "negotiation.")
+        discount_floors, discounts = _slabs(negotiation, "discounts", "from", "discount", "negotiation.")
+        if any(d < 0 for d in discounts):
+            raise RatePolicyError("negotiation.discounts: discounts cannot be negative")
+
+        slab_rates = _section(data, "slab_rates")
+        default_slab_rate = _number(slab_rates, "default", "slab_rates.")
+        slab_bounds, rates = _slabs(slab_rates, "slabs", "up_to", "rate", "slab_rates.")
+        if min(rates + (default_slab_rate,)) <= 0:
+            raise RatePolicyError("slab_rates: rates must be positive")
+
+        return cls(
+            version=version,
+            base_rate=base_rate,
+            min_rate=min_rate,
+            max_rate=max_rate,
+            table=RateTable(base_rate, amount_bounds, amount_premiums, tenure_bounds, tenure_premiums,
+                            credit_floors, credit_premiums, no_credit_premium, min_rate, max_rate),
+            negotiation_floor=negotiation_floor,
+            discount_floors=discount_floors,
+            discounts=discounts,
+            slab_bounds=slab_bounds,
+            slab_rates=rates,
+            default_slab_rate=default_slab_rate,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "RatePolicy":
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise RatePolicyError(f"not valid JSON: {e}") from e
+        return cls.from_dict(data)
+
+    def rate(self, loan_amount: float, tenure_months: int = 36, credit_score: Optional[int] = None) -> float:
+        return self.table.rate(loan_amount, tenure_months, credit_score)
+
+    def rates(self, loan_amounts, tenures, credit_scores=None) -> np.ndarray:
+        return self.table.rates(loan_amounts, tenures, credit_scores)
+
+    def negotiated_rate(self, current_rate: float, loan_amount: float) -> float:
+        # Discount bands are "amount >= floor"; NaN gets the smallest discount
+        band = 0 if loan_amount != loan_amount else bisect.bisect_right(self.discount_floors, loan_amount)
+        return max(self.negotiation_floor, current_rate - self.discounts[band])
+
+    def slab_rate(self, loan_amount: Optional[float]) -> float:
+        if loan_amount is None:
+            return self.default_slab_rate
+        # Slabs are "amount <= bound"; NaN lands in the last slab
+        slab = len(self.slab_bounds) if loan_amount != loan_amount else bisect.bisect_left(self.slab_bounds, loan_amount)
+        return self.slab_rates[slab]
+
+
+def _number(data: Dict[str, Any], key: str, where: str = "") -> float:
+    value = data.get(key)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise RatePolicyError(f"{where}{key}: must be a finite number")
+    return float(value)
+
+
+def _section(data: Dict[str, Any], key: str) -> Dict[str, Any]:
+    value = data.get(key)
+    if not isinstance(value, dict):
+        raise RatePolicyError(f"{key}: must be an object")
+    return value
+
+
+def _slabs(data: Dict[str, Any], key: str, bound_key: str, value_key: str,
+           where: str = "") -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+    """(bounds, values) of a list of slabs.
+
+    ``up_to`` slabs give every slab but the last an upper bound; ``from``
+    slabs give every slab but the first a lower bound. Bounds must increase.
+    """
+    slabs = data.get(key)
+    where = f"{where}{key}"
+    if not isinstance(slabs, list) or not slabs:
+        raise RatePolicyError(f"{where}: must be a non-empty list")
+    open_slab = len(slabs) - 1 if bound_key == "up_to" else 0
+    bounds: List[float] = []
+    values: List[float] = []
+    for i, slab in enumerate(slabs):
+        if not isinstance(slab, dict) or set(slab) - {bound_key, value_key}:
+            raise RatePolicyError(f"{where}[{i}]: must be an object with {bound_key!r} and {value_key!r}")
+        values.append(_number(slab, value_key, f"{where}[{i}]."))
+        if i == open_slab:
+            if bound_key in slab:
+                side = "last" if bound_key == "up_to" else "first"
+                raise RatePolicyError(f"{where}[{i}]: the {side} slab is open-ended, remove {bound_key!r}")
+            continue
+        bound = _number(slab, bound_key, f"{where}[{i}].")
+        if bounds and bound <= bounds[-1]:
+            raise RatePolicyError(f"{where}[{i}].{bound_key}: bounds must increase")
+        bounds.append(bound)
+    return tuple(bounds), tuple(values)
+
+
+class RatePolicyStore:
+    """The rate policy in force, reloaded from ``path`` when the file changes (see module docstring)"""
+
+    def __init__(self, path: str = RATE_POLICY_PATH, poll_seconds: float = RATE_POLICY_POLL_SECONDS):
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self._reload_lock = threading.Lock()
+        self._signature = self._stat()
+        self._checked = time.monotonic()
+        if self._signature is None:
+            logger.warning(f"No rate policy at {path}, using the built-in policy")
+            self._policy = RatePolicy.from_dict(DEFAULT_RATE_POLICY)
+        else:
+            # A broken file at startup is a deployment error: fail instead of quoting the wrong rates
+            self._policy = RatePolicy.load(path)
+            logger.info(f"Loaded rate policy {self._policy.version} from {path}")
+
+    @property
+    def current(self) -> RatePolicy:
+        """The policy to price with; take it once per quote so every number comes from one version."""
+        if time.monotonic() - self._checked >= self.poll_seconds:
+            self.reload()
+        return self._policy
+
+    def reload(self) -> bool:
+        """Swap in the file's policy if the file changed and validates; True when a new policy was loaded."""
+        # Whoever gets here first checks; everyone else keeps pricing with the current policy
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            self._checked = time.monotonic()
+            signature = self._stat()
+            if signature is None or signature == self._signature:
+                return False
+            self._signature = signature
+            try:
+                policy = RatePolicy.load(self.path)
+            except (OSError, RatePolicyError) as e:
+                POLICY_RELOADS.inc(outcome="rejected")
+                logger.error(f"Ignoring rate policy {self.path}, keeping {self._policy.version}: {e}")
+                return False
+            previous, self._policy = self._policy, policy
+            POLICY_RELOADS.inc(outcome="loaded")
+            logger.info(f"Rate policy {previous.version} -> {policy.version}")
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+_stores: Dict[str, RatePolicyStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_rate_policy_store(path: str = RATE_POLICY_PATH) -> RatePolicyStore:
+    """The process-wide store for ``path``, shared by every RateCalculator."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = RatePolicyStore(path)
+        return store
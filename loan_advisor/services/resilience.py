@@ -0,0 +1,130 @@
+"""Latency tracking, request hedging and circuit breaking for provider calls"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the provider while the breaker is open"""
+
+
+class CallTimeoutError(RuntimeError):
+    """Raised when a provider call overruns its timeout or the turn deadline"""
+
+
+class QueueTimeoutError(RuntimeError):
+    """Raised when a call is still waiting for the rate limiter at the turn deadline"""
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies with percentile lookup"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Return the ``p``-th percentile (0-100), or None until enough samples exist."""
+        if len(self._samples) < max(self.min_samples, 1):
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker
+
+    closed: calls flow normally. After ``failure_threshold`` consecutive
+    failures the breaker opens and rejects calls for ``reset_timeout``
+    seconds, then lets a single probe through (half-open); the probe's
+    outcome closes or re-opens it. A probe that ends without reaching the
+    provider (cancelled, or never admitted) is handed back with
+    ``release_probe`` so the next call can probe instead.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.rejections = 0
+        self.times_opened = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.failure_threshold <= 0 or self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.rejections += 1
+        return False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def release_probe(self):
+        """Let another call probe; the abandoned one counts as neither success nor failure."""
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or (
+            self.failure_threshold > 0 and self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejections": self.rejections,
+        }
+
+
+async def hedged(factory: Callable[[], Awaitable[Any]], hedge_after: float,
+                 on_hedge: Optional[Callable[[], None]] = None) -> Any:
+    """Run ``factory()``; if it has not finished after ``hedge_after`` seconds,
+    start a second attempt and return whichever succeeds first. The loser is
+    cancelled. Raises the last error only if every attempt fails.
+    """
+    tasks = {asyncio.ensure_future(factory())}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            if on_hedge:
+                on_hedge()
+            tasks.add(asyncio.ensure_future(factory()))
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
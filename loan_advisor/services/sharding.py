@@ -0,0 +1,73 @@
+"""Application-id sharding across orchestrator worker processes
+
+In sharded mode (``SHARD_COUNT`` > 1, see ``sharded_app.py``) a front
+process owns no sessions: it consistent-hashes each ``application_id`` onto
+one of ``SHARD_COUNT`` workers, each a normal ``app:app`` with its own
+event loop, orchestrator, application store and caches. Every turn of an
+application therefore lands on the same process (session affinity, warm
+caches, no cross-process locking), and CPU-heavy turns only compete with
+the sessions of their own shard.
+
+New applications have no id to hash yet. The front picks a worker by
+``customer_id`` and the worker mints an id that hashes back onto itself
+(``new_application_id``), so the id alone is enough to route every later
+request.
+"""
+import bisect
+import hashlib
+import os
+import uuid
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Number of worker processes; 0 or 1 disables sharding
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", 0))
+# Set by the front for each worker it starts
+SHARD_INDEX = os.getenv("SHARD_INDEX")
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", 128))
+
+
+def _point(value: str) -> int:
+    # md5 rather than hash(): identical in the front and every worker
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hashing of keys onto ``shards`` numbered 0..shards-1
+
+    Each shard owns ``vnodes`` points on the ring, which keeps the load even
+    and means that resizing from N to N+1 shards moves only about 1/(N+1)
+    of the keys.
+    """
+
+    def __init__(self, shards: int, vnodes: int = SHARD_VNODES):
+        self.shards = max(shards, 1)
+        points = sorted((_point(f"shard-{shard}#{i}"), shard)
+                        for shard in range(self.shards) for i in range(max(vnodes, 1)))
+        self._points: List[int] = [point for point, _ in points]
+        self._owners: List[int] = [shard for _, shard in points]
+
+    def shard_for(self, key: str) -> int:
+        index = bisect.bisect(self._points, _point(key)) % len(self._points)
+        return self._owners[index]
+
+
+def new_application_id(ring: Optional[HashRing] = None, shard: Optional[int] = None) -> str:
+    """A fresh application id; owned by ``shard`` on ``ring`` when both are given."""
+    if ring is None or shard is None or ring.shards == 1:
+        return str(uuid.uuid4())
+    while True:
+        # Expected ``shards`` attempts; each is one uuid and one md5
+        app_id = str(uuid.uuid4())
+        if ring.shard_for(app_id) == shard:
+            return app_id
+
+
+def worker_shard() -> Optional[int]:
+    """This process's shard when it runs as a sharded worker, else ``None``."""
+    if SHARD_COUNT > 1 and SHARD_INDEX is not None:
+        return int(SHARD_INDEX)
+    return None
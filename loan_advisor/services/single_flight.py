@@ -0,0 +1,59 @@
+"""Single-flight coalescing of identical concurrent async calls"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class CoalescedCallCancelled(RuntimeError):
+    """Raised to followers when the leader of their shared call is cancelled"""
+
+
+class SingleFlight:
+    """Share one in-flight call among all concurrent callers using the same key
+
+    The first caller for a key runs the work; callers arriving while it is
+    still running await the same result (or exception) instead of issuing a
+    duplicate request. Nothing is remembered once the call completes.
+    If the leader is cancelled (client gone, speculation discarded), its
+    followers get ``CoalescedCallCancelled`` instead of being cancelled too.
+    A follower can give up after its own ``timeout`` (``asyncio.TimeoutError``)
+    without affecting the shared call.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # Shield so one follower cancelling or timing out does not cancel the shared call
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark the exception as retrieved even when nobody else was waiting
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._calls[key] = future
+        self.leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            # Followers get an ordinary error (and fall back) rather than
+            # being cancelled along with the leader's request
+            future.set_exception(CoalescedCallCancelled("coalesced call was cancelled"))
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._calls), "leaders": self.leaders, "coalesced": self.coalesced}
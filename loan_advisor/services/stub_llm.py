@@ -0,0 +1,146 @@
+"""Deterministic local chat model for offline load and latency testing
+
+Selected with ``LLM_BACKEND=stub``. It plugs into the same
+``prompt | client`` chains as ChatGroq, so the whole
+orchestrator runs unchanged without a GROQ_API_KEY. Responses are
+templated per agent, latency is synthetic and errors are injected from a
+seeded RNG, so two runs with the same settings behave identically.
+"""
+import asyncio
+import json
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+# Matched against the first line of the system prompt; templates may use {customer_name},
+# {status}, {loan_amount} and {recipient_email}.
+DEFAULT_STUB_RESPONSES: Dict[str, str] = {
+    "email assistant": json.dumps({
+        "recipient_email": "{recipient_email}",
+        "subject": "Your SYNFIN Loan Update",
+        "body": "<p>Dear customer,</p><p>Your SYNFIN loan application has been updated.</p>"
+                "<p>This is an automated email from SYNFIN. Please do not reply to this email.</p>",
+    }),
+    "Master Agent": "Hello {customer_name}! Welcome to SYNFIN. Personal loans start at competitive rates from 10.5% p.a. How can I help you today?",
+    "Sales Agent": "Let's find the right plan for you. Please share your loan amount and preferred tenure (12-60 months).",
+    "Verification Agent": "SYNFIN verification requires your PAN and Aadhar details.",
+    "Underwriting Agent": "SYNFIN is checking your credit profile for pre-approval.",
+    "Eligibility Agent": "SYNFIN is reviewing your eligibility based on the provided information.",
+    "PDF Agent": "Generating your SYNFIN loan sanction letter.",
+}
+DEFAULT_STUB_RESPONSE = "How can I assist you today?"
+
+
+class StubLLMError(RuntimeError):
+    """Synthetic provider failure raised by error injection"""
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model returning templated responses after a synthetic delay"""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+    responses: Dict[str, str] = {}
+    tokens_per_chunk: int = 4
+    calls: int = 0
+
+    _rng: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+        if not self.responses:
+            self.responses = dict(DEFAULT_STUB_RESPONSES)
+
+    @property
+    def _llm_type(self) -> str:
+        return "synfin-stub"
+
+    # --- response synthesis ---
+    def _render(self, messages: List[BaseMessage]) -> str:
+        text = "\n".join(str(m.content) for m in messages)
+        system = next((str(m.content) for m in messages if m.type == "system"), text)
+        header = next((line for line in system.splitlines() if line.strip()), "")
+        template = next((t for key, t in self.responses.items() if key in header), DEFAULT_STUB_RESPONSE)
+        values = {
+            "customer_name": self._field(text, r"Customer:\s*(.+)") or "there",
+            "status": self._field(text, r"Loan Status:\s*(.+)") or "initiated",
+            "loan_amount": self._field(text, r"Loan Amount:\s*(.+)") or "Not specified",
+            "recipient_email": self._field(text, r'"recipient_email":\s*"([^"]+)"') or "",
+        }
+        if values["customer_name"] == "None":
+            values["customer_name"] = "there"
+        for key, value in values.items():
+            template = template.replace("{" + key + "}", value)
+        return template
+
+    @staticmethod
+    def _field(text: str, pattern: str) -> Optional[str]:
+        match = re.search(pattern, text)
+        return match.group(1).strip() if match else None
+
+    def _next_delay_and_error(self) -> tuple[float, bool]:
+        self.calls += 1
+        jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        fail = self._rng.random() < self.error_rate
+        return max(0.0, self.latency_ms + jitter) / 1000.0, fail
+
+    def _message(self, messages: List[BaseMessage]) -> AIMessage:
+        text = self._render(messages)
+        # Rough provider-style usage so token metrics have something to report
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4 + 1
+        completion_tokens = len(text) // 4 + 1
+        return AIMessage(content=text, usage_metadata={
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        })
+
+    def _chunks(self, text: str) -> List[str]:
+        words = re.split(r"(\s+)", text)
+        size = max(1, self.tokens_per_chunk)
+        return ["".join(words[i:i + size]) for i in range(0, len(words), size)]
+
+    # --- BaseChatModel hooks ---
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        delay, fail = self._next_delay_and_error()
+        time.sleep(delay)
+        if fail:
+            raise StubLLMError("Injected stub LLM failure")
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        delay, fail = self._next_delay_and_error()
+        await asyncio.sleep(delay)
+        if fail:
+            raise StubLLMError("Injected stub LLM failure")
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        result = self._generate(messages, stop, run_manager, **kwargs)
+        for chunk in self._chunks(str(result.generations[0].message.content)):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        delay, fail = self._next_delay_and_error()
+        chunks = self._chunks(self._render(messages))
+        # Spread the synthetic latency across the stream: half before the first token
+        await asyncio.sleep(delay / 2)
+        if fail:
+            raise StubLLMError("Injected stub LLM failure")
+        per_chunk = (delay / 2) / max(len(chunks), 1)
+        for chunk in chunks:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+            if per_chunk:
+                await asyncio.sleep(per_chunk)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the message extraction engine (services/extraction.py).
+
+Usage:
+  python3 scripts/bench_extraction.py [--iterations N]
+
+Reports the per-message cost of parsing every field (cold, as for a new
+message), of the fields the orchestrator reads on a typical turn, of the
+keyword intent scan, and of a repeat lookup that hits the per-message
+cache (what each agent pays after the orchestrator has parsed the same
+message).
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'loan_advisor')))
+from services.extraction import ExtractedFields, FIELDS, extract
+from services.intents import detect_intents
+
+MESSAGES = [
+    "Hello",
+    "My name is Ravi",
+    "ravi@example.com",
+    "I need 3 lakh loan",
+    "24 months",
+    "36 months or 4 years? not sure",
+    "proceed for KYC, my PAN is ABCDE1234F",
+    "my aadhar is 123456789012",
+    "My monthly salary is 60,000",
+    "reduce amount to 250000 and increase tenure to 60 months",
+]
+TURN_FIELDS = ("name", "loan_amount", "tenure_months", "pan", "aadhar", "email", "salary")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark message field extraction")
+    parser.add_argument("--iterations", type=int, default=20000)
+    return parser.parse_args()
+
+
+def bench(label, fn, iterations):
+    started = time.perf_counter()
+    for i in range(iterations):
+        fn(MESSAGES[i % len(MESSAGES)])
+    per_message = (time.perf_counter() - started) / iterations
+    print(f"{label:<28} {per_message * 1e6:8.2f} µs/message")
+
+
+def all_fields(message):
+    fields = ExtractedFields(message)
+    for name in FIELDS:
+        getattr(fields, name)
+
+
+def turn_fields(message):
+    fields = ExtractedFields(message)
+    for name in TURN_FIELDS:
+        getattr(fields, name)
+
+
+def intents(message):
+    detect_intents(message.lower())
+
+
+def cached_lookup(message):
+    extract(message).tenure_months
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(f"{len(MESSAGES)} sample messages, {args.iterations} iterations")
+    bench("all fields (cold)", all_fields, args.iterations)
+    bench("orchestrator turn (cold)", turn_fields, args.iterations)
+    bench("intents (cold)", intents, args.iterations)
+    bench("agent re-read (cached)", cached_lookup, args.iterations)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Offline throughput/latency benchmark for LoanOrchestrator.
+
+Usage:
+  python3 scripts/bench_orchestrator.py [--sessions N] [--concurrency C]
+                                        [--latency-ms MS] [--error-rate R] [--no-cache]
+
+Runs N scripted conversations (greeting -> KYC) through the orchestrator on
+the deterministic stub LLM backend (LLM_BACKEND=stub), so no GROQ_API_KEY or
+network is needed. Reports turns/sec and per-turn latency percentiles; run
+with --latency-ms 0 to see pure orchestrator overhead.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+CONVERSATION = [
+    "Hello",
+    "My name is Ravi",
+    "ravi@example.com",
+    "I need 3 lakh loan",
+    "24 months",
+    "proceed for KYC, my PAN is ABCDE1234F",
+    "my aadhar is 123456789012",
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark LoanOrchestrator on the stub LLM backend")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Synthetic LLM latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of LLM calls that fail")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the LLM response cache")
+    return parser.parse_args()
+
+
+def configure_env(args):
+    # Must happen before the services read their configuration at import time
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["LLM_STUB_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["LLM_STUB_JITTER_MS"] = str(args.jitter_ms)
+    os.environ["LLM_STUB_ERROR_RATE"] = str(args.error_rate)
+    os.environ.setdefault("LLM_RPM", "0")
+    os.environ.setdefault("LLM_TPM", "0")
+    os.environ.setdefault("API_ENDPOINT", "http://localhost")
+    if args.no_cache:
+        os.environ["LLM_CACHE_ENABLED"] = "false"
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] if ordered else 0.0
+
+
+async def run(args):
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from loan_advisor.services.loan_orchestrator import LoanOrchestrator
+
+    orchestrator = LoanOrchestrator()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def session(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            result = await orchestrator.start_application(f"BENCH{i:05d}", CONVERSATION[0])
+            latencies.append(time.perf_counter() - started)
+            app_id = result["application_id"]
+            for message in CONVERSATION[1:]:
+                started = time.perf_counter()
+                await orchestrator.process_message(app_id, message)
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(session(i) for i in range(args.sessions)))
+    elapsed = time.perf_counter() - started
+    await orchestrator.shutdown()
+
+    turns = len(latencies)
+    print(f"sessions={args.sessions} concurrency={args.concurrency} "
+          f"llm_latency={args.latency_ms}ms error_rate={args.error_rate} cache={'off' if args.no_cache else 'on'}")
+    print(f"turns: {turns} in {elapsed:.2f}s -> {turns / elapsed:.1f} turns/s")
+    print("turn latency ms: " + " ".join(
+        f"p{p}={percentile(latencies, p) * 1000:.1f}" for p in (50, 90, 99)
+    ) + f" max={max(latencies) * 1000:.1f}")
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    configure_env(arguments)
+    asyncio.run(run(arguments))
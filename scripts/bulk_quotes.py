@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Quote rate and EMI for every row of a lead list (services/bulk_quotes.py).
+
+Usage:
+  python3 scripts/bulk_quotes.py leads.csv > quotes.ndjson
+  python3 scripts/bulk_quotes.py --format jsonl -o quotes.ndjson < leads.jsonl
+
+Input is JSON lines or CSV with a header row (the format follows the file
+extension, --format overrides it; stdin is read as JSON lines by default),
+with loan_amount (or amount), tenure_months (or tenure) and optional
+credit_score and id. Writes one NDJSON line per input row, in order: the
+quote, or {"line", "error"} for a row that cannot be quoted. Rates come
+from the rate policy at RATE_POLICY_PATH. A summary goes to stderr.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'loan_advisor')))
+from services.bulk_quotes import BULK_QUOTE_CHUNK_ROWS, FORMATS, BulkQuoter
+from services.rate_calculator import RateCalculator
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Quote rate and EMI for every row of a JSONL or CSV file")
+    parser.add_argument("input", nargs="?", help="JSONL or CSV file (default: stdin)")
+    parser.add_argument("-o", "--output", help="NDJSON output file (default: stdout)")
+    parser.add_argument("--format", choices=FORMATS, help="Input format (default: from the file extension)")
+    parser.add_argument("--chunk-rows", type=int, default=BULK_QUOTE_CHUNK_ROWS, help="Rows priced per batch")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    fmt = args.format or ("csv" if args.input and args.input.lower().endswith(".csv") else "jsonl")
+    source = open(args.input, encoding="utf-8", newline="") if args.input else sys.stdin
+    sink = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    quoter = BulkQuoter(RateCalculator().policy, fmt, args.chunk_rows)
+
+    started = time.perf_counter()
+    try:
+        for block in quoter.quote_lines(source):
+            sink.write(block)
+    finally:
+        if args.input:
+            source.close()
+        if args.output:
+            sink.close()
+    elapsed = time.perf_counter() - started
+    rows = quoter.quoted + quoter.failed
+    print(f"Quoted {quoter.quoted} of {rows} rows ({quoter.failed} invalid) with rate policy "
+          f"{quoter.policy.version} in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)", file=sys.stderr)
+    if quoter.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
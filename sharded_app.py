@@ -0,0 +1,296 @@
+"""Sharded deployment: a routing front for N orchestrator worker processes
+
+    SHARD_COUNT=4 uvicorn sharded_app:app --host 0.0.0.0 --port 8000
+
+On startup the front launches ``SHARD_COUNT`` (default: one per CPU)
+workers, each running ``app:app`` on ``SHARD_HOST:SHARD_BASE_PORT + i``,
+and forwards every request to the worker owning its ``application_id``
+(see services/sharding.py). The front holds no sessions and does no model
+work, so one front process keeps up with many workers. Workers that exit
+are restarted; with the default in-memory store the sessions they held in
+memory are lost (those spilled to disk come back), with ``APP_STORE=sqlite``
+they are all picked up again from the database.
+
+Prometheus should scrape each worker (``/shards/{i}/metrics`` or the
+worker port directly): every worker keeps its own metrics.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from typing import Any, AsyncIterable, Dict, List, Optional, Union
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from loan_advisor.services.sharding import SHARD_COUNT, HashRing
+from loan_advisor.services.batching import CHAT_BATCH_MAX_ITEMS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SHARD_HOST = os.getenv("SHARD_HOST", "127.0.0.1")
+SHARD_BASE_PORT = int(os.getenv("SHARD_BASE_PORT", 8100))
+SHARD_START_TIMEOUT_SECONDS = float(os.getenv("SHARD_START_TIMEOUT_SECONDS", 60))
+SHARD_REQUEST_TIMEOUT_SECONDS = float(os.getenv("SHARD_REQUEST_TIMEOUT_SECONDS", 120))
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Each worker's memory store spills into its own subdirectory and re-indexes only that one on restart
+SESSION_SPILL_DIR = os.getenv("SESSION_SPILL_DIR", os.path.join(ROOT, "data", "sessions"))
+SESSION_SPILL_DIR = os.path.abspath(SESSION_SPILL_DIR) if SESSION_SPILL_DIR else ""
+# Not forwarded between front and worker in either direction
+HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-length", "content-encoding", "host"}
+
+
+def _headers(headers) -> Dict[str, str]:
+    return {k: v for k, v in headers.items() if k.lower() not in HOP_HEADERS}
+
+
+class ShardWorker:
+    """One ``app:app`` worker process and a pooled client to it"""
+
+    def __init__(self, index: int, shards: int):
+        self.index = index
+        self.shards = shards
+        self.port = SHARD_BASE_PORT + index
+        self.process: Optional[subprocess.Popen] = None
+        self.restarts = 0
+        self.client = httpx.AsyncClient(base_url=f"http://{SHARD_HOST}:{self.port}",
+                                        timeout=SHARD_REQUEST_TIMEOUT_SECONDS)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        env = {**os.environ, "SHARD_INDEX": str(self.index), "SHARD_COUNT": str(self.shards)}
+        if SESSION_SPILL_DIR:
+            env["SESSION_SPILL_DIR"] = os.path.join(SESSION_SPILL_DIR, f"shard-{self.index}")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app:app", "--host", SHARD_HOST, "--port", str(self.port)],
+            cwd=ROOT, env=env,
+        )
+        logger.info(f"Started shard {self.index} (pid {self.process.pid}) on port {self.port}")
+
+    async def wait_ready(self, timeout: float = SHARD_START_TIMEOUT_SECONDS):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.alive:
+                raise RuntimeError(f"Shard {self.index} exited during startup")
+            try:
+                if (await self.client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+        raise RuntimeError(f"Shard {self.index} not ready after {timeout:.0f}s")
+
+    async def stop(self):
+        if self.alive:
+            self.process.terminate()
+            try:
+                await asyncio.to_thread(self.process.wait, 10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        await self.client.aclose()
+
+
+class ShardRouter:
+    """Routes requests to the worker owning their application"""
+
+    def __init__(self, shards: int):
+        self.ring = HashRing(shards)
+        self.workers: List[ShardWorker] = [ShardWorker(i, self.ring.shards) for i in range(self.ring.shards)]
+        self._monitor: Optional[asyncio.Task] = None
+        self._turns = itertools.cycle(self.workers)
+
+    async def start(self):
+        for worker in self.workers:
+            worker.start()
+        await asyncio.gather(*(worker.wait_ready() for worker in self.workers))
+        self._monitor = asyncio.create_task(self._restart_dead_workers())
+
+    async def stop(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
+
+    def worker_for(self, application_id: Optional[str], customer_id: Optional[str] = None) -> ShardWorker:
+        """Owner of ``application_id``; new applications go where their customer id hashes to."""
+        return self.workers[self.ring.shard_for(application_id or customer_id or "")]
+
+    def next_worker(self) -> ShardWorker:
+        """Workers in turn, for stateless requests."""
+        return next(self._turns)
+
+    async def forward(self, worker: ShardWorker, request: Request, body: bytes) -> Response:
+        try:
+            upstream = await worker.client.request(
+                request.method, request.url.path, params=request.query_params,
+                content=body, headers=_headers(request.headers),
+            )
+        except httpx.TransportError as e:
+            raise HTTPException(status_code=503, detail=f"Shard {worker.index} unavailable: {e}")
+        return Response(content=upstream.content, status_code=upstream.status_code, headers=_headers(upstream.headers))
+
+    async def stream(self, worker: ShardWorker, request: Request,
+                     body: Union[bytes, AsyncIterable[bytes]]) -> StreamingResponse:
+        upstream_request = worker.client.build_request(
+            request.method, request.url.path, params=request.query_params,
+            content=body, headers=_headers(request.headers)
+        )
+        try:
+            upstream = await worker.client.send(upstream_request, stream=True)
+        except httpx.TransportError as e:
+            raise HTTPException(status_code=503, detail=f"Shard {worker.index} unavailable: {e}")
+
+        async def relay():
+            try:
+                async for chunk in upstream.aiter_raw():
+                    yield chunk
+            finally:
+                await upstream.aclose()
+
+        return StreamingResponse(relay(), status_code=upstream.status_code, headers=_headers(upstream.headers))
+
+    async def _restart_dead_workers(self):
+        while True:
+            await asyncio.sleep(1)
+            for worker in self.workers:
+                if not worker.alive:
+                    logger.error(f"Shard {worker.index} exited with code {worker.process.returncode}, restarting")
+                    worker.restarts += 1
+                    worker.start()
+
+
+app = FastAPI(title="AI Loan Processing API (sharded)", version="1.0.0")
+router = ShardRouter(SHARD_COUNT or os.cpu_count() or 1)
+
+
+@app.on_event("startup")
+async def startup_event():
+    await router.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await router.stop()
+
+
+def _json(body: bytes) -> Dict[str, Any]:
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Request body must be JSON")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=422, detail="Request body must be a JSON object")
+    return data
+
+
+@app.post("/chat")
+async def chat(request: Request):
+    body = await request.body()
+    data = _json(body)
+    return await router.forward(router.worker_for(data.get("application_id"), data.get("customer_id")), request, body)
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: Request):
+    body = await request.body()
+    data = _json(body)
+    return await router.stream(router.worker_for(data.get("application_id"), data.get("customer_id")), request, body)
+
+
+@app.post("/chat/batch")
+async def chat_batch(request: Request):
+    """Split the batch by owning worker, run the parts concurrently, merge the results in item order."""
+    items = _json(await request.body()).get("items")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=422, detail="items must be a list")
+    if len(items) > CHAT_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {CHAT_BATCH_MAX_ITEMS} items per batch")
+
+    parts: Dict[int, List[int]] = {}
+    for index, item in enumerate(items):
+        item = item if isinstance(item, dict) else {}
+        worker = router.worker_for(item.get("application_id"), item.get("customer_id"))
+        parts.setdefault(worker.index, []).append(index)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+
+    async def run_part(shard: int, indexes: List[int]):
+        worker = router.workers[shard]
+        try:
+            upstream = await worker.client.post("/chat/batch", json={"items": [items[i] for i in indexes]})
+            if upstream.status_code != 200:
+                error = {"status_code": upstream.status_code, "detail": upstream.text}
+            else:
+                for result in upstream.json()["results"]:
+                    result["index"] = indexes[result["index"]]
+                    results[result["index"]] = result
+                return
+        except httpx.TransportError as e:
+            error = {"status_code": 503, "detail": f"Shard {shard} unavailable: {e}"}
+        for i in indexes:
+            results[i] = {"index": i, "response": None, "error": error}
+
+    await asyncio.gather(*(run_part(shard, indexes) for shard, indexes in parts.items()))
+    return {"results": results}
+
+
+@app.post("/quotes/bulk")
+async def quotes_bulk(request: Request):
+    """Stateless: handed to the workers in turn, streamed through in both directions."""
+    return await router.stream(router.next_worker(), request, request.stream())
+
+
+@app.get("/application/{app_id}")
+async def get_application(app_id: str, request: Request):
+    return await router.forward(router.worker_for(app_id), request, b"")
+
+
+@app.get("/sanction-letter/{app_id}")
+async def download_sanction_letter(app_id: str, request: Request):
+    return await router.forward(router.worker_for(app_id), request, b"")
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, request: Request):
+    """Job ids do not name their shard: ask every worker, answer with the one that has it."""
+    responses = await asyncio.gather(*(router.forward(worker, request, b"") for worker in router.workers),
+                                     return_exceptions=True)
+    for response in responses:
+        if isinstance(response, Response) and response.status_code != 404:
+            return response
+    raise HTTPException(status_code=404, detail="Job not found")
+
+
+@app.get("/health")
+async def health_check():
+    shards = [{"shard": w.index, "port": w.port, "alive": w.alive, "restarts": w.restarts} for w in router.workers]
+    healthy = all(shard["alive"] for shard in shards)
+    return {"status": "healthy" if healthy else "degraded", "service": "AI Loan Processing API", "shards": shards}
+
+
+@app.get("/shards/{index}/metrics")
+async def shard_metrics(index: int, request: Request):
+    if not 0 <= index < len(router.workers):
+        raise HTTPException(status_code=404, detail="Unknown shard")
+    worker = router.workers[index]
+    try:
+        upstream = await worker.client.get("/metrics")
+    except httpx.TransportError as e:
+        raise HTTPException(status_code=503, detail=f"Shard {index} unavailable: {e}")
+    return Response(content=upstream.content, status_code=upstream.status_code, headers=_headers(upstream.headers))
+
+
+@app.api_route("/{path:path}", methods=["GET", "POST"])
+async def passthrough(path: str, request: Request):
+    """Endpoints not tied to an application (``/``, test helpers) are served by shard 0."""
+    return await router.forward(router.workers[0], request, await request.body())
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import sys
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("API_ENDPOINT", "http://localhost")
+os.environ.setdefault("JOURNAL_ENABLED", "false")
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(tempfile.mkdtemp(), "jobs.db"))
+from loan_advisor.services.loan_orchestrator import LoanOrchestrator
+from services.application_delta import ChangeLog, diff
+from models.loan_models import AgentResponse
+
+
+class _EchoMaster:
+    name = "Master"
+
+    async def process(self, application, message):
+        application.customer.phone = message
+        return AgentResponse(agent_name=self.name, message="ok")
+
+
+def test_diff_reports_leaf_paths():
+    before = {"loan_amount": None, "customer": {"name": None, "salary": 1}}
+    after = {"loan_amount": 5, "customer": {"name": "Ravi", "salary": 1}}
+    assert diff(before, after) == ["loan_amount", "customer.name"]
+    assert diff({}, {"customer": {"name": None}}) == ["customer.name"]
+
+
+def test_changelog_deltas_and_gaps():
+    log = ChangeLog()
+    log.record("A", None, 1, {"x": 1, "c": {"y": 1}})
+    log.record("A", 1, 2, {"x": 2, "c": {"y": 1}})
+    log.record("A", 2, 3, {"x": 2, "c": {"y": 3}})
+    assert log.delta("A", 1, 3) == {"x": 2, "c": {"y": 3}}
+    assert log.delta("A", 2, 3) == {"c": {"y": 3}}
+    assert log.delta("A", 3, 3) == {}
+    assert log.delta("A", 0, 3) == {"x": 2, "c": {"y": 3}}
+    # Version 4 was written by another worker: nothing older than 5 is known any more
+    log.record("A", 4, 5, {"x": 9, "c": {"y": 3}})
+    assert log.delta("A", 3, 5) is None and log.delta("A", 5, 5) == {}
+    assert log.delta("A", 2, 6) is None  # stale history
+    bounded = ChangeLog(max_entries=1)
+    bounded.record("A", None, 1, {"x": 1})
+    bounded.record("B", None, 1, {"x": 1})
+    assert len(bounded) == 1 and bounded.delta("A", 0, 1) is None
+
+
+def test_orchestrator_serves_deltas():
+    orchestrator = LoanOrchestrator()
+    orchestrator.agents["master_agent"] = _EchoMaster()
+
+    async def run():
+        started = await orchestrator.start_application("DELTA", "1")
+        app_id = started["application_id"]
+        first = started["response"]["version"]
+        second = (await orchestrator.process_message(app_id, "2"))["version"]
+        return app_id, first, second
+
+    app_id, first, second = asyncio.run(run())
+    assert second == first + 1
+    assert orchestrator.application_data(app_id, first) == {
+        "version": second, "full": False, "changes": {"customer": {"phone": "2"}}
+    }
+    full = orchestrator.application_data(app_id)
+    assert full["full"] and full["version"] == second and full["changes"]["customer"]["phone"] == "2"
+    data, version = orchestrator.get_application_json(app_id)
+    assert version == second and '"phone":"2"' in data
+    assert orchestrator.application_data("missing", 1) is None
+
+
+if __name__ == "__main__":
+    test_diff_reports_leaf_paths()
+    test_changelog_deltas_and_gaps()
+    test_orchestrator_serves_deltas()
+    print("✅ Application delta tests passed")
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("API_ENDPOINT", "http://localhost")
+os.environ.setdefault("JOURNAL_ENABLED", "false")
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(tempfile.mkdtemp(), "jobs.db"))
+from loan_advisor.services.loan_orchestrator import LoanOrchestrator
+from services.striped_lock import StripedLock
+from models.loan_models import AgentResponse
+
+
+class _CountingMaster:
+    name = "Master"
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+
+    async def process(self, application, message):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.1)
+        self.active -= 1
+        application.customer.phone = (application.customer.phone or "") + message
+        return AgentResponse(agent_name=self.name, message=message)
+
+
+def test_turns_for_one_application_are_serialized():
+    orchestrator = LoanOrchestrator()
+    master = _CountingMaster()
+    orchestrator.agents["master_agent"] = master
+
+    async def run():
+        app_id = (await orchestrator.start_application("LOCK", "1"))["application_id"]
+        started = time.perf_counter()
+        results = await asyncio.gather(*(orchestrator.process_message(app_id, str(i)) for i in range(2, 5)))
+        return app_id, results, time.perf_counter() - started
+
+    app_id, results, elapsed = asyncio.run(run())
+    assert master.max_active == 1 and elapsed >= 0.3
+    assert all("error" not in r for r in results)  # no version conflicts: each turn saw the previous one
+    assert orchestrator.get_application(app_id).customer.phone == "1234"  # arrival order
+
+
+def test_different_applications_run_in_parallel():
+    orchestrator = LoanOrchestrator()
+    master = _CountingMaster()
+    orchestrator.agents["master_agent"] = master
+
+    async def run():
+        started = time.perf_counter()
+        await asyncio.gather(*(orchestrator.start_application(f"C{i}", "hi") for i in range(5)))
+        return time.perf_counter() - started
+
+    assert asyncio.run(run()) < 0.3
+    assert master.max_active > 1
+
+
+def test_stripes_are_stable_and_bounded():
+    locks = StripedLock(stripes=8)
+    assert locks.stripe("app-1") == StripedLock(stripes=8).stripe("app-1")
+    assert {locks.stripe(f"app-{i}") for i in range(1000)} == set(range(8))
+
+
+if __name__ == "__main__":
+    test_turns_for_one_application_are_serialized()
+    test_different_applications_run_in_parallel()
+    test_stripes_are_stable_and_bounded()
+    print("✅ Application locking tests passed")
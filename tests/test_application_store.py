@@ -0,0 +1,165 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'loan_advisor')))
+from services.application_store import InMemoryApplicationStore, SQLiteApplicationStore, VersionConflict
+from models.loan_models import LoanApplication, Customer, LoanStatus
+
+
+def _application(app_id="APP1"):
+    return LoanApplication(application_id=app_id, customer=Customer(customer_id="C1"))
+
+
+def _assert_conflict(fn):
+    try:
+        fn()
+    except VersionConflict:
+        return
+    raise AssertionError("expected VersionConflict")
+
+
+def test_memory_store_versions_and_private_copies():
+    store = InMemoryApplicationStore()
+    assert store.save(_application()) == 1
+    first, v1 = store.load("APP1")
+    second, _ = store.load("APP1")
+    first.loan_amount = 300000
+    assert second.loan_amount is None  # loads never share state
+    assert store.save(first, expected_version=v1) == 2
+    _assert_conflict(lambda: store.save(second, expected_version=v1))
+    assert store.get("APP1").loan_amount == 300000
+    assert store.conflicts == 1
+
+
+def test_memory_store_spills_and_rehydrates():
+    spill_dir = tempfile.mkdtemp()
+    store = InMemoryApplicationStore(max_entries=2, max_bytes=0, idle_ttl=0, spill_dir=spill_dir)
+    for i in range(3):
+        store.save(_application(f"APP{i}"))
+    assert store.stats()["hot"] == 2 and store.evictions == {"capacity": 1}
+    assert os.listdir(spill_dir) == ["APP0.json.z"] and len(store) == 3
+
+    application, version = store.load("APP0")  # rehydrates APP0, spills APP1
+    assert version == 1 and store.rehydrations == 1
+    application.loan_amount = 200000
+    assert store.save(application, expected_version=version) == 2
+    assert sorted(os.listdir(spill_dir)) == ["APP1.json.z"]
+    assert store.version("APP1") == 1 and store.get("APP0").loan_amount == 200000
+
+
+def test_memory_store_idle_and_byte_limits():
+    store = InMemoryApplicationStore(max_entries=0, max_bytes=0, idle_ttl=0.01, spill_dir=tempfile.mkdtemp())
+    store.save(_application("OLD"))
+    time.sleep(0.02)
+    store.save(_application("NEW"))
+    assert store.evictions == {"idle": 1} and store.stats()["hot"] == 1
+
+    store = InMemoryApplicationStore(max_entries=0, max_bytes=1, idle_ttl=0, spill_dir=tempfile.mkdtemp())
+    store.save(_application("A"))
+    store.save(_application("B"))
+    assert store.evictions == {"bytes": 1} and store.stats()["hot"] == 1  # the newest entry always stays hot
+
+
+def test_memory_store_spills_off_the_event_loop_and_reindexes_on_restart():
+    spill_dir = tempfile.mkdtemp()
+    store = InMemoryApplicationStore(max_entries=1, max_bytes=0, idle_ttl=0, spill_dir=spill_dir)
+
+    async def spill():
+        store.save(_application("APP0"))
+        store.save(_application("APP1"))  # Spills APP0 in the background
+        assert store.get("APP0") is not None and store.rehydrations == 1  # Readable before the file lands
+        store.save(_application("APP2"))
+        await store.flush()
+
+    asyncio.run(spill())
+    assert sorted(os.listdir(spill_dir)) == ["APP0.json.z", "APP1.json.z"]
+    open(os.path.join(spill_dir, "APP9.json.z.tmp"), "wb").close()  # A write cut short
+
+    restarted = InMemoryApplicationStore(max_entries=1, max_bytes=0, idle_ttl=0, spill_dir=spill_dir)
+    assert len(restarted) == 2 and restarted.stats()["spilled"] == 2 and restarted.version("APP1") == 1
+    assert "APP9.json.z.tmp" not in os.listdir(spill_dir)
+
+    async def rehydrate():
+        await restarted.prefetch("APP1")
+        assert restarted.stats()["hot"] == 1 and restarted.rehydrations == 1
+        application, version = restarted.load("APP1")
+        assert restarted.save(application, expected_version=version) == 2
+        assert restarted.load("APP7") is None
+        await restarted.close()
+
+    asyncio.run(rehydrate())
+    assert os.listdir(spill_dir) == ["APP0.json.z"] and len(restarted) == 2
+
+
+def test_memory_store_expires_spilled_terminal_applications():
+    spill_dir = tempfile.mkdtemp()
+    store = InMemoryApplicationStore(max_entries=1, max_bytes=0, idle_ttl=0, spill_dir=spill_dir,
+                                     terminal_retention=0.05)
+    done = _application("DONE")
+    done.status = LoanStatus.COMPLETED
+    store.save(done)
+    store.save(_application("OPEN"))  # Spills DONE with an expiry
+    store.save(_application("NEW"))  # Spills OPEN without one
+    assert sorted(os.listdir(spill_dir)) == ["DONE.json.z", "OPEN.json.z"]
+
+    # The expiry is kept in the file, so a restart still honours it
+    restarted = InMemoryApplicationStore(max_entries=1, max_bytes=0, idle_ttl=0, spill_dir=spill_dir,
+                                         terminal_retention=0.05)
+    time.sleep(0.1)
+    restarted.save(_application("LATER"))
+    assert restarted.version("DONE") is None and restarted.expired == 1
+    assert os.listdir(spill_dir) == ["OPEN.json.z"] and restarted.version("OPEN") == 1
+
+
+def test_sqlite_store_is_shared_between_workers_and_survives_restart():
+    path = os.path.join(tempfile.mkdtemp(), "apps.db")
+    worker_a, worker_b = SQLiteApplicationStore(path, 0), SQLiteApplicationStore(path, 0)
+    worker_a.save(_application())
+    application, version = worker_b.load("APP1")
+    application.status = LoanStatus.SALES_DISCUSSION
+    worker_b.save(application, expected_version=version)
+    stale, _ = worker_a.load("APP1")
+    _assert_conflict(lambda: worker_a.save(stale, expected_version=version))
+    asyncio.run(worker_a.close())
+    asyncio.run(worker_b.close())
+
+    reopened = SQLiteApplicationStore(path, 0)
+    assert reopened.load("APP1")[0].status == LoanStatus.SALES_DISCUSSION
+    assert reopened.version("APP1") == 2
+    asyncio.run(reopened.close())
+
+
+def test_sqlite_write_behind_batches_writes():
+    path = os.path.join(tempfile.mkdtemp(), "apps.db")
+
+    async def run():
+        store = SQLiteApplicationStore(path, write_behind_ms=10_000)
+        for i in range(5):
+            store.save(_application(f"APP{i}"))
+        application, version = store.load("APP0")
+        application.loan_amount = 500000
+        store.save(application, expected_version=version)
+        assert store.stats()["pending"] == 5 and len(store) == 5
+        await store.close()  # flushes the pending batch
+        return store
+
+    store = asyncio.run(run())
+    assert store.batches == 1 and store.rows_written == 5
+    reopened = SQLiteApplicationStore(path, 0)
+    assert len(reopened) == 5
+    assert reopened.load("APP0")[0].loan_amount == 500000 and reopened.version("APP0") == 2
+    asyncio.run(reopened.close())
+
+
+if __name__ == "__main__":
+    test_memory_store_versions_and_private_copies()
+    test_memory_store_spills_and_rehydrates()
+    test_memory_store_idle_and_byte_limits()
+    test_memory_store_spills_off_the_event_loop_and_reindexes_on_restart()
+    test_memory_store_expires_spilled_terminal_applications()
+    test_sqlite_store_is_shared_between_workers_and_survives_restart()
+    test_sqlite_write_behind_batches_writes()
+    print("✅ Application store tests passed")
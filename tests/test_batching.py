@@ -0,0 +1,50 @@
+import asyncio
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'loan_advisor')))
+from services.batching import run_batch
+
+
+def test_same_key_runs_in_order_and_keys_overlap():
+    events = []
+
+    async def handler(item):
+        key, n = item
+        events.append(("start", key, n))
+        await asyncio.sleep(0.01 if key == "a" else 0.005)
+        events.append(("end", key, n))
+        return f"{key}{n}"
+
+    items = [("a", 1), ("b", 1), ("a", 2), ("b", 2), ("a", 3)]
+    results = asyncio.run(run_batch(items, key=lambda item: item[0], handler=handler, concurrency=4))
+    assert results == ["a1", "b1", "a2", "b2", "a3"]
+    # Each turn finishes before the next one for the same key starts, in batch order
+    assert [(e[0], e[2]) for e in events if e[1] == "a"] == [(s, n) for n in (1, 2, 3) for s in ("start", "end")]
+    assert [(e[0], e[2]) for e in events if e[1] == "b"] == [(s, n) for n in (1, 2) for s in ("start", "end")]
+    assert events[:2] == [("start", "a", 1), ("start", "b", 1)]
+
+
+def test_concurrency_is_bounded_and_failures_stay_per_item():
+    active = 0
+    peak = 0
+
+    async def handler(n):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if n == 3:
+            raise ValueError("bad item")
+        return n
+
+    results = asyncio.run(run_batch(list(range(10)), key=lambda n: None, handler=handler, concurrency=3))
+    assert peak == 3
+    assert isinstance(results[3], ValueError)
+    assert [r for i, r in enumerate(results) if i != 3] == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+
+
+if __name__ == "__main__":
+    test_same_key_runs_in_order_and_keys_overlap()
+    test_concurrency_is_bounded_and_failures_stay_per_item()
+    print("✅ Batching tests passed")
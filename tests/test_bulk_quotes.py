@@ -0,0 +1,99 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'loan_advisor')))
+os.environ.setdefault("API_ENDPOINT", "http://localhost")
+os.environ.setdefault("JOURNAL_ENABLED", "false")
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(tempfile.mkdtemp(), "jobs.db"))
+from services import finance
+from services.bulk_quotes import BulkQuoter
+from services.rate_calculator import RateCalculator
+
+
+def _quotes(fmt, lines, chunk_rows=10000):
+    quoter = BulkQuoter(RateCalculator().policy, fmt, chunk_rows)
+    return [json.loads(line) for block in quoter.quote_lines(lines) for line in block.splitlines()]
+
+
+def test_bulk_quotes_match_one_at_a_time_quotes():
+    calculator = RateCalculator()
+    rng = random.Random(9)
+    rows = [{"id": f"L{i}", "loan_amount": rng.choice([rng.randrange(50000, 12000000, 1000), rng.uniform(1e4, 2e7)]),
+             "tenure_months": rng.randint(1, 360), "credit_score": rng.choice([None, rng.randint(300, 900)])}
+            for i in range(5000)]
+    quotes = _quotes("jsonl", [json.dumps(row) + "\n" for row in rows], chunk_rows=777)
+    assert [q["id"] for q in quotes] == [row["id"] for row in rows]
+    for row, quote in zip(rows, quotes):
+        rate = calculator.calculate_rate(row["loan_amount"], row["tenure_months"], row["credit_score"])
+        emi = finance.emi(row["loan_amount"], rate, row["tenure_months"], decimals=2)
+        assert (quote["interest_rate"], quote["emi"]) == (rate, emi)
+        assert quote["total_payable"] == round(emi * row["tenure_months"], 2)
+        assert quote["policy_version"] == calculator.policy.version
+
+
+def test_csv_rows_and_errors_come_back_in_order():
+    lines = [
+        "\ufeffId,Amount,Tenure,Credit_Score\n",
+        "L1,500000,36,760\n",
+        "L2,500000,36.5,\n",
+        "\n",
+        "L3,abc,12,\n",
+        "L4,100000,12,\n",
+        "L5,100000,12,950",
+    ]
+    quotes = _quotes("csv", lines, chunk_rows=2)
+    assert [q["line"] for q in quotes] == [2, 3, 5, 6, 7]
+    assert quotes[0] == {"line": 2, "id": "L1", "loan_amount": 500000.0, "tenure_months": 36, "credit_score": 760,
+                         "interest_rate": 11.0, "emi": 16369.36, "total_interest": 89296.96,
+                         "total_payable": 589296.96, "policy_version": quotes[0]["policy_version"]}
+    assert quotes[1]["error"].startswith("tenure_months") and quotes[2]["error"].startswith("loan_amount")
+    assert quotes[3]["credit_score"] is None and quotes[3]["interest_rate"] == 10.5
+    assert quotes[4] == {"line": 7, "id": "L5", "error": "credit_score: must be a whole number from 300 to 900"}
+
+    bad_json = _quotes("jsonl", ['{"amount": 1e5, "tenure": 12}\n', "[1]\n", '{"amount": 1}x\n', '{"amount": true, "tenure": 1}'])
+    assert bad_json[0]["emi"] == 8814.86
+    assert [q.get("error") for q in bad_json[1:]] == [
+        "each line must be a JSON object", "not valid JSON: Extra data", "loan_amount: must be a positive number up to 100000000"]
+
+
+def test_out_of_range_and_nan_values_get_error_lines():
+    lines = ['{"amount": 1e308, "tenure": 360}\n', '{"amount": 1e8, "tenure": 360, "credit_score": "nan"}\n',
+             '{"amount": 1e8, "tenure": 360, "credit_score": NaN}\n', '{"amount": "inf", "tenure": 12}\n',
+             '{"amount": 1e8, "tenure": 360}\n']
+    for quotes in (_quotes("jsonl", lines), _quotes("csv", ["amount,tenure,credit_score\n", "1e308,360,\n", "1e8,360,nan\n"])):
+        for quote in quotes:
+            json.dumps(quote, allow_nan=False)
+    quotes = _quotes("jsonl", lines)
+    assert [q.get("error", "").split(":")[0] for q in quotes] == ["loan_amount", "credit_score", "credit_score", "loan_amount", ""]
+    assert quotes[-1]["total_payable"] > 1e8
+
+
+def test_request_bodies_are_quoted_as_they_stream_in():
+    from loan_advisor.services.loan_orchestrator import LoanOrchestrator
+    orchestrator = LoanOrchestrator()
+    body = "".join(f'{{"id": "ü{i}", "amount": {100000 + i}, "tenure": 24}}\n' for i in range(2500)).encode()
+
+    async def pieces():
+        # Arbitrary cuts, mid-line and mid-character included; no newline at the end
+        for start in range(0, len(body), 997):
+            yield body[start:start + 997]
+        yield b'{"id": 7, "amount": 5e5, "tenure": 12}'
+
+    async def run():
+        return [block async for block in orchestrator.quote_bulk(pieces(), "jsonl")]
+
+    quotes = [json.loads(line) for block in asyncio.run(run()) for line in block.splitlines()]
+    assert [q["id"] for q in quotes] == [f"ü{i}" for i in range(2500)] + [7]
+    assert all("error" not in q for q in quotes)
+
+
+if __name__ == "__main__":
+    test_bulk_quotes_match_one_at_a_time_quotes()
+    test_csv_rows_and_errors_come_back_in_order()
+    test_out_of_range_and_nan_values_get_error_lines()
+    test_request_bodies_are_quoted_as_they_stream_in()
+    print("✅ Bulk quote tests passed")
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import sys
 import argparse
@@ -43,7 +44,7 @@ def test_instant_approval(to_email: str):
     # Sample Appwrite public URL (replace with actual URL from your Appwrite storage)
     sample_pdf_url = "https://fra.cloud.appwrite.io/v1/storage/buckets/6856b5e8002828b1fe22/files/7e7bece4-25b5-45af-9756-f6bf64333169/view?project=6856b323003243cb7206"
     
-    email_json_str = generate_email(to_email, approval_context)
+    email_json_str = asyncio.run(generate_email(to_email, approval_context))
     email_data = convert_string_to_json(email_json_str)
     
     if email_data:
@@ -85,7 +86,7 @@ def test_conditional_approval(to_email: str):
     
     sample_pdf_url = f"{os.getenv('API_ENDPOINT')}/storage/buckets/{os.getenv('BUCKET_ID')}/files/sample-file-id/view?project={os.getenv('PROJECT_ID')}"
     
-    email_json_str = generate_email(to_email, conditional_context)
+    email_json_str = asyncio.run(generate_email(to_email, conditional_context))
     email_data = convert_string_to_json(email_json_str)
     
     if email_data:
@@ -124,7 +125,7 @@ def test_rejection(to_email: str):
         "Make a higher down payment to reduce principal."
     )
     
-    email_json_str = generate_email(to_email, rejection_context)
+    email_json_str = asyncio.run(generate_email(to_email, rejection_context))
     email_data = convert_string_to_json(email_json_str)
     
     if email_data:
@@ -0,0 +1,109 @@
+import asyncio
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("API_ENDPOINT", "http://localhost")
+os.environ.setdefault("JOURNAL_ENABLED", "false")
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(tempfile.mkdtemp(), "jobs.db"))
+from loan_advisor.services.loan_orchestrator import LoanOrchestrator
+from services.event_journal import EventJournal, history, replay
+from models.loan_models import AgentResponse
+
+
+def _turns(journal, app_id, count):
+    state = {"application_id": app_id, "loan_amount": None, "customer": {"name": None}}
+    journal.record_created(app_id, 1, dict(state, customer={"name": None}))
+    for version in range(2, count + 2):
+        state = dict(state, loan_amount=version * 1000, customer={"name": f"v{version}"})
+        changes = {"loan_amount": version * 1000, "customer": {"name": f"v{version}"}}
+        journal.record_turn(app_id, version, {"message": f"m{version}"}, state, changes)
+    return state
+
+
+def test_replay_from_snapshot_plus_tail_and_compaction():
+    with tempfile.TemporaryDirectory() as directory:
+        journal = EventJournal(directory, segment_bytes=300, snapshot_every=3, compact_segments=0)
+        final_a = _turns(journal, "A", 10)
+        final_b = _turns(journal, "B", 4)
+        asyncio.run(journal.close())
+        assert replay(directory) == {"A": (final_a, 11), "B": (final_b, 5)}
+        assert [e["message"] for e in history("A", directory) if e["type"] == "turn"] == [f"m{v}" for v in range(2, 12)]
+
+        before = len(glob.glob(os.path.join(directory, "*.log")))
+        assert before > 2 and journal.compact()
+        assert len(glob.glob(os.path.join(directory, "*.log"))) == 1
+        assert replay(directory) == {"A": (final_a, 11), "B": (final_b, 5)}
+        # Only the newest snapshot (version 10) and the turns from it on survive
+        assert [e["version"] for e in history("A", directory)] == [10, 10, 11]
+
+
+def test_torn_tail_is_ignored():
+    with tempfile.TemporaryDirectory() as directory:
+        journal = EventJournal(directory, snapshot_every=100)
+        _turns(journal, "A", 3)
+        asyncio.run(journal.close())
+        (path,) = glob.glob(os.path.join(directory, "*.log"))
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 5)  # crash in the middle of the last record
+        state, version = replay(directory)["A"]
+        assert version == 3 and state["customer"]["name"] == "v3"
+
+
+def test_segments_left_open_by_exited_processes_are_sealed():
+    with tempfile.TemporaryDirectory() as directory:
+        crashed = EventJournal(directory, snapshot_every=100)
+        _turns(crashed, "A", 3)  # Never closed
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])
+        exited.wait()
+        (path,) = glob.glob(os.path.join(directory, "*.open"))
+        name = os.path.basename(path).split("-")
+        name[1] = str(exited.pid)
+        os.rename(path, os.path.join(directory, "-".join(name)))
+        live = EventJournal(directory)
+        _turns(live, "B", 1)
+
+        assert len(glob.glob(os.path.join(directory, "*.log"))) == 1  # The exited writer's
+        assert len(glob.glob(os.path.join(directory, "*.open"))) == 1  # Ours, still being written
+        EventJournal(directory)
+        assert len(glob.glob(os.path.join(directory, "*.open"))) == 1
+        assert replay(directory)["A"][1] == 4
+
+
+class _EchoMaster:
+    name = "Master"
+
+    async def process(self, application, message):
+        application.customer.phone = message
+        return AgentResponse(agent_name=self.name, message="ok", data_updates={"loan_amount": 50000})
+
+
+def test_orchestrator_journals_turns():
+    with tempfile.TemporaryDirectory() as directory:
+        orchestrator = LoanOrchestrator()
+        orchestrator.journal = EventJournal(directory)
+        orchestrator.agents["master_agent"] = _EchoMaster()
+
+        async def run():
+            app_id = (await orchestrator.start_application("J", "first"))["application_id"]
+            await orchestrator.process_message(app_id, "second", {"tenure_months": 24})
+            await orchestrator.journal.close()
+            return app_id
+
+        app_id = asyncio.run(run())
+        state, version = replay(directory)[app_id]
+        assert version == 3 and state == orchestrator.get_application(app_id).model_dump()
+        turn = history(app_id, directory)[-1]
+        assert turn["message"] == "second" and turn["data_update"] == {"tenure_months": 24}
+        assert turn["responses"][0]["data_updates"] == {"loan_amount": 50000}
+        assert turn["changes"] == {"customer": {"phone": "second"}, "tenure_months": 24}
+
+
+if __name__ == "__main__":
+    test_replay_from_snapshot_plus_tail_and_compaction()
+    test_torn_tail_is_ignored()
+    test_segments_left_open_by_exited_processes_are_sealed()
+    test_orchestrator_journals_turns()
+    print("✅ Event journal tests passed")
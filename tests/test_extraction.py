@@ -0,0 +1,52 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'loan_advisor')))
+from services.extraction import extract, ExtractedFields, is_valid_pan, is_valid_aadhar
+
+
+def test_amount_readings_keep_their_callers_rules():
+    fields = ExtractedFields("I need 3 lakh loan")
+    assert fields.loan_amount == 300000 and fields.sales_amount == 300000
+    # Salary talk never becomes a loan amount in conversation, but is an explicit amount update
+    assert ExtractedFields("salary is 60,000 per month").loan_amount is None
+    assert ExtractedFields("reduce loan amount to 2 crores").amount_update == 20000000
+    assert ExtractedFields("ravi@example.com 450000").loan_amount is None
+    assert ExtractedFields("₹ 750000 please").sales_amount == 750000
+
+
+def test_tenure_and_alternatives():
+    assert ExtractedFields("increase tenure to 5 years").tenure_months == 60
+    assert ExtractedFields("24 months").tenure_months == 24
+    assert ExtractedFields("maybe 36").tenure_months is None
+    assert ExtractedFields("36 months or 4 years?").tenure_alternatives == (36, 48)
+
+
+def test_kyc_fields():
+    fields = ExtractedFields("my pan is abcde1234f and aadhar 123456789012")
+    assert fields.pan == "ABCDE1234F" and fields.pan_attempt == "ABCDE1234F"
+    assert fields.aadhar == fields.aadhar_attempt == "123456789012"
+    assert ExtractedFields("123456789012").aadhar_attempt is None  # Aadhar must be mentioned
+    assert ExtractedFields("PAN ABC1234567").pan_attempt == "ABC1234567"
+    assert not is_valid_pan("ABC1234567") and is_valid_pan("abcde1234f")
+    assert is_valid_aadhar("123456789012") and not is_valid_aadhar("12345")
+
+
+def test_salary_and_identity():
+    assert ExtractedFields("My monthly salary is 60,000").salary == 60000
+    assert ExtractedFields("salary 12 lakhs per annum").salary == 100000
+    assert ExtractedFields("My name is Ravi.").name == "Ravi"
+    assert ExtractedFields("write to ravi@example.com").email == "ravi@example.com"
+
+
+def test_extract_is_shared_per_message():
+    assert extract("24 months") is extract("24 months")
+    assert extract("Hello").all() == []
+
+
+if __name__ == "__main__":
+    test_amount_readings_keep_their_callers_rules()
+    test_tenure_and_alternatives()
+    test_kyc_fields()
+    test_salary_and_identity()
+    test_extract_is_shared_per_message()
+    print("✅ Extraction tests passed")
@@ -0,0 +1,76 @@
+import os
+import random
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'loan_advisor')))
+import numpy as np
+from services.finance import amortization, emi, max_principal, max_rate, min_tenure, totals
+
+
+def _reference_emi(principal, rate, tenure_months):
+    # The formula the agents used before the finance engine
+    monthly_rate = rate / (12 * 100)
+    value = principal * monthly_rate * (1 + monthly_rate)**tenure_months / ((1 + monthly_rate)**tenure_months - 1)
+    return round(value, 2)
+
+
+def test_rounded_emis_match_the_scalar_formula_exactly():
+    rng = random.Random(7)
+    principals = [rng.choice([rng.uniform(1e4, 1e7), rng.randrange(10000, 10000000, 5000)]) for _ in range(50000)]
+    rates = [rng.choice([9.5, 10.5, 11.5, 12.5, 13.0, rng.uniform(0.01, 30)]) for _ in principals]
+    tenures = [rng.randint(1, 480) for _ in principals]
+    expected = [_reference_emi(p, r, n) for p, r, n in zip(principals, rates, tenures)]
+    assert emi(principals, rates, tenures, decimals=2).tolist() == expected
+    # Scalars take the plain-Python path and return floats
+    value = emi(500000, 10.5, 36, decimals=2)
+    assert type(value) is float and value == _reference_emi(500000, 10.5, 36) == 16251.22
+
+
+def test_zero_rate_and_broadcasting():
+    assert emi(120000, 0, 12) == 10000.0
+    assert emi([120000, 120000], [0, 12], 12, decimals=2).tolist() == [10000.0, _reference_emi(120000, 12, 12)]
+    grid = emi(500000, 10.5, [12, 24, 36], decimals=2)
+    assert grid.shape == (3,) and (np.diff(grid) < 0).all()
+    total_payable, total_interest = totals(500000, 16251.22, 36)
+    assert total_payable == 16251.22 * 36 and total_interest == total_payable - 500000
+
+
+def test_amortization_schedules_pay_off_each_loan():
+    schedule = amortization([500000, 120000, 300000], [10.5, 0, 12.0], [36, 12, 24])
+    assert schedule.payment.shape == (3, 36)
+    assert np.allclose(schedule.balance[:, -1], 0) and (schedule.balance >= 0).all()
+    assert np.allclose(schedule.principal.sum(axis=1), [500000, 120000, 300000])
+    # Every month but the last pays the quoted EMI; nothing is due after the tenure
+    assert np.allclose(schedule.payment[0, :35], 16251.22)
+    assert np.allclose(schedule.payment[1, :12], 10000) and not schedule.payment[1, 12:].any()
+    assert schedule.total_interest[1] == 0
+    assert abs(schedule.total_payable[0] - 16251.22 * 36) < 1
+
+
+def test_min_tenure_matches_a_scan_over_tenures():
+    rng = random.Random(11)
+    for _ in range(3000):
+        p, rate = rng.uniform(5e4, 1e7), rng.choice([9.5, 10.5, 11.5, 12.5, rng.uniform(0.1, 30)])
+        target, start = rng.uniform(1000, 300000), rng.randint(0, 130)
+        scanned = next((n for n in range(max(start, 12), 121) if emi(p, rate, n) <= target), None)
+        assert min_tenure(p, rate, target, max(start, 12), 120) == scanned
+    batched = min_tenure([1500000, 1e7, 100000], [11.5, 12, 0], [40000, 50000, 5000], 12)
+    assert batched[0] == 47 and np.isnan(batched[1]) and batched[2] == 20
+
+
+def test_max_principal_and_rate_invert_the_emi():
+    amount = max_principal(11.5, 48, 20000)
+    assert abs(emi(amount, 11.5, 48) - 20000) < 1e-6
+    rate = max_rate(500000, 36, 20000)
+    assert emi(500000, rate, 36) <= 20000 < emi(500000, rate + 1e-9, 36)
+    # Not even an interest-free loan fits
+    assert max_rate(500000, 12, 10000) is None
+    assert np.isnan(max_rate([500000, 500000], 12, [10000, 50000])).tolist() == [True, False]
+
+
+if __name__ == "__main__":
+    test_rounded_emis_match_the_scalar_formula_exactly()
+    test_zero_rate_and_broadcasting()
+    test_amortization_schedules_pay_off_each_loan()
+    test_min_tenure_matches_a_scan_over_tenures()
+    test_max_principal_and_rate_invert_the_emi()
+    print("✅ Finance engine tests passed")
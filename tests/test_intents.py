@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("API_ENDPOINT", "http://localhost")
+os.environ.setdefault("JOURNAL_ENABLED", "false")
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(tempfile.mkdtemp(), "jobs.db"))
+from loan_advisor.services.loan_orchestrator import LoanOrchestrator
+from services.intents import IntentMatcher, detect_intents
+from models.loan_models import LoanApplication, Customer, LoanStatus
+
+
+def test_every_intent_in_one_pass():
+    intents = detect_intents("yes, please lower the rate on my loan plans")
+    assert {"affirmative", "negotiation", "rate_question", "rate_pushback", "sales", "repayment", "amount_update"} <= intents
+    assert detect_intents("hello") == frozenset()
+
+
+def test_substring_semantics_are_kept():
+    # Overlapping and nested keywords all count, as with the old `k in ml` checks
+    assert "sales" in detect_intents("emis") and "repayment" not in detect_intents("emis")
+    assert {"sales", "repayment"} <= detect_intents("emi options")
+    assert {"affirmative", "uncertainty"} <= detect_intents("not sure")  # "sure" inside "not sure"
+    assert "uncertainty" in detect_intents("i can't   decide")
+    assert "uncertainty" in detect_intents("so much confusion")
+    matcher = IntentMatcher({"a": ("ab",), "b": ("abc",), "c": ("bc",)})
+    assert matcher.match("xabcx") == {"a", "b", "c"}
+    assert matcher.match("xabx") == {"a"}
+
+
+def test_route_precedence():
+    orchestrator = LoanOrchestrator()
+    application = LoanApplication(
+        application_id="APP-1",
+        customer=Customer(customer_id="C1", name="Ravi", email="ravi@example.com"),
+        status=LoanStatus.SALES_DISCUSSION,
+    )
+    # PAN wins over sales keywords
+    orchestrator._route_by_intent(application, "loan of 3 lakh, pan ABCDE1234F")
+    assert application.status == LoanStatus.KYC_VERIFICATION
+    # Bare KYC only counts once amount and tenure are known
+    application.status = LoanStatus.INITIATED
+    orchestrator._route_by_intent(application, "kyc")
+    assert application.status == LoanStatus.INITIATED
+    # Without name/email everything stays with the master agent
+    application.customer.email = None
+    orchestrator._route_by_intent(application, "my aadhar is 123456789012")
+    assert application.status == LoanStatus.INITIATED
+
+
+if __name__ == "__main__":
+    test_every_intent_in_one_pass()
+    test_substring_semantics_are_kept()
+    test_route_precedence()
+    print("✅ Intent tests passed")
@@ -0,0 +1,158 @@
+import asyncio
+import os
+import sys
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("API_ENDPOINT", "http://localhost")
+os.environ.setdefault("JOURNAL_ENABLED", "false")
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(tempfile.mkdtemp(), "jobs.db"))
+from loan_advisor.services.loan_orchestrator import LoanOrchestrator
+from services.job_queue import FAILED, QUEUED, SUCCEEDED, JobQueue
+from models.loan_models import AgentResponse, LoanStatus
+
+
+async def _wait_for(queue, job_id, status, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        job = queue.get(job_id)
+        if job.status == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} is {queue.get(job_id).status}, expected {status}")
+
+
+def test_retries_with_backoff_and_resumes_from_checkpoint():
+    path = os.path.join(tempfile.mkdtemp(), "jobs.db")
+    queue = JobQueue(path, workers=2, backoff_base=0.02, backoff_max=0.05)
+    steps = []
+
+    async def handler(job):
+        if "uploaded" not in job.progress:
+            steps.append("upload")
+            queue.checkpoint(job, uploaded=True)
+        steps.append(f"email {job.attempts}")
+        if job.attempts < 3:
+            raise RuntimeError("smtp down")
+        return {"sent": True}
+
+    async def run():
+        queue.register("letter", handler)
+        job = queue.enqueue("letter", "A")
+        # One active job per (kind, application)
+        assert queue.enqueue("letter", "A").job_id == job.job_id
+        done = await _wait_for(queue, job.job_id, SUCCEEDED)
+        await queue.close()
+        return done
+
+    done = asyncio.run(run())
+    assert steps == ["upload", "email 1", "email 2", "email 3"]
+    assert done.attempts == 3 and done.result == {"sent": True} and done.last_error is None
+
+
+def test_gives_up_after_max_attempts():
+    path = os.path.join(tempfile.mkdtemp(), "jobs.db")
+    queue = JobQueue(path, backoff_base=0.01)
+
+    async def handler(job):
+        raise RuntimeError("bucket missing")
+
+    async def run():
+        queue.register("letter", handler)
+        job = queue.enqueue("letter", "A")
+        job = await _wait_for(queue, job.job_id, FAILED)
+        await queue.close()
+        return job
+
+    job = asyncio.run(run())
+    assert job.attempts == job.max_attempts
+    assert job.last_error == "RuntimeError: bucket missing"
+
+
+def test_queued_jobs_survive_a_restart():
+    path = os.path.join(tempfile.mkdtemp(), "jobs.db")
+    # Queued without a running loop (or by a process that exited before running it)
+    job = JobQueue(path).enqueue("letter", "A", {"n": 1})
+    assert JobQueue(path).get(job.job_id).status == QUEUED
+
+    async def run():
+        queue = JobQueue(path)
+        queue.register("letter", lambda job: asyncio.sleep(0, {"n": job.payload["n"] + 1}))
+        queue.start()
+        done = await _wait_for(queue, job.job_id, SUCCEEDED)
+        await queue.close()
+        return done
+
+    assert asyncio.run(run()).result == {"n": 2}
+
+
+class _Greeter:
+    name = "Master Agent"
+
+    async def process(self, application, message):
+        return AgentResponse(agent_name=self.name, message="Hello!")
+
+
+class _Approver:
+    name = "Eligibility Agent"
+
+    async def process(self, application, message):
+        return AgentResponse(agent_name=self.name, message="Approved.", next_agent="pdf_agent",
+                             data_updates={"status": LoanStatus.APPROVED.value})
+
+
+class _SlowDelivery:
+    """PDFAgent whose delivery waits until the test releases it"""
+
+    def __init__(self, pdf_agent):
+        self.pdf_agent = pdf_agent
+        self.name = pdf_agent.name
+        self.release = asyncio.Event()
+
+    async def process(self, application, message):
+        return await self.pdf_agent.process(application, message)
+
+    async def deliver_sanction_letter(self, application, progress, checkpoint):
+        await self.release.wait()
+        checkpoint(sanction_letter_path=f"sanction_letters/{application.application_id}.pdf")
+        return {"sanction_letter_path": progress["sanction_letter_path"], "emailed": True}
+
+
+def test_approval_turn_returns_before_the_letter_is_sent():
+    orchestrator = LoanOrchestrator()
+    orchestrator.jobs = JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+    orchestrator.jobs.register("sanction_letter", orchestrator._deliver_sanction_letter)
+    orchestrator.agents["master_agent"] = _Greeter()
+    orchestrator.agents["eligibility_agent"] = _Approver()
+
+    async def run():
+        delivery = _SlowDelivery(orchestrator.agents["pdf_agent"])
+        orchestrator.agents["pdf_agent"] = delivery
+        app_id = (await orchestrator.start_application("J", "hi"))["application_id"]
+        setup = {"name": "Asha", "email": "asha@example.com", "status": LoanStatus.ELIGIBILITY_CHECK.value}
+        result = await orchestrator.process_message(app_id, "ok", setup)
+
+        application = orchestrator.get_application(app_id)
+        assert result["status"] == "approved" and result["job_id"] == application.sanction_letter_job_id
+        assert application.sanction_letter_status == "queued"
+        # Asking again while it is being prepared does not queue a second letter
+        again = await orchestrator.process_message(app_id, "where is my sanction letter")
+        assert again["job_id"] is None and "still being prepared" in again["message"]
+
+        delivery.release.set()
+        job = await _wait_for(orchestrator.jobs, result["job_id"], SUCCEEDED)
+        assert orchestrator.get_job(job.job_id)["attempts"] == 1
+        await orchestrator.jobs.close()
+        return app_id, job
+
+    app_id, job = asyncio.run(run())
+    application = orchestrator.get_application(app_id)
+    assert application.status == LoanStatus.COMPLETED
+    assert application.sanction_letter_status == "sent"
+    assert application.sanction_letter_path == job.result["sanction_letter_path"]
+
+
+if __name__ == "__main__":
+    test_retries_with_backoff_and_resumes_from_checkpoint()
+    test_gives_up_after_max_attempts()
+    test_queued_jobs_survive_a_restart()
+    test_approval_turn_returns_before_the_letter_is_sent()
+    print("✅ Job queue tests passed")
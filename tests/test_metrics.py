@@ -0,0 +1,43 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from loan_advisor.services.metrics import Counter, Histogram, register_callback, render_prometheus, labels
+
+
+def test_histogram_exposition_is_cumulative():
+    hist = Histogram("test_phase_seconds", "test", buckets=(0.1, 1.0))
+    hist.observe(0.05, phase="extract")
+    hist.observe(0.5, phase="extract")
+    hist.observe(5, phase="extract")
+    lines = hist.render()
+    assert 'test_phase_seconds_bucket{phase="extract",le="0.1"} 1' in lines
+    assert 'test_phase_seconds_bucket{phase="extract",le="1"} 2' in lines
+    assert 'test_phase_seconds_bucket{phase="extract",le="+Inf"} 3' in lines
+    assert 'test_phase_seconds_count{phase="extract"} 3' in lines
+    assert hist.count(phase="extract") == 3
+
+
+def test_counter_labels_and_escaping():
+    counter = Counter("test_fallback_total", "test")
+    counter.inc(agent='Sales "Agent"', reason="timeout")
+    counter.inc(agent='Sales "Agent"', reason="timeout")
+    assert counter.value(agent='Sales "Agent"', reason="timeout") == 2
+    assert 'test_fallback_total{agent="Sales \\"Agent\\"",reason="timeout"} 2' in counter.render()
+
+
+def test_callback_metrics_render_live_values():
+    state = {"depth": 3}
+    register_callback("test_queue_depth", "test", lambda: state["depth"])
+    register_callback("test_admitted_total", "test", lambda: {labels(priority="interactive"): 7}, "counter")
+    state["depth"] = 4
+    text = render_prometheus()
+    assert "test_queue_depth 4" in text
+    assert "# TYPE test_admitted_total counter" in text
+    assert 'test_admitted_total{priority="interactive"} 7' in text
+
+
+if __name__ == "__main__":
+    test_histogram_exposition_is_cumulative()
+    test_counter_labels_and_escaping()
+    test_callback_metrics_render_live_values()
+    print("✅ Metrics tests passed")
@@ -0,0 +1,80 @@
+import itertools
+import os
+import random
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'loan_advisor')))
+from services.rate_calculator import RateCalculator
+
+
+def _reference_rate(loan_amount, tenure_months=36, credit_score=None):
+    # The if/elif ladders RateCalculator.calculate_rate compiled away
+    if loan_amount <= 500000:
+        amount_premium = 1.5
+    elif loan_amount <= 1000000:
+        amount_premium = 1.2
+    elif loan_amount <= 2500000:
+        amount_premium = 1.0
+    elif loan_amount <= 5000000:
+        amount_premium = 0.8
+    elif loan_amount <= 10000000:
+        amount_premium = 0.6
+    else:
+        amount_premium = 0.4
+    if tenure_months <= 12:
+        tenure_premium = 0.0
+    elif tenure_months <= 24:
+        tenure_premium = 0.3
+    elif tenure_months <= 36:
+        tenure_premium = 0.5
+    elif tenure_months <= 48:
+        tenure_premium = 0.7
+    else:
+        tenure_premium = 1.0
+    credit_premium = 0.0
+    if credit_score:
+        if credit_score >= 800:
+            credit_premium = -0.5
+        elif credit_score >= 750:
+            credit_premium = 0.0
+        elif credit_score >= 700:
+            credit_premium = 0.3
+        elif credit_score >= 650:
+            credit_premium = 0.8
+        else:
+            credit_premium = 1.5
+    final_rate = 9.0 + amount_premium + tenure_premium + credit_premium
+    final_rate = max(9.5, min(15.0, final_rate))
+    return round(final_rate * 2) / 2
+
+
+AMOUNTS = [0, 1, 499999.99, 500000, 500000.01, 999999, 1000000, 1000001, 2500000, 2500000.5,
+           5000000, 5000001, 10000000, 10000000.01, 5e8, float("nan")]
+TENURES = [-3, 0, 1, 11, 12, 12.5, 13, 24, 25, 36, 36.0, 37, 48, 49, 60, 120, 121, 480, float("nan")]
+SCORES = [None, 0, 300, 649, 649.5, 650, 699, 700, 749, 750, 799, 800, 900]
+
+
+def test_lookup_is_bit_identical_to_the_ladders():
+    calculator = RateCalculator()
+    for amount, tenure, score in itertools.product(AMOUNTS, TENURES, SCORES + [float("nan")]):
+        assert calculator.calculate_rate(amount, tenure, score) == _reference_rate(amount, tenure, score)
+    rng = random.Random(5)
+    for _ in range(20000):
+        args = (rng.uniform(0, 2e7), rng.randint(0, 150), rng.choice([None, rng.randint(300, 900)]))
+        assert calculator.calculate_rate(*args) == _reference_rate(*args)
+
+
+def test_vectorized_rates_match_scalar_lookups():
+    calculator = RateCalculator()
+    rows = list(itertools.product(AMOUNTS, TENURES, SCORES))
+    amounts, tenures, scores = zip(*rows)
+    rates = calculator.calculate_rates(amounts, tenures, scores)
+    assert rates.tolist() == [_reference_rate(*row) for row in rows]
+    # Scalars broadcast, scores are optional
+    assert calculator.calculate_rates(800000, [12, 24, 36, 48, 60]).tolist() == \
+        [_reference_rate(800000, t) for t in (12, 24, 36, 48, 60)]
+
+
+if __name__ == "__main__":
+    test_lookup_is_bit_identical_to_the_ladders()
+    test_vectorized_rates_match_scalar_lookups()
+    print("✅ Rate calculator tests passed")
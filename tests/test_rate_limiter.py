@@ -0,0 +1,63 @@
+import asyncio
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from loan_advisor.services.rate_limiter import LLMRateLimiter, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+
+
+def test_interactive_calls_jump_ahead_of_background_work():
+    async def run():
+        limiter = LLMRateLimiter(max_concurrency=1)
+        order = []
+
+        async def call(label, priority):
+            async with limiter.limit(priority):
+                order.append(label)
+                await asyncio.sleep(0.01)
+
+        await limiter.acquire()  # occupy the only slot so everything queues
+        tasks = [
+            asyncio.create_task(call("email-1", PRIORITY_BACKGROUND)),
+            asyncio.create_task(call("email-2", PRIORITY_BACKGROUND)),
+            asyncio.create_task(call("chat-1", PRIORITY_INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        assert limiter.queue_depth() == 3
+        limiter.release()
+        await asyncio.gather(*tasks)
+        return order, limiter.stats()
+
+    order, stats = asyncio.run(run())
+    assert order == ["chat-1", "email-1", "email-2"]
+    assert stats["max_queue_depth"] == 3
+    assert stats["admitted"] == {"interactive": 2, "background": 2}
+
+
+def test_requests_per_minute_bucket_delays_excess_calls():
+    async def run():
+        # 600 RPM = one request every 0.1s once the 600-request burst is spent
+        limiter = LLMRateLimiter(rpm=600)
+        limiter.requests.tokens = 1
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await limiter.acquire()
+        limiter.release()
+        await limiter.acquire()
+        limiter.release()
+        return loop.time() - start
+
+    assert asyncio.run(run()) >= 0.08
+
+
+def test_tokens_per_minute_budget_is_reconciled():
+    limiter = LLMRateLimiter(tpm=1000)
+    limiter.tokens.consume(500)
+    limiter.record_usage(estimated_tokens=500, actual_tokens=200)
+    assert round(limiter.tokens.tokens) == 800
+
+
+if __name__ == "__main__":
+    test_interactive_calls_jump_ahead_of_background_work()
+    test_requests_per_minute_bucket_delays_excess_calls()
+    test_tokens_per_minute_budget_is_reconciled()
+    print("✅ Rate limiter tests passed")
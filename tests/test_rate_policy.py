@@ -0,0 +1,116 @@
+import copy
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'loan_advisor')))
+os.environ.setdefault("API_ENDPOINT", "http://localhost")
+os.environ.setdefault("JOURNAL_ENABLED", "false")
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(tempfile.mkdtemp(), "jobs.db"))
+from services.rate_calculator import RateCalculator
+from services.rate_policy import DEFAULT_RATE_POLICY, RATE_POLICY_PATH, RatePolicy, RatePolicyError, RatePolicyStore
+
+SHIPPED_POLICY = os.path.join(os.path.dirname(__file__), '..', 'config', 'rate_policy.json')
+
+
+def _write(path, policy):
+    # Rewrite in place and move the mtime on, as an editor saving the file would
+    with open(path, "w") as f:
+        json.dump(policy, f)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_shipped_policy_matches_the_builtin_one():
+    shipped = RatePolicy.load(SHIPPED_POLICY)
+    builtin = RatePolicy.from_dict(DEFAULT_RATE_POLICY)
+    assert shipped.version != builtin.version
+    assert shipped.table.table == builtin.table.table
+    for amount in (100000, 500000, 800000, 2000000, 5000000, float("nan")):
+        assert shipped.negotiated_rate(12.0, amount) == builtin.negotiated_rate(12.0, amount)
+        assert shipped.slab_rate(amount) == builtin.slab_rate(amount)
+    # The ladders these replaced
+    assert [builtin.negotiated_rate(11.0, a) for a in (1999999, 2000000, 5000000)] == [10.5, 10.25, 10.0]
+    assert builtin.negotiated_rate(10.0, 6000000) == 9.5
+    assert [builtin.slab_rate(a) for a in (500000, 500001, 1000000, 1000001, None)] == [10.5, 11.5, 11.5, 12.5, 11.5]
+
+
+def test_invalid_policies_are_rejected():
+    def broken(change):
+        policy = copy.deepcopy(DEFAULT_RATE_POLICY)
+        change(policy)
+        try:
+            RatePolicy.from_dict(policy)
+        except RatePolicyError as e:
+            return str(e)
+        raise AssertionError("policy was accepted")
+
+    assert "version" in broken(lambda p: p.pop("version"))
+    assert "unknown keys: base_rte" in broken(lambda p: p.update(base_rte=9.0))
+    assert "amount_slabs[2].up_to: bounds must increase" in broken(lambda p: p["amount_slabs"][2].update(up_to=1))
+    assert "open-ended" in broken(lambda p: p["tenure_slabs"][-1].update(up_to=60))
+    assert "credit_bands[1].premium" in broken(lambda p: p["credit_bands"][1].update(premium="0.8"))
+    assert "negotiation.discounts" in broken(lambda p: p["negotiation"]["discounts"][0].update(discount=-1))
+    assert "min_rate" in broken(lambda p: p.update(min_rate=16.0))
+
+
+def test_changed_file_is_swapped_in_and_bad_edits_are_ignored():
+    path = os.path.join(tempfile.mkdtemp(), "rate_policy.json")
+    policy = copy.deepcopy(DEFAULT_RATE_POLICY)
+    policy["version"] = "v1"
+    _write(path, policy)
+    calculator = RateCalculator(RatePolicyStore(path, poll_seconds=0))
+    assert calculator.policy.version == "v1" and calculator.calculate_rate(800000, 36) == 10.5
+
+    old = calculator.policy
+    policy.update(version="v2", base_rate=10.0)
+    policy["slab_rates"]["slabs"][0]["rate"] = 9.75
+    _write(path, policy)
+    assert calculator.policy.version == "v2"
+    assert calculator.calculate_rate(800000, 36) == 11.5
+    assert calculator.calculate_rates(800000, [12, 36]).tolist() == [11.0, 11.5]
+    assert calculator.get_slab_rate(300000) == 9.75
+    assert calculator.get_rate_breakdown(800000)["policy_version"] == "v2"
+    # A policy taken earlier keeps pricing with its own version
+    assert old.version == "v1" and old.rate(800000, 36) == 10.5
+
+    with open(path, "w") as f:
+        f.write('{"version": "v3", "base_rate": ')
+    assert calculator.policies.reload() is False
+    assert calculator.policy.version == "v2"
+
+
+def test_default_path_and_rate_benefits_follow_the_policy_file():
+    if "RATE_POLICY_PATH" not in os.environ:
+        assert os.path.samefile(RATE_POLICY_PATH, SHIPPED_POLICY)
+    path = os.path.join(tempfile.mkdtemp(), "rate_policy.json")
+    policy = copy.deepcopy(DEFAULT_RATE_POLICY)
+    _write(path, policy)
+    calculator = RateCalculator(RatePolicyStore(path, poll_seconds=0))
+    assert calculator.get_rate_breakdown(300000, 36)["benefits"] == "Competitive market rate"
+    assert calculator.get_rate_breakdown(800000, 24)["benefits"] == " Volume discount of 0.3% applied!  Short tenure bonus!"
+
+    # Flat amount premiums and a cheaper 36-month term: no discount left to claim
+    for slab in policy["amount_slabs"]:
+        slab["premium"] = 1.0
+    policy["tenure_slabs"][2]["premium"] = 0.0
+    _write(path, policy)
+    assert calculator.get_rate_breakdown(6000000, 24)["benefits"] == "Competitive market rate"
+
+
+def test_quotes_are_stamped_with_the_policy_version():
+    from loan_advisor.services.loan_orchestrator import LoanOrchestrator
+    orchestrator = LoanOrchestrator()
+    quote = orchestrator.quote_affordability(100000, 800000, 36)
+    assert quote["policy_version"] == orchestrator.rate_calculator.policy.version
+    assert quote["interest_rate"] == orchestrator.rate_calculator.calculate_rate(800000, 36)
+
+
+if __name__ == "__main__":
+    test_shipped_policy_matches_the_builtin_one()
+    test_invalid_policies_are_rejected()
+    test_changed_file_is_swapped_in_and_bad_edits_are_ignored()
+    test_default_path_and_rate_benefits_follow_the_policy_file()
+    test_quotes_are_stamped_with_the_policy_version()
+    print("✅ Rate policy tests passed")
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import sys
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from loan_advisor.services.resilience import CircuitBreaker, LatencyTracker, hedged
+from loan_advisor.services.llm_service import LLMService, llm_turn_deadline
+from loan_advisor.services.rate_limiter import LLMRateLimiter
+
+
+def test_breaker_opens_then_probes_after_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.01)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    asyncio.run(asyncio.sleep(0.02))
+    assert breaker.allow()       # half-open probe
+    assert not breaker.allow()   # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_latency_percentile_needs_min_samples():
+    tracker = LatencyTracker(min_samples=3)
+    tracker.record(0.1)
+    assert tracker.percentile(95) is None
+    tracker.record(0.2)
+    tracker.record(0.9)
+    assert tracker.percentile(50) == 0.2
+    assert tracker.percentile(95) == 0.9
+
+
+def test_hedged_second_attempt_wins_over_slow_first():
+    delays = [0.5, 0.01]
+    fired = []
+
+    async def attempt():
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+
+    result = asyncio.run(hedged(attempt, 0.02, lambda: fired.append(True)))
+    assert result == 0.01
+    assert fired == [True]
+
+
+class _HangingChain:
+    async def ainvoke(self, inputs):
+        await asyncio.sleep(10)
+
+
+def test_turn_deadline_falls_back_and_trips_breaker():
+    service = LLMService()
+    service.cache = None
+    service.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    service._get_chain = lambda canonical: _HangingChain()
+
+    async def run():
+        with llm_turn_deadline(0.05):
+            first = await service.generate_response("Sales Agent", {}, "EMI for 3 lakh?")
+        second = await service.generate_response("Sales Agent", {}, "EMI for 3 lakh?")
+        return first, second
+
+    first, second = asyncio.run(run())
+    fallback = service._get_fallback_response("Sales Agent", {})
+    assert first == second == fallback
+    assert service.timeouts == 1
+    assert service.breaker.rejections == 1
+
+
+class _AnsweringChain:
+    async def ainvoke(self, inputs):
+        return "Sure."
+
+
+def test_cancelled_half_open_probe_lets_the_next_call_through():
+    service = LLMService()
+    service.cache = None
+    service.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    service.breaker.record_failure()
+    service._get_chain = lambda canonical: _HangingChain()
+
+    async def run():
+        probe = asyncio.ensure_future(service.generate_response("Sales Agent", {}, "EMI for 3 lakh?"))
+        await asyncio.sleep(0.01)
+        assert service.breaker.state == CircuitBreaker.HALF_OPEN
+        probe.cancel()
+        try:
+            await probe
+        except asyncio.CancelledError:
+            pass
+        service._get_chain = lambda canonical: _AnsweringChain()
+        return await service.generate_response("Sales Agent", {}, "EMI for 4 lakh?")
+
+    assert asyncio.run(run()) == "Sure."
+    assert service.breaker.state == CircuitBreaker.CLOSED
+    assert service.breaker.rejections == 0
+
+
+def test_rate_limiter_queueing_is_not_a_provider_timeout():
+    service = LLMService()
+    service.cache = None
+    service.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    service._get_chain = lambda canonical: _AnsweringChain()
+
+    async def run():
+        service.limiter = LLMRateLimiter(max_concurrency=1)
+        await service.limiter.acquire()  # Another call holds the only slot past the deadline
+        with llm_turn_deadline(0.05):
+            return await service.generate_response("Sales Agent", {}, "EMI for 3 lakh?")
+
+    assert asyncio.run(run()) == service._get_fallback_response("Sales Agent", {})
+    assert service.timeouts == 0
+    assert service.breaker.state == CircuitBreaker.CLOSED
+
+
+class _SlowChain:
+    async def ainvoke(self, inputs):
+        await asyncio.sleep(0.3)
+        return "Sure."
+
+
+def test_coalesced_follower_keeps_its_own_deadline():
+    service = LLMService()
+    service.cache = None
+    service._get_chain = lambda canonical: _SlowChain()
+
+    async def follower():
+        await asyncio.sleep(0.01)
+        with llm_turn_deadline(0.05):
+            started = time.monotonic()
+            response = await service.generate_response("Sales Agent", {}, "EMI for 3 lakh?")
+            return response, time.monotonic() - started
+
+    async def run():
+        return await asyncio.gather(service.generate_response("Sales Agent", {}, "EMI for 3 lakh?"), follower())
+
+    leader, (response, waited) = asyncio.run(run())
+    assert leader == "Sure." and service.inflight.coalesced == 1
+    assert response == service._get_fallback_response("Sales Agent", {}) and waited < 0.2
+    assert service.timeouts == 0 and service.breaker.state == CircuitBreaker.CLOSED
+
+
+if __name__ == "__main__":
+    test_breaker_opens_then_probes_after_reset_timeout()
+    test_latency_percentile_needs_min_samples()
+    test_hedged_second_attempt_wins_over_slow_first()
+    test_turn_deadline_falls_back_and_trips_breaker()
+    test_cancelled_half_open_probe_lets_the_next_call_through()
+    test_rate_limiter_queueing_is_not_a_provider_timeout()
+    test_coalesced_follower_keeps_its_own_deadline()
+    print("✅ Resilience tests passed")
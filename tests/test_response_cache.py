@@ -0,0 +1,109 @@
+import asyncio
+import os
+import sys
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from loan_advisor.services.response_cache import ResponseCache
+from loan_advisor.services.llm_service import LLMService
+from loan_advisor.services.single_flight import CoalescedCallCancelled, SingleFlight
+
+
+def test_lru_eviction_and_counters():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # "a" becomes most recently used
+    cache.set("c", "3")           # evicts "b"
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1 and stats["evictions"] == 1
+
+
+def test_ttl_expiry():
+    cache = ResponseCache(max_entries=4, ttl_seconds=0.01)
+    cache.set("a", "1")
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+class _CountingChain:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        return f"Hello {inputs['customer_name']}, let's explore loan options."
+
+
+def test_llm_service_cache_is_name_agnostic():
+    service = LLMService()
+    chain = _CountingChain()
+    service._get_chain = lambda canonical: chain
+
+    async def run():
+        first = await service.generate_response("Master Agent", {"customer_name": "Ravi", "status": "initiated"}, "Customer wants to explore loan options")
+        second = await service.generate_response("AURA", {"customer_name": "Priya", "status": "initiated"}, "customer wants to explore  loan options")
+        third = await service.generate_response("Master Agent", {"customer_name": "Priya", "status": "initiated"}, "Connect to sales agent", use_cache=False)
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first == "Hello Ravi, let's explore loan options."
+    assert second == "Hello Priya, let's explore loan options."
+    assert chain.calls == 2
+    assert service.cache.stats()["hits"] == 1
+
+
+class _SlowChain:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return f"Welcome {inputs['customer_name']}!"
+
+
+def test_llm_service_coalesces_concurrent_identical_requests():
+    service = LLMService()
+    service.cache = None  # coalescing must work without the response cache
+    chain = _SlowChain()
+    service._get_chain = lambda canonical: chain
+
+    async def run():
+        return await asyncio.gather(*[
+            service.generate_response("Master Agent", {"customer_name": name, "status": "initiated"}, "Hello")
+            for name in ["Ravi", "Priya", "Ravi"]
+        ])
+
+    responses = asyncio.run(run())
+    assert responses == ["Welcome Ravi!", "Welcome Priya!", "Welcome Ravi!"]
+    assert chain.calls == 1
+    assert service.inflight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 2}
+
+
+def test_cancelled_leader_fails_followers_instead_of_cancelling_them():
+    flight = SingleFlight()
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do("key", lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0)
+        leader.cancel()
+        try:
+            await follower
+        except CoalescedCallCancelled:
+            return leader.cancelled(), flight.in_flight()
+
+    assert asyncio.run(run()) == (True, 0)
+
+
+if __name__ == "__main__":
+    test_lru_eviction_and_counters()
+    test_ttl_expiry()
+    test_llm_service_cache_is_name_agnostic()
+    test_llm_service_coalesces_concurrent_identical_requests()
+    test_cancelled_leader_fails_followers_instead_of_cancelling_them()
+    print("✅ Response cache tests passed")
@@ -0,0 +1,36 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'loan_advisor')))
+from services.sharding import HashRing, new_application_id
+
+
+def test_ring_is_stable_and_balanced():
+    ring = HashRing(4)
+    keys = [f"app-{i}" for i in range(8000)]
+    owners = [ring.shard_for(k) for k in keys]
+    other = HashRing(4)  # as built in another process
+    assert owners == [other.shard_for(k) for k in keys]
+    counts = [owners.count(shard) for shard in range(4)]
+    assert min(counts) > 0.7 * 2000 and max(counts) < 1.3 * 2000
+
+
+def test_adding_a_shard_moves_few_keys():
+    before, after = HashRing(4), HashRing(5)
+    keys = [f"app-{i}" for i in range(5000)]
+    moved = sum(before.shard_for(k) != after.shard_for(k) for k in keys)
+    assert moved < 0.3 * len(keys)  # ~1/5 expected, vs ~4/5 for modulo hashing
+    assert all(after.shard_for(k) == 4 for k in keys if before.shard_for(k) != after.shard_for(k))
+
+
+def test_minted_ids_route_back_to_their_worker():
+    ring = HashRing(3)
+    for shard in range(3):
+        assert all(ring.shard_for(new_application_id(ring, shard)) == shard for _ in range(20))
+    assert len(new_application_id()) == 36
+
+
+if __name__ == "__main__":
+    test_ring_is_stable_and_balanced()
+    test_adding_a_shard_moves_few_keys()
+    test_minted_ids_route_back_to_their_worker()
+    print("✅ Sharding tests passed")
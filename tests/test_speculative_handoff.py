@@ -0,0 +1,82 @@
+import asyncio
+import os
+import sys
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("API_ENDPOINT", "http://localhost")
+os.environ.setdefault("JOURNAL_ENABLED", "false")
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(tempfile.mkdtemp(), "jobs.db"))
+from loan_advisor.services.loan_orchestrator import LoanOrchestrator
+from models.loan_models import AgentResponse, LoanStatus
+
+
+class _SlowMaster:
+    name = "Master"
+
+    def __init__(self, hand_off=True):
+        self.hand_off = hand_off
+
+    async def process(self, application, message):
+        await asyncio.sleep(0.2)
+        if not self.hand_off:
+            return AgentResponse(agent_name=self.name, message="What is your email?")
+        return AgentResponse(agent_name=self.name, message="Welcome!", next_agent="sales_agent",
+                             data_updates={"status": LoanStatus.SALES_DISCUSSION.value})
+
+
+class _SlowSales:
+    name = "Sales"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def process(self, application, message):
+        self.calls += 1
+        await asyncio.sleep(0.2)
+        application.tenure_months = 36
+        return AgentResponse(agent_name=self.name, message=f"Status seen: {application.status.value}")
+
+
+def _orchestrator(master, sales):
+    orchestrator = LoanOrchestrator()
+    orchestrator.speculative = True  # Off by default
+    orchestrator.agents["master_agent"] = master
+    orchestrator.agents["sales_agent"] = sales
+    return orchestrator
+
+
+async def _turn(orchestrator):
+    result = await orchestrator.start_application("SPEC", "Hello")
+    app_id = result["application_id"]
+    application, version = orchestrator.applications.load(app_id)
+    application.customer.name = "Ravi"
+    application.customer.email = "ravi@example.com"
+    application.status = LoanStatus.INITIATED
+    orchestrator.applications.save(application, expected_version=version)
+    result = await orchestrator.process_message(app_id, "hi there")
+    return result, orchestrator.get_application(app_id)
+
+
+def test_correct_prediction_is_adopted():
+    sales = _SlowSales()
+    orchestrator = _orchestrator(_SlowMaster(), sales)
+    result, application = asyncio.run(_turn(orchestrator))
+    assert result["message"] == "Welcome!\n\nStatus seen: sales_discussion"
+    assert application.tenure_months == 36  # speculative mutations adopted
+    assert orchestrator.speculation_hits == 1
+
+
+def test_misprediction_is_discarded():
+    sales = _SlowSales()
+    orchestrator = _orchestrator(_SlowMaster(hand_off=False), sales)
+    result, application = asyncio.run(_turn(orchestrator))
+    assert result["message"] == "What is your email?"
+    assert application.tenure_months is None
+    assert application.status == LoanStatus.INITIATED
+    assert orchestrator.speculation_hits == 0
+
+
+if __name__ == "__main__":
+    test_correct_prediction_is_adopted()
+    test_misprediction_is_discarded()
+    print("✅ Speculative hand-off tests passed")